@@ -6,6 +6,7 @@ from django.forms import TextInput, Textarea
 from django.utils.safestring import mark_safe
 
 #your files
+from .authentication import invalidate_cached_users
 from .models import User, ContactInfo, SocialLink
 
 
@@ -97,7 +98,10 @@ class AccountsUserAdmin(UserAdmin):
     actions = ['activate_users', 'deactivate_users']
 
     def activate_users(self, request, queryset):
+        user_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_active=True)
+        # update() skips post_save, so drop the cached users here
+        invalidate_cached_users(user_ids)
         self.message_user(
             request,
             f'{updated} کاربر با موفقیت فعال شدند.',
@@ -107,7 +111,10 @@ class AccountsUserAdmin(UserAdmin):
     activate_users.short_description = "فعال‌سازی کاربران انتخاب‌شده"
 
     def deactivate_users(self, request, queryset):
+        user_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_active=False)
+        # update() skips post_save, so drop the cached users here
+        invalidate_cached_users(user_ids)
         self.message_user(
             request,
             f'{updated} کاربر با موفقیت غیرفعال شدند.',
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from .authentication import drop_cached_user
+
+        # any saved or deleted user is reloaded on its next request in this process
+        post_save.connect(drop_cached_user, sender=self.get_model('User'), dispatch_uid='accounts_user_cache_save')
+        post_delete.connect(drop_cached_user, sender=self.get_model('User'), dispatch_uid='accounts_user_cache_delete')
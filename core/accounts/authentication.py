@@ -0,0 +1,184 @@
+# python files
+import copy
+import threading
+import time
+
+# django files
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+# rest files
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+
+# packages
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import (
+    TokenBlacklistSerializer,
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+# your files
+from .tokens import RefreshToken, outstand, revoke
+
+# copied into every token from the user at login and on each refresh
+USER_CLAIMS = ('role', 'is_staff', 'is_superuser')
+
+DEFAULT_USER_CACHE_TTL = 60
+USER_CACHE_MAX_SIZE = 10_000
+
+_users = {}
+_users_lock = threading.Lock()
+
+
+def user_cache_ttl():
+    return getattr(settings, 'AUTH_USER_CACHE_TTL', DEFAULT_USER_CACHE_TTL)
+
+
+def get_cached_user(user_id):
+    """
+    User for ``user_id`` from this process' cache, loading it when missing or
+    older than AUTH_USER_CACHE_TTL seconds. Returns a copy, so a view changing
+    ``request.user`` never touches the cached instance; None if there is no such user.
+    """
+    key = str(user_id)
+    now = time.monotonic()
+    entry = _users.get(key)
+    if entry is None or entry[0] <= now:
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        with _users_lock:
+            if len(_users) >= USER_CACHE_MAX_SIZE:
+                _users.clear()
+            _users[key] = entry = (now + user_cache_ttl(), user)
+    return copy.copy(entry[1])
+
+
+def invalidate_cached_users(user_ids=None):
+    """Drop the given users (or everyone) from this process' cache."""
+    with _users_lock:
+        if user_ids is None:
+            _users.clear()
+        else:
+            for user_id in user_ids:
+                _users.pop(str(user_id), None)
+
+
+def drop_cached_user(sender, instance, **kwargs):
+    invalidate_cached_users([instance.pk])
+
+
+def stamp_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class ClaimsTokenUser(TokenUser):
+    """
+    کاربر بدون پایگاه داده، ساخته‌شده از claimهای توکن دسترسی.
+    Enough for permission checks (is_staff, is_superuser, role); views that need
+    the real model use CachedUserAuthentication instead.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', 'USER')
+
+
+class CachedUserAuthentication(JWTAuthentication):
+    """JWT authentication that loads the full user through the per-process cache."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise AuthenticationFailed(_('Token contained no recognizable user identification')) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+
+class TokenClaimsAuthentication(CachedUserAuthentication):
+    """
+    Reads (GET/HEAD/OPTIONS) by ordinary users get a ClaimsTokenUser straight
+    from the token with no query at all. Writes, and every request whose token
+    claims staff or superuser, get the cached full user, so a deactivated or
+    demoted admin loses admin access within AUTH_USER_CACHE_TTL, or at once in
+    the process where the change was made. Claims alone never grant more than a
+    regular user's access.
+    """
+
+    def authenticate(self, request):
+        self.safe = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if (
+            not self.safe
+            or not all(claim in validated_token for claim in USER_CLAIMS)
+            or validated_token['is_staff'] or validated_token['is_superuser']
+        ):
+            # older tokens without the claims fall back to the model too
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise AuthenticationFailed(_('Token contained no recognizable user identification'))
+        return ClaimsTokenUser(validated_token)
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        return stamp_claims(super().get_token(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh re-reads the user (through the cache) and re-stamps the claims, so a
+    role change reaches the next access token and inactive users get none.
+    With rotation the old token is blacklisted first; if another request already
+    did that, this one is a replay and is refused.
+    """
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = get_cached_user(refresh.payload.get(api_settings.USER_ID_CLAIM))
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        stamp_claims(refresh, user)
+
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            if not revoke(refresh, user):
+                raise AuthenticationFailed(_('Token is blacklisted'), code='token_not_valid')
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            outstand(refresh, user)
+
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+class RevokingTokenBlacklistSerializer(TokenBlacklistSerializer):
+    """خروج از حساب: توکن refresh باطل می‌شود و این پروسس بلافاصله آن را رد می‌کند."""
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        revoke(self.token_class(attrs['refresh']))
+        return {}
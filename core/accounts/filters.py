@@ -0,0 +1,18 @@
+# packages
+import django_filters
+
+# your files
+from .models import User
+
+
+class UserFilter(django_filters.FilterSet):
+    """
+    فیلتر فهرست کاربران؛ همه روی ستون‌های ایندکس‌شده (نقش، وضعیت، تاریخ عضویت)
+    ?role=USER&is_active=true&joined_after=2024-01-01&joined_before=2024-12-31
+    """
+    joined_after = django_filters.DateTimeFilter(field_name='date_joined', lookup_expr='gte')
+    joined_before = django_filters.DateTimeFilter(field_name='date_joined', lookup_expr='lt')
+
+    class Meta:
+        model = User
+        fields = ['role', 'is_active', 'is_staff', 'joined_after', 'joined_before']
@@ -0,0 +1,128 @@
+# python files
+import fcntl
+import os
+import random
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# django files
+from django.conf import settings
+from django.contrib.auth import hashers
+
+_pool = None
+_pool_lock = threading.Lock()
+_held = threading.local()
+
+
+def hashing_slots():
+    """PASSWORD_HASHING_SLOTS hashes at once on the whole host, across every worker process; None = half the cores."""
+    return getattr(settings, 'PASSWORD_HASHING_SLOTS', None) or max(1, (os.cpu_count() or 2) // 2)
+
+
+def hashing_workers():
+    """PASSWORD_HASHING_WORKERS threads per process; by default as many as there are host slots."""
+    return getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or hashing_slots()
+
+
+def hashing_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=hashing_workers(), thread_name_prefix='password-hash')
+    return _pool
+
+
+@contextmanager
+def hashing_slot():
+    """
+    Hold one of the host's hashing_slots(), an flock on a file in
+    PASSWORD_HASHING_LOCK_DIR. A free slot is taken at once; when all are busy
+    this blocks on a random one. The kernel drops the lock with the process,
+    so a killed worker never leaks its slot.
+    """
+    if getattr(_held, 'slot', False):
+        yield
+        return
+    lock_dir = getattr(settings, 'PASSWORD_HASHING_LOCK_DIR', None) or os.path.join(tempfile.gettempdir(), 'password-hash')
+    os.makedirs(lock_dir, exist_ok=True)
+    slots = hashing_slots()
+    first = random.randrange(slots)
+    fh = None
+    for index in range(slots):
+        candidate = open(os.path.join(lock_dir, str((first + index) % slots)), 'a')
+        try:
+            fcntl.flock(candidate, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            candidate.close()
+        else:
+            fh = candidate
+            break
+    if fh is None:
+        fh = open(os.path.join(lock_dir, str(first)), 'a')
+        fcntl.flock(fh, fcntl.LOCK_EX)
+    _held.slot = True
+    try:
+        with fh:
+            yield
+    finally:
+        _held.slot = False
+
+
+def _hash_in_slot(func, args, kwargs):
+    with hashing_slot():
+        return func(*args, **kwargs)
+
+
+def run_bounded(func, *args, **kwargs):
+    """
+    Run a password hash within the host-wide limit. Prefork servers start one
+    pool per process, so the pool only caps threads; the flock'ed slots are
+    what keep at most hashing_slots() cores hashing however many workers and
+    logins there are. hashlib and argon2 release the GIL while hashing.
+    """
+    if threading.current_thread().name.startswith('password-hash'):
+        return _hash_in_slot(func, args, kwargs)
+    return hashing_pool().submit(_hash_in_slot, func, args, kwargs).result()
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2-SHA256 with the iteration count from PASSWORD_PBKDF2_ITERATIONS
+    (see manage.py calibrate_hashers), hashed on the bounded pool. Stored hashes
+    with another iteration count are rewritten on the user's next login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None) or hashers.PBKDF2PasswordHasher.iterations
+
+    def encode(self, password, salt, iterations=None):
+        return run_bounded(super().encode, password, salt, iterations)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+    Django's Argon2id with costs from PASSWORD_ARGON2 = {'time_cost', 'memory_cost',
+    'parallelism'}, hashed on the bounded pool. Needs argon2-cffi.
+    """
+
+    @property
+    def time_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2', {}).get('time_cost', hashers.Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2', {}).get('memory_cost', hashers.Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'PASSWORD_ARGON2', {}).get('parallelism', hashers.Argon2PasswordHasher.parallelism)
+
+    def encode(self, password, salt):
+        return run_bounded(super().encode, password, salt)
+
+    def verify(self, password, encoded):
+        return run_bounded(super().verify, password, encoded)
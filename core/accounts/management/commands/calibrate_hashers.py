@@ -0,0 +1,114 @@
+# python files
+import hashlib
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# django files
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand, CommandError
+
+# your files
+from accounts.hashers import PBKDF2PasswordHasher, hashing_slots
+
+# OWASP password storage cheat sheet floors
+PBKDF2_MIN_ITERATIONS = 600_000
+ARGON2_MIN_MEMORY = 19_456  # KiB
+
+
+class Command(BaseCommand):
+    """
+    اندازه‌گیری هزینه‌ی هش رمز عبور روی همین سرور و پیشنهاد تنظیمات.
+
+    Measures one hash on one core, then the same hash on every core at once,
+    and recommends PBKDF2 iterations (and Argon2 costs when argon2-cffi is
+    installed) that meet the latency target, plus the login rate that buys.
+    """
+    help = 'Benchmark password hashers and recommend costs for a login latency target.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=250, help='Wanted time for one hash.')
+        parser.add_argument('--samples', type=int, default=3, help='Timed runs per measurement.')
+        parser.add_argument(
+            '--argon2-memory', type=int, default=ARGON2_MIN_MEMORY,
+            help='Argon2 memory_cost in KiB to calibrate time_cost for.'
+        )
+
+    def handle(self, *args, **options):
+        target = options['target_ms'] / 1000
+        if target <= 0 or options['samples'] < 1:
+            raise CommandError('--target-ms and --samples must be positive')
+        cores = os.cpu_count() or 1
+        slots = hashing_slots()
+
+        current = PBKDF2PasswordHasher().iterations
+        salt = secrets.token_bytes(16)
+        single = self.timed(lambda: hashlib.pbkdf2_hmac('sha256', b'calibration', salt, current), options['samples'])
+        parallel = self.parallel(lambda: hashlib.pbkdf2_hmac('sha256', b'calibration', salt, current), cores)
+        per_ms = current / (single * 1000)
+        recommended = max(10_000, int(per_ms * target * 1000) // 10_000 * 10_000)
+
+        self.stdout.write(f'{cores} cores, {slots} hashing slots on this host')
+        self.stdout.write(
+            f'PBKDF2-SHA256 at {current:,} iterations: {single * 1000:.0f} ms on one core, '
+            f'{parallel * 1000:.0f} ms with {cores} at once ({single * cores / parallel:.1f}x scaling)'
+        )
+        self.stdout.write(
+            f'  {options["target_ms"]:.0f} ms target -> {recommended:,} iterations, '
+            f'about {slots / target:.0f} logins/s with the current slots and {cores / target:.0f}/s on every core'
+        )
+        if recommended < PBKDF2_MIN_ITERATIONS:
+            self.stdout.write(self.style.WARNING(
+                f'  below the {PBKDF2_MIN_ITERATIONS:,} iteration floor; prefer more hashing capacity '
+                f'or Argon2 over weakening the hash'
+            ))
+
+        argon2 = self.calibrate_argon2(target, options)
+        self.stdout.write('\nSuggested settings:')
+        self.stdout.write(f'PASSWORD_PBKDF2_ITERATIONS = {max(recommended, PBKDF2_MIN_ITERATIONS)}')
+        if argon2:
+            self.stdout.write(f'PASSWORD_ARGON2 = {argon2}')
+        self.stdout.write(f'PASSWORD_HASHING_SLOTS = {max(1, cores // 2)}')
+
+    def calibrate_argon2(self, target, options):
+        try:
+            argon2 = hashers.Argon2PasswordHasher()._load_library()
+        except ValueError:
+            self.stdout.write('Argon2: argon2-cffi is not installed, skipped (pip install argon2-cffi)')
+            return None
+
+        memory = max(options['argon2_memory'], ARGON2_MIN_MEMORY)
+        best = None
+        for time_cost in range(1, 11):
+            elapsed = self.timed(lambda: argon2.low_level.hash_secret_raw(
+                b'calibration', b'calibration-salt', time_cost=time_cost, memory_cost=memory,
+                parallelism=1, hash_len=32, type=argon2.low_level.Type.ID,
+            ), options['samples'])
+            self.stdout.write(f'Argon2id m={memory} KiB t={time_cost} p=1: {elapsed * 1000:.0f} ms')
+            if elapsed > target:
+                break
+            best = time_cost
+        if best is None:
+            self.stdout.write(self.style.WARNING('  even t=1 misses the target; lower --argon2-memory'))
+            best = 1
+        return {'time_cost': max(best, 2), 'memory_cost': memory, 'parallelism': 1}
+
+    @staticmethod
+    def timed(func, samples):
+        """Best wall time of ``samples`` runs, after one warm-up."""
+        func()
+        best = float('inf')
+        for _ in range(samples):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    @staticmethod
+    def parallel(func, count):
+        """Wall time for ``count`` concurrent runs (hashlib releases the GIL)."""
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            started = time.perf_counter()
+            list(pool.map(lambda _: func(), range(count)))
+            return time.perf_counter() - started
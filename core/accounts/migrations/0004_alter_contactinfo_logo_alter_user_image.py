@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:20
+
+import siteAssets.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_remove_sociallink_icon'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contactinfo',
+            name='logo',
+            field=models.ImageField(blank=True, null=True, upload_to='logos/', validators=[siteAssets.validators.validate_image_upload]),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='image',
+            field=models.ImageField(blank=True, default='profile_pics/default.png', null=True, upload_to='profile_pics', validators=[siteAssets.validators.validate_image_upload]),
+        ),
+    ]
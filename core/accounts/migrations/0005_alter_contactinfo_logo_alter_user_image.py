@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:21
+
+import siteAssets.media
+import siteAssets.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_contactinfo_logo_alter_user_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contactinfo',
+            name='logo',
+            field=models.ImageField(blank=True, null=True, upload_to=siteAssets.media.ShardedUploadTo('logos'), validators=[siteAssets.validators.validate_image_upload]),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='image',
+            field=models.ImageField(blank=True, default='profile_pics/default.png', null=True, upload_to=siteAssets.media.ShardedUploadTo('profile_pics'), validators=[siteAssets.validators.validate_image_upload]),
+        ),
+    ]
@@ -5,10 +5,13 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 
-#packages
-from PIL import Image
+#your files
+from siteAssets.imaging import rewrite_stored_image
+from siteAssets.media import ShardedUploadTo
+from siteAssets.tracking import FieldTrackingMixin
+from siteAssets.validators import validate_image_upload
 
-class User(AbstractUser):
+class User(FieldTrackingMixin, AbstractUser):
     phone_regex = RegexValidator(
         regex=r'^\d{11}$',
         message="Phone number must be exactly 11 digits."
@@ -21,19 +24,25 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     phone_number = models.CharField(max_length=11, unique=True, validators=[phone_regex])
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='USER')
-    image = models.ImageField(default='profile_pics/default.png', upload_to='profile_pics', blank=True, null=True)
+    image = models.ImageField(
+        default='profile_pics/default.png', upload_to=ShardedUploadTo('profile_pics'), blank=True, null=True,
+        validators=[validate_image_upload]
+    )
+
+    class Meta(AbstractUser.Meta):
+        # فهرست کاربران ادمین: فیلتر نقش/وضعیت و صفحه‌بندی بر اساس تاریخ عضویت
+        indexes = [
+            models.Index(fields=['date_joined', 'id'], name='user_joined'),
+            models.Index(fields=['role', 'date_joined', 'id'], name='user_role_joined'),
+            models.Index(fields=['is_active', 'date_joined', 'id'], name='user_active_joined'),
+        ]
 
     def save(self, *args, **kwargs):
+        image_changed = self.has_changed('image')
         super().save(*args, **kwargs)
 
-        if self.image and self.image.name != 'default.png':
-            img_path = self.image.path
-
-            img = Image.open(img_path)
-
-            img.thumbnail((300, 300))
-
-            img.save(img_path, optimize=True, quality=85)
+        if image_changed and self.image and self.image.name != self._meta.get_field('image').default:
+            rewrite_stored_image(self.image, (300, 300), optimize=True, quality=85)
 
     def __str__(self):
         return self.username
@@ -47,13 +56,13 @@ class User(AbstractUser):
 
 
 
-class ContactInfo(models.Model):
+class ContactInfo(FieldTrackingMixin, models.Model):
     NAME_CHOICES = [
         ('Head Office', 'شعبه اصلی'),
         ('Other Branches', 'سایر شعبه ها'),
     ]
     name = models.CharField(choices=NAME_CHOICES, max_length=55, default='FACTORY')
-    logo = models.ImageField(upload_to='logos/', blank=True, null=True)
+    logo = models.ImageField(upload_to=ShardedUploadTo('logos'), blank=True, null=True, validators=[validate_image_upload])
     description = models.TextField(verbose_name="communicate with us", blank=True)
     phone = models.CharField(max_length=11, blank=True, null=True)
     email = models.EmailField(blank=True)
@@ -61,20 +70,11 @@ class ContactInfo(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        if self.pk:
-            orig = ContactInfo.objects.filter(pk=self.pk).first()
-            orig_image = orig.logo if orig else None
-        else:
-            orig_image = None
-
+        logo_changed = self.has_changed('logo')
         super().save(*args, **kwargs)
 
-        if self.logo and self.logo != orig_image:
-            image_path = self.logo.path
-            with Image.open(image_path) as img:
-                max_size = (300, 300)
-                img.thumbnail(max_size)
-                img.save(image_path, quality=85)
+        if logo_changed and self.logo:
+            rewrite_stored_image(self.logo, (300, 300), quality=85)
 
     def __str__(self):
         return "Contact information"
@@ -0,0 +1,12 @@
+# rest files
+from rest_framework.pagination import CursorPagination
+
+
+class UserDirectoryPagination(CursorPagination):
+    """
+    صفحه‌بندی keyset (cursor) روی تاریخ عضویت؛ هزینه‌ی هر صفحه مستقل از عمق آن است.
+    """
+    ordering = ('-date_joined', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
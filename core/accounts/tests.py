@@ -1,3 +1,456 @@
-from django.test import TestCase
+# python files
+import csv
+import datetime
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+# django files
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+# packages
+from asgiref.sync import async_to_sync
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+# rest files
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+
+# your files
+from accounts import authentication, tokens
+from accounts.hashers import hashing_slot, run_bounded
+from accounts.views import token_obtain
+from core import throttling
+from core.throttling import (
+    IPRateThrottle,
+    LocalBackend,
+    RedisBackend,
+    SQLiteBackend,
+    check,
+    decide,
+    parse_rate,
+)
+
+
+class ParseRateTests(SimpleTestCase):
+    def test_periods(self):
+        self.assertEqual(parse_rate('5/min'), (5, 60))
+        self.assertEqual(parse_rate('100/15m'), (100, 900))
+        self.assertEqual(parse_rate('3/hour'), (3, 3600))
+        self.assertEqual(parse_rate('1/d'), (1, 86400))
+
+    def test_invalid(self):
+        for rate in ('5', '0/min', 'x/min', '5/fortnight', '5/0m', None):
+            with self.subTest(rate=rate), self.assertRaises(ImproperlyConfigured):
+                parse_rate(rate)
+
+
+class DecideTests(SimpleTestCase):
+    def test_allows_under_limit(self):
+        self.assertEqual(decide(10, 60, 0, 0, 0), (True, 0))
+        self.assertEqual(decide(10, 60, 59, 9, 0), (True, 0))
+
+    def test_previous_window_weighs_by_overlap(self):
+        # halfway through the window half of the previous 10 still counts
+        self.assertEqual(decide(10, 60, 30, 4, 10), (True, 0))
+        allowed, retry_after = decide(10, 60, 30, 5, 10)
+        self.assertFalse(allowed)
+        # 10 * (1 - f) + 5 + 1 <= 10 once f >= 0.6, i.e. 6 s later
+        self.assertAlmostEqual(retry_after, 6)
+
+    def test_full_window_waits_for_the_next(self):
+        allowed, retry_after = decide(10, 60, 30, 10, 0)
+        self.assertFalse(allowed)
+        # 30 s to the next window, then 10 * (1 - f) <= 9 needs f >= 0.1
+        self.assertAlmostEqual(retry_after, 36)
+
+
+class BackendTestsMixin:
+    def make_backend(self):
+        raise NotImplementedError
+
+    def test_limit_then_reject(self):
+        backend = self.make_backend()
+        results = [backend.hit('k', 3, 60, 600 + i)[0] for i in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+
+    def test_rejections_are_not_counted(self):
+        backend = self.make_backend()
+        for i in range(10):
+            backend.hit('k', 2, 60, 600 + i)
+        # the previous window held only the 2 allowed hits; half of them still count
+        self.assertTrue(backend.hit('k', 2, 60, 690)[0])
+
+    def test_keys_and_windows_are_independent(self):
+        backend = self.make_backend()
+        self.assertTrue(backend.hit('a', 1, 60, 600)[0])
+        self.assertFalse(backend.hit('a', 1, 60, 601)[0])
+        self.assertTrue(backend.hit('b', 1, 60, 601)[0])
+        # two windows later nothing of the old one remains
+        self.assertTrue(backend.hit('a', 1, 60, 720)[0])
+
+
+class LocalBackendTests(BackendTestsMixin, SimpleTestCase):
+    def make_backend(self):
+        return LocalBackend()
+
+
+class SQLiteBackendTests(BackendTestsMixin, SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'ratelimit.sqlite3')
+
+    def make_backend(self):
+        return SQLiteBackend(self.path)
+
+    def test_counts_are_shared_between_instances(self):
+        # two instances on one file stand in for two worker processes
+        first, second = self.make_backend(), self.make_backend()
+        self.assertTrue(first.hit('k', 2, 60, 600)[0])
+        self.assertTrue(second.hit('k', 2, 60, 601)[0])
+        self.assertFalse(first.hit('k', 2, 60, 602)[0])
+
+
+@unittest.skipUnless(os.environ.get('RATE_LIMIT_TEST_REDIS_URL'), 'set RATE_LIMIT_TEST_REDIS_URL to test RedisBackend')
+class RedisBackendTests(BackendTestsMixin, SimpleTestCase):
+    def make_backend(self):
+        backend = RedisBackend(os.environ['RATE_LIMIT_TEST_REDIS_URL'])
+        backend.client.flushdb()
+        return backend
+
+
+class CheckTests(SimpleTestCase):
+    def setUp(self):
+        self.backend = LocalBackend()
+        throttling._backend = self.backend
+        throttling._blocked.clear()
+        self.addCleanup(setattr, throttling, '_backend', None)
+        self.addCleanup(throttling._blocked.clear)
+
+    def test_rejected_key_skips_the_backend(self):
+        self.assertEqual(check('k', [(1, 60)], now=600), (True, 0))
+        allowed, retry_after = check('k', [(1, 60)], now=601)
+        self.assertFalse(allowed)
+        self.backend._windows.clear()
+        self.assertEqual(check('k', [(1, 60)], now=602), (False, retry_after - 1))
+        # once the retry time passes the backend decides again
+        self.assertTrue(check('k', [(1, 60)], now=601 + retry_after)[0])
+
+    def test_every_rate_applies(self):
+        rates = [(5, 60), (2, 3600)]
+        self.assertTrue(check('k', rates, now=600)[0])
+        self.assertTrue(check('k', rates, now=601)[0])
+        self.assertFalse(check('k', rates, now=602)[0])
+
+
+class IPRateThrottleTests(SimpleTestCase):
+    def ident(self, **meta):
+        request = APIRequestFactory().post('/', REMOTE_ADDR='10.0.0.1', **meta)
+        return IPRateThrottle().get_identity(request, None)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        self.assertEqual(self.ident(HTTP_X_FORWARDED_FOR='1.2.3.4'), '10.0.0.1')
+        with override_settings(REST_FRAMEWORK={}):
+            self.assertEqual(self.ident(HTTP_X_FORWARDED_FOR='1.2.3.4'), '10.0.0.1')
+
+    def test_forwarded_for_behind_a_proxy(self):
+        with override_settings(REST_FRAMEWORK={'NUM_PROXIES': 1}):
+            self.assertEqual(self.ident(HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4'), '1.2.3.4')
+
+
+@override_settings(RATE_LIMITS={'login': {'ip': '3/min'}})
+class LoginRateLimitTests(TestCase):
+    def setUp(self):
+        throttling._backend = LocalBackend()
+        throttling._blocked.clear()
+        self.addCleanup(setattr, throttling, '_backend', None)
+        self.addCleanup(throttling._blocked.clear)
+
+    def test_spoofed_forwarded_for_does_not_reset_the_limit(self):
+        client = APIClient()
+        codes = [
+            client.post(
+                '/api/v1/token/', {'username': f'u{i}', 'password': 'x'},
+                format='json', HTTP_X_FORWARDED_FOR=f'1.2.3.{i}',
+            ).status_code
+            for i in range(5)
+        ]
+        self.assertEqual(codes, [401, 401, 401, 429, 429])
+
+
+class HashingSlotTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(PASSWORD_HASHING_SLOTS=1, PASSWORD_HASHING_LOCK_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_hash_waits_for_a_slot_held_elsewhere(self):
+        # the flock is per open file, so this stands in for another worker process
+        results = []
+        with hashing_slot():
+            worker = threading.Thread(target=lambda: results.append(run_bounded(sum, [1, 2])))
+            worker.start()
+            worker.join(0.3)
+            self.assertTrue(worker.is_alive())
+        worker.join(5)
+        self.assertEqual(results, [3])
+
+    def test_nested_use_does_not_deadlock(self):
+        with hashing_slot():
+            with hashing_slot():
+                pass
+        self.assertEqual(run_bounded(run_bounded, sum, [1, 2]), 3)
+
+
+@override_settings(RATE_LIMITS={})
+class AsyncTokenObtainTests(TransactionTestCase):
+    def setUp(self):
+        get_user_model().objects.create_user(username='u1', email='u1@example.com', password='Secret-pass-1')
+
+    def post(self, **data):
+        request = RequestFactory().post('/api/v1/token/', json.dumps(data), content_type='application/json')
+        return async_to_sync(token_obtain)(request)
+
+    def test_issues_tokens(self):
+        response = self.post(username='u1', password='Secret-pass-1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(json.loads(response.content)), {'access', 'refresh'})
+
+    def test_wrong_password(self):
+        self.assertEqual(self.post(username='u1', password='nope').status_code, 401)
+
+
+@override_settings(RATE_LIMITS={'login': {'ip': '2/min', 'identity': '3/min'}})
+class AsyncTokenObtainThrottleTests(TransactionTestCase):
+    def setUp(self):
+        throttling._backend = LocalBackend()
+        throttling._blocked.clear()
+        self.addCleanup(setattr, throttling, '_backend', None)
+        self.addCleanup(throttling._blocked.clear)
+        get_user_model().objects.create_user(username='u1', email='u1@example.com', password='Secret-pass-1')
+
+    def post(self, **data):
+        request = RequestFactory().post('/api/v1/token/', json.dumps(data), content_type='application/json')
+        return async_to_sync(token_obtain)(request)
+
+    def test_throttled_logins_never_reach_the_pool(self):
+        # counted once each: the view on the pool does not throttle again
+        self.assertEqual(self.post(username='u1', password='nope').status_code, 401)
+        self.assertEqual(self.post(username='u1', password='Secret-pass-1').status_code, 200)
+        with mock.patch('accounts.views.hashing_pool') as pool:
+            response = self.post(username='u1', password='Secret-pass-1')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        pool.assert_not_called()
+
+    def test_unparsable_body_is_refused_on_the_loop(self):
+        request = RequestFactory().post('/api/v1/token/', '{', content_type='application/json')
+        with mock.patch('accounts.views.hashing_pool') as pool:
+            response = async_to_sync(token_obtain)(request)
+        self.assertEqual(response.status_code, 400)
+        pool.assert_not_called()
+
+
+class ExportUsersTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_user(
+            username='admin', email='admin@example.com', password='Secret-pass-1', is_staff=True,
+            phone_number='09120000000',
+        )
+
+    def test_csv_cells_never_start_a_formula(self):
+        get_user_model().objects.create_user(
+            username='@evil', email='evil@example.com', password='Secret-pass-1',
+            first_name='=HYPERLINK("http://x.test","open")', last_name='-2+3', phone_number='+989120000001',
+        )
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/api/v1/accounts/users/export_users/', {'type': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        rows = {row['email']: row for row in csv.DictReader(content.splitlines())}
+        evil = rows['evil@example.com']
+        self.assertEqual(evil['username'], "'@evil")
+        self.assertEqual(evil['first_name'], '\'=HYPERLINK("http://x.test","open")')
+        self.assertEqual(evil['last_name'], "'-2+3")
+        self.assertEqual(evil['phone_number'], "'+989120000001")
+        self.assertEqual(rows['admin@example.com']['username'], 'admin')
+
+
+class TokenStateMixin:
+    """Starts every test with an empty revocation set and user cache, as a fresh process would."""
+
+    def setUp(self):
+        super().setUp()
+        for reset in (self.reset_tokens, authentication.invalidate_cached_users):
+            reset()
+            self.addCleanup(reset)
+
+    @staticmethod
+    def reset_tokens():
+        tokens._revoked.clear()
+        tokens._sync.update(last_id=0, next_at=0.0)
+
+
+@override_settings(RATE_LIMITS={})
+class TokenRevocationTests(TokenStateMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        get_user_model().objects.create_user(username='u1', email='u1@example.com', password='Secret-pass-1')
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/api/v1/token/', {'username': 'u1', 'password': 'Secret-pass-1'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['refresh']
+
+    def refresh(self, token):
+        return self.client.post('/api/v1/token/refresh/', {'refresh': token}, format='json')
+
+    def test_rotated_refresh_token_cannot_be_replayed(self):
+        old = self.login()
+        response = self.refresh(old)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(old).status_code, 401)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+
+    def test_logout_revokes_the_refresh_token(self):
+        token = self.login()
+        response = self.client.post('/api/v1/token/blacklist/', {'refresh': token}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_sync_picks_up_tokens_blacklisted_by_another_process(self):
+        earlier = self.login()
+        self.client.post('/api/v1/token/blacklist/', {'refresh': earlier}, format='json')
+        token = self.login()
+        jti = tokens.RefreshToken(token)['jti']
+        # a fresh process: the first sync loads the earlier logout and moves last_id past it
+        self.reset_tokens()
+        tokens.sync_revoked(force=True)
+        self.assertEqual(set(tokens._revoked), {tokens.RefreshToken(earlier, verify=False)['jti']})
+        self.assertGreater(tokens._sync['last_id'], 0)
+
+        # another process logs the token out: only the database knows
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=jti))
+        self.assertNotIn(jti, tokens._revoked)
+        tokens.sync_revoked(force=True)
+        self.assertIn(jti, tokens._revoked)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+
+class PurgeExpiredTokensTests(TestCase):
+    def outstanding(self, jti, expires_in):
+        now = timezone.now()
+        return OutstandingToken.objects.create(
+            jti=jti, token=jti, created_at=now, expires_at=now + datetime.timedelta(seconds=expires_in)
+        )
+
+    def test_expired_rows_are_purged_in_batches(self):
+        expired = [self.outstanding(f'old{i}', -60) for i in range(5)]
+        live = [self.outstanding(f'new{i}', 3600) for i in range(2)]
+        for token in expired[:3] + live[:1]:
+            BlacklistedToken.objects.create(token=token)
+
+        stdout = StringIO()
+        call_command('purge_expired_tokens', batch_size=2, verbosity=2, stdout=stdout)
+        output = stdout.getvalue()
+        self.assertEqual(output.count(' purged, up to pk '), 3)
+        self.assertIn('Purged 5 expired tokens.', output)
+        self.assertEqual(set(OutstandingToken.objects.values_list('jti', flat=True)), {'new0', 'new1'})
+        self.assertEqual(list(BlacklistedToken.objects.values_list('token__jti', flat=True)), ['new0'])
+
+
+class TokenClaimsAuthenticationTests(TokenStateMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username='u1', email='u1@example.com', password='Secret-pass-1', phone_number='09120000001'
+        )
+        self.staff = User.objects.create_user(
+            username='staff', email='staff@example.com', password='Secret-pass-1', is_staff=True,
+            phone_number='09120000002',
+        )
+
+    @staticmethod
+    def access(user):
+        return authentication.ClaimsTokenObtainPairSerializer.get_token(user).access_token
+
+    def authenticate(self, token, method='get'):
+        request = getattr(RequestFactory(), method)('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return authentication.TokenClaimsAuthentication().authenticate(request)[0]
+
+    def test_ordinary_read_trusts_the_claims(self):
+        token = self.access(self.user)
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+        self.assertIsInstance(user, authentication.ClaimsTokenUser)
+        self.assertFalse(user.is_staff)
+
+    def test_staff_claim_loads_the_real_user(self):
+        token = self.access(self.staff)
+        with self.assertNumQueries(1):
+            user = self.authenticate(token)
+        self.assertIsInstance(user, get_user_model())
+        self.assertTrue(user.is_staff)
+
+    def test_writes_use_the_model(self):
+        token = self.access(self.user)
+        for method in ('post', 'put', 'patch', 'delete'):
+            self.assertIsInstance(self.authenticate(token, method), get_user_model())
+
+    def test_token_without_claims_falls_back_to_the_model(self):
+        user = self.authenticate(AccessToken.for_user(self.user))
+        self.assertIsInstance(user, get_user_model())
+
+    def test_demotion_applies_once_the_cache_is_invalidated(self):
+        token = self.access(self.staff)
+        self.assertTrue(self.authenticate(token).is_staff)
+        # update() sends no post_save, like a change made in another process
+        get_user_model().objects.filter(pk=self.staff.pk).update(is_staff=False)
+        self.assertTrue(self.authenticate(token).is_staff)
+        authentication.invalidate_cached_users([self.staff.pk])
+        self.assertFalse(self.authenticate(token).is_staff)
+
+    @override_settings(AUTH_USER_CACHE_TTL=0.2)
+    def test_deactivation_applies_after_the_ttl(self):
+        token = self.access(self.staff)
+        self.authenticate(token)
+        get_user_model().objects.filter(pk=self.staff.pk).update(is_active=False)
+        # still the cached copy
+        self.assertTrue(self.authenticate(token).is_active)
+        time.sleep(0.25)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_admin_deactivation_drops_the_cached_users(self):
+        admin = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='Secret-pass-1', phone_number='09120000003'
+        )
+        token = self.access(self.staff)
+        self.authenticate(token)
+        self.assertIn(str(self.staff.pk), authentication._users)
+
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:accounts_user_changelist'), {
+            'action': 'deactivate_users', '_selected_action': [self.staff.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn(str(self.staff.pk), authentication._users)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
@@ -0,0 +1,92 @@
+# python files
+import threading
+import time
+
+# django files
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+# packages
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+DEFAULT_REVOCATION_REFRESH = 5
+# rows whose ids were handed out before a later id but committed after it
+SYNC_OVERLAP = 100
+
+_revoked = {}  # jti -> expiry (epoch seconds)
+_sync = {'last_id': 0, 'next_at': 0.0}
+_sync_lock = threading.Lock()
+
+
+def revocation_refresh_interval():
+    return getattr(settings, 'TOKEN_REVOCATION_REFRESH', DEFAULT_REVOCATION_REFRESH)
+
+
+def sync_revoked(force=False):
+    """
+    Pull blacklist rows added since the last sync into this process' JTI set,
+    at most once every TOKEN_REVOCATION_REFRESH seconds. The first call loads
+    every unexpired row; later calls read only new ids off the primary key.
+    """
+    if not force and time.monotonic() < _sync['next_at']:
+        return
+    with _sync_lock:
+        if not force and time.monotonic() < _sync['next_at']:
+            return
+        now = time.time()
+        rows = BlacklistedToken.objects.filter(
+            id__gt=max(_sync['last_id'] - SYNC_OVERLAP, 0),
+            token__expires_at__gt=timezone.now(),
+        ).order_by('id').values_list('id', 'token__jti', 'token__expires_at')
+        for row_id, jti, expires_at in rows.iterator(chunk_size=2000):
+            _revoked[jti] = expires_at.timestamp()
+            _sync['last_id'] = max(_sync['last_id'], row_id)
+        for jti in [jti for jti, expires in _revoked.items() if expires <= now]:
+            _revoked.pop(jti, None)
+        _sync['next_at'] = time.monotonic() + revocation_refresh_interval()
+
+
+def is_revoked(jti):
+    sync_revoked()
+    return jti in _revoked
+
+
+def outstand(token, user):
+    """Record ``token`` in the outstanding table; ``user`` spares simplejwt's extra user query."""
+    outstanding, _created = OutstandingToken.objects.get_or_create(
+        jti=token[api_settings.JTI_CLAIM],
+        defaults={
+            'user': user,
+            'created_at': token.current_time,
+            'token': str(token),
+            'expires_at': datetime_from_epoch(token['exp']),
+        },
+    )
+    return outstanding
+
+
+def revoke(token, user=None):
+    """
+    Blacklist ``token`` and add it to this process' set at once. Returns False
+    if it was already blacklisted, which the unique token column decides even
+    when two processes race on the same token.
+    """
+    _blacklisted, created = BlacklistedToken.objects.get_or_create(token=outstand(token, user))
+    _revoked[token[api_settings.JTI_CLAIM]] = token['exp']
+    return created
+
+
+class RefreshToken(tokens.RefreshToken):
+    """Refresh token whose blacklist check reads the cached JTI set instead of the database."""
+
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        return revoke(self)
@@ -1,3 +1,16 @@
+# python files
+import asyncio
+import csv
+import json
+from itertools import chain
+
+# django files
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+
 # rest files
 from rest_framework import viewsets, status
 from rest_framework.response import Response
@@ -5,8 +18,18 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.permissions import IsAdminUser
 from rest_framework.decorators import action as Action
+from rest_framework.exceptions import APIException, ValidationError
+
+# packages
+from rest_framework_simplejwt.views import TokenObtainPairView
+
 # your files
+from core.throttling import RATE_THROTTLES
+from .authentication import CachedUserAuthentication
+from .filters import UserFilter
+from .hashers import hashing_pool
 from .models import User, ContactInfo, SocialLink
+from .pagination import UserDirectoryPagination
 from .serializers import (
     UserRegisterSerializer,
     UserProfileSerializer,
@@ -16,8 +39,99 @@ from .serializers import (
 )
 
 
+EXPORT_FIELDS = (
+    'id', 'username', 'email', 'phone_number', 'first_name', 'last_name',
+    'role', 'is_active', 'is_staff', 'date_joined', 'last_login',
+)
+EXPORT_TYPES = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+class Echo:
+    """Pseudo-buffer for csv.writer: each row is returned instead of buffered."""
+
+    def write(self, value):
+        return value
+
+
+# spreadsheet apps run cells starting with these as formulas (CSV injection)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_safe(value):
+    """Quote a text cell that would start a formula, so it opens as plain text."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class TokenObtainView(TokenObtainPairView):
+    """دریافت توکن؛ محدودیت نرخ برای هر IP و هر نام کاربری"""
+    throttle_classes = RATE_THROTTLES
+    throttle_scope = 'login'
+    throttle_identity = ('username',)
+
+
+# the async entry point throttles before submitting, so the pool does not again
+_token_obtain = TokenObtainView.as_view(throttle_classes=())
+
+
+def _refused(request):
+    """
+    TokenObtainView's throttles run on ``request`` outside the view: the error
+    response (429, or 400 for a body that does not parse) if they refuse it,
+    otherwise None.
+    """
+    # cache the body so the view on the pool can parse it again
+    request.body
+    view = TokenObtainView(args=(), kwargs={})
+    view.request = drf_request = view.initialize_request(request)
+    view.headers = view.default_response_headers
+    try:
+        view.check_throttles(drf_request)
+    except APIException as exc:
+        response = view.finalize_response(drf_request, view.handle_exception(exc))
+        response.render()
+        return response
+    return None
+
+
+def _obtain_on_pool(request):
+    # pool threads outlive requests, so they manage their connections like one
+    close_old_connections()
+    try:
+        response = _token_obtain(request)
+        response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+@csrf_exempt
+async def token_obtain(request):
+    """
+    دریافت توکن برای استقرار ASGI (ASYNC_LOGIN = True)
+    The rate limits are checked on the event loop first, so a throttled flood
+    is answered with 429 without queueing for a hashing slot; the rest run
+    TokenObtainView on the hashing pool, where the password is hashed within
+    its host slot, and neither the event loop nor Django's single thread for
+    sync views waits while a login spike queues for the CPU.
+    """
+    refused = _refused(request)
+    if refused is not None:
+        return refused
+    return await asyncio.wrap_future(hashing_pool().submit(_obtain_on_pool, request))
+
+
 class UserViewSet(viewsets.ViewSet):
-    @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    # per-action rate limits, see core.throttling
+    throttle_scope = None
+    throttle_identity = ()
+
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny],
+            throttle_classes=RATE_THROTTLES, throttle_scope='register', throttle_identity=('email',))
     def register(self, request):
         serializer = UserRegisterSerializer(data=request.data)
         if serializer.is_valid():
@@ -25,12 +139,14 @@ class UserViewSet(viewsets.ViewSet):
             return Response(UserProfileSerializer(user).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated],
+            authentication_classes=[CachedUserAuthentication])
     def profile(self, request):
         serializer = UserProfileSerializer(request.user)
         return Response(serializer.data)
 
-    @action(detail=False, methods=['put', 'patch'], permission_classes=[IsAuthenticated])
+    @action(detail=False, methods=['put', 'patch'], permission_classes=[IsAuthenticated],
+            authentication_classes=[CachedUserAuthentication])
     def update_profile(self, request):
         serializer = UserUpdateSerializer(
             request.user,
@@ -46,9 +162,46 @@ class UserViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
     def list_users(self, request):
-        users = User.objects.all()
-        serializer = UserProfileSerializer(users, many=True)
-        return Response(serializer.data)
+        """
+        فهرست کاربران با فیلتر (role, is_active, is_staff, joined_after, joined_before)
+        و صفحه‌بندی cursor (?cursor=&page_size=)
+        """
+        users = self.filtered_users(request).only(*UserProfileSerializer.Meta.fields)
+        paginator = UserDirectoryPagination()
+        page = paginator.paginate_queryset(users, request, view=self)
+        serializer = UserProfileSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export_users(self, request):
+        """
+        خروجی کامل کاربران به صورت CSV یا NDJSON (?type=csv|ndjson) با همان فیلترهای list_users.
+        Rows are streamed from a database cursor, so memory stays flat whatever the user count.
+        """
+        kind = request.query_params.get('type', 'csv')
+        if kind not in EXPORT_TYPES:
+            return Response({'detail': 'type باید csv یا ndjson باشد'}, status=status.HTTP_400_BAD_REQUEST)
+        rows = self.filtered_users(request).order_by('date_joined', 'id').values_list(*EXPORT_FIELDS)
+        rows = rows.iterator(chunk_size=2000)
+
+        if kind == 'csv':
+            writer = csv.writer(Echo())
+            # the BOM makes Excel read the Persian names as UTF-8
+            lines = chain(['\ufeff', writer.writerow(EXPORT_FIELDS)], (writer.writerow([csv_safe(value) for value in row]) for row in rows))
+        else:
+            lines = (json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+                     for row in rows)
+        content_type, extension = EXPORT_TYPES[kind]
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="users-{timezone.localdate()}.{extension}"'
+        return response
+
+    @staticmethod
+    def filtered_users(request):
+        filterset = UserFilter(request.query_params, queryset=User.objects.all())
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return filterset.qs
 
 
 class ContactViewSet(viewsets.ModelViewSet):
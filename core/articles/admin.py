@@ -1,13 +1,112 @@
 # django files
 from django.contrib import admin
+from django.contrib.admin.utils import unquote
+from django.core.exceptions import ValidationError
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
 from django.utils.html import format_html,mark_safe
 from django.utils.translation import gettext_lazy as _
-from django.urls import reverse
+from django.urls import path, reverse
 from django.db.models import Count
 from django.contrib import messages
 
 # your files
-from .models import Category, Article,CourseInfo, CourseImage, VideoCast, IndustrialTourism, IndustrialTourismImages
+from siteAssets.admin import SimilarImagesAdminMixin
+from .aparat import refresh_metadata
+from .bulk import start_bulk_import
+from .models import Category, Article,CourseInfo, CourseImage, Teacher, VideoCast, IndustrialTourism, IndustrialTourismImages, ChunkedUpload, BulkImport
+from .uploads import UploadError
+
+
+class BulkImageUploadAdminMixin:
+    """آپلود گروهی تصاویر گالری از یک فایل ZIP (پردازش موازی در پس‌زمینه و ذخیره با یک bulk_create)"""
+    bulk_upload_target = None
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path(
+                '<path:object_id>/bulk-images/',
+                self.admin_site.admin_view(self.bulk_images_view),
+                name='%s_%s_bulk_images' % info,
+            ),
+            path(
+                '<path:object_id>/bulk-images/<uuid:job_id>/',
+                self.admin_site.admin_view(self.bulk_images_status_view),
+                name='%s_%s_bulk_images_status' % info,
+            ),
+        ] + super().get_urls()
+
+    def _bulk_images_parent(self, request, object_id):
+        obj = self.get_object(request, unquote(object_id))
+        if obj is None or not self.has_change_permission(request, obj):
+            raise Http404
+        return obj
+
+    def bulk_images_view(self, request, object_id):
+        """
+        فرم آپلود ZIP؛ پردازش در پس‌زمینه انجام می‌شود و صفحه پیشرفت آن را نشان می‌دهد.
+
+        The archive is handed to start_bulk_import and the admin is sent to
+        this page again with ``?job=``, which polls bulk_images_status_view.
+        """
+        opts = self.model._meta
+        obj = self._bulk_images_parent(request, object_id)
+
+        if request.method == 'POST' and request.FILES.get('archive'):
+            try:
+                job = start_bulk_import(request.FILES['archive'], self.bulk_upload_target, obj, request.user)
+            except UploadError as e:
+                self.message_user(request, str(e), messages.ERROR)
+            else:
+                url = reverse(f'admin:{opts.app_label}_{opts.model_name}_bulk_images', args=[obj.pk])
+                return redirect(f'{url}?job={job.pk}')
+
+        job = None
+        if request.GET.get('job'):
+            try:
+                job = BulkImport.objects.filter(
+                    pk=request.GET['job'], target=self.bulk_upload_target, object_id=obj.pk
+                ).first()
+            except ValidationError:
+                pass
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': opts,
+            'original': obj,
+            'job': job,
+            'title': 'آپلود گروهی تصاویر',
+        }
+        return TemplateResponse(request, 'admin/articles/bulk_images.html', context)
+
+    def bulk_images_status_view(self, request, object_id, job_id):
+        """وضعیت یک آپلود گروهی به صورت JSON، برای صفحه‌ی پیشرفت"""
+        obj = self._bulk_images_parent(request, object_id)
+        job = BulkImport.objects.filter(pk=job_id, target=self.bulk_upload_target, object_id=obj.pk).first()
+        if job is None:
+            raise Http404
+        return JsonResponse({
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'finished': job.is_finished,
+            'done': job.done,
+            'total': job.total,
+            'created': job.created_count,
+            'errors': job.errors[:20],
+            'error': job.error,
+        })
+
+    def bulk_images_link(self, obj):
+        if not obj or not obj.pk:
+            return "ابتدا رکورد را ذخیره کنید"
+        opts = self.model._meta
+        return format_html(
+            '<a href="{}" class="button">آپلود ZIP تصاویر</a>',
+            reverse(f'admin:{opts.app_label}_{opts.model_name}_bulk_images', args=[obj.pk])
+        )
+
+    bulk_images_link.short_description = "آپلود گروهی"
 
 
 @admin.register(Category)
@@ -101,7 +200,7 @@ class ArticleAdmin(admin.ModelAdmin):
 class CourseImageInline(admin.TabularInline):
     model = CourseImage
     extra = 1
-    fields = ('caption', 'image', 'image_preview')
+    fields = ('caption', 'image', 'image_preview', 'order')
     readonly_fields = ('image_preview',)
 
     def image_preview(self, obj):
@@ -110,15 +209,32 @@ class CourseImageInline(admin.TabularInline):
         return _("No Image")
     image_preview.short_description = 'Preview'
 
+@admin.register(Teacher)
+class TeacherAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'course_count', 'created_at')
+    search_fields = ('name',)
+    prepopulated_fields = {'slug': ('name',)}
+    list_per_page = 20
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(course_count=Count('courses'))
+
+    def course_count(self, obj):
+        return obj.course_count
+    course_count.short_description = 'تعداد دوره‌ها'
+    course_count.admin_order_field = 'course_count'
+
+
 @admin.register(CourseInfo)
-class CourseInfoAdmin(admin.ModelAdmin):
-    list_display = ('title', 'slug', 'base_image_preview', 'teachers', 'start_date', 'end_date',
+class CourseInfoAdmin(BulkImageUploadAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'slug', 'base_image_preview', 'teachers_display', 'start_date', 'end_date',
                    'duration', 'price_display', 'discount_display', 'final_price_display',
                    'is_published', 'created_at')
     list_filter = ('is_published', 'created_at', 'start_date', 'end_date')
-    search_fields = ('title', 'slug', 'description', 'teachers')
+    search_fields = ('title', 'slug', 'description', 'teachers__name')
+    autocomplete_fields = ('teachers',)
     prepopulated_fields = {'slug': ('title',)}
-    readonly_fields = ('base_image_preview', 'final_price_display', 'created_at', 'updated_at')
+    readonly_fields = ('base_image_preview', 'final_price_display', 'bulk_images_link', 'created_at', 'updated_at')
     fieldsets = (
         (None, {
             'fields': ('title', 'slug', 'description', 'teachers')
@@ -132,7 +248,7 @@ class CourseInfoAdmin(admin.ModelAdmin):
             'description': _('Final price is calculated automatically')
         }),
         (_('Image'), {
-            'fields': ('base_image', 'base_image_preview')
+            'fields': ('base_image', 'base_image_preview', 'bulk_images_link')
         }),
         (_('Publication'), {
             'fields': ('is_published',)
@@ -143,6 +259,14 @@ class CourseInfoAdmin(admin.ModelAdmin):
         }),
     )
     inlines = [CourseImageInline]
+    bulk_upload_target = 'course.images'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('teachers')
+
+    def teachers_display(self, obj):
+        return '، '.join(teacher.name for teacher in obj.teachers.all()) or '-'
+    teachers_display.short_description = 'Teachers'
 
     def base_image_preview(self, obj):
         if obj.base_image:
@@ -163,7 +287,8 @@ class CourseInfoAdmin(admin.ModelAdmin):
     discount_display.admin_order_field = 'discount'
 
     def final_price_display(self, obj):
-        if obj.final_price is None:
+        # final_price is computed by the database, so unsaved courses have none yet
+        if obj.pk is None or obj.final_price is None:
             return "-"
         return f"{obj.final_price:,.0f} تومان"
 
@@ -171,11 +296,11 @@ class CourseInfoAdmin(admin.ModelAdmin):
     final_price_display.admin_order_field = 'final_price'
 
 @admin.register(CourseImage)
-class CourseImageAdmin(admin.ModelAdmin):
+class CourseImageAdmin(SimilarImagesAdminMixin, admin.ModelAdmin):
     list_display = ('caption', 'image_preview', 'course_link', 'created_at')
     list_filter = ('course', 'created_at')
     search_fields = ('caption', 'course__title')
-    readonly_fields = ('image_preview', 'created_at', 'updated_at')
+    readonly_fields = ('image_preview', 'similar_images', 'created_at', 'updated_at')
 
     def image_preview(self, obj):
         if obj.image:
@@ -216,7 +341,7 @@ class VideoCastAdmin(admin.ModelAdmin):
             'description': 'جزئیات ویدیو و لینک آپارات را وارد کنید'
         }),
         ('اطلاعات سیستمی', {
-            'fields': ('aparat_id', 'created_at', 'updated_at'),
+            'fields': ('aparat_id', 'duration', 'views', 'metadata_fetched_at', 'created_at', 'updated_at'),
             'classes': ('collapse',),
             'description': 'به‌صورت خودکار تولید می‌شود'
         }),
@@ -228,6 +353,9 @@ class VideoCastAdmin(admin.ModelAdmin):
     )
     readonly_fields = (
         'aparat_id',
+        'duration',
+        'views',
+        'metadata_fetched_at',
         'created_at',
         'updated_at',
         'embed_preview',
@@ -271,6 +399,15 @@ class VideoCastAdmin(admin.ModelAdmin):
             )
         return "ذخیره کنید تا نمایش داده شود"
 
+    actions = ['refresh_metadata']
+
+    @admin.action(description='به‌روزرسانی اطلاعات از آپارات')
+    def refresh_metadata(self, request, queryset):
+        updated, errors = refresh_metadata(queryset)
+        self.message_user(request, f'اطلاعات {updated} ویدیو به‌روز شد.', messages.SUCCESS)
+        if errors:
+            self.message_user(request, f'دریافت اطلاعات {len(errors)} ویدیو ناموفق بود: ' + '، '.join(errors), messages.WARNING)
+
     # تنظیمات اضافی
     save_on_top = True
     show_full_result_count = True
@@ -302,12 +439,12 @@ class VideoCastAdmin(admin.ModelAdmin):
 
 
 @admin.register(IndustrialTourismImages)
-class IndustrialTourismImagesAdmin(admin.ModelAdmin):
+class IndustrialTourismImagesAdmin(SimilarImagesAdminMixin, admin.ModelAdmin):
     """مدیریت تصاویر گردشگری صنعتی"""
     list_display = ('thumbnail', 'caption', 'industrial_tourism_link', 'created_at')
     list_filter = ('created_at', 'industrial_tourism')
     search_fields = ('caption', 'industrial_tourism__title')
-    readonly_fields = ('created_at', 'updated_at', 'image_preview')
+    readonly_fields = ('created_at', 'updated_at', 'image_preview', 'similar_images')
     ordering = ('-created_at',)
 
     fieldsets = (
@@ -315,7 +452,7 @@ class IndustrialTourismImagesAdmin(admin.ModelAdmin):
             'fields': ('industrial_tourism', 'image', 'caption')
         }),
         ('پیش‌نمایش', {
-            'fields': ('image_preview',),
+            'fields': ('image_preview', 'similar_images'),
             'classes': ('collapse',),
         }),
         ('تاریخچه', {
@@ -363,9 +500,9 @@ class IndustrialTourismImagesInline(admin.TabularInline):
     """مدیریت تصاویر به صورت Inline"""
     model = IndustrialTourismImages
     extra = 3
-    fields = ('image', 'caption', 'image_preview')
+    fields = ('image', 'caption', 'image_preview', 'order')
     readonly_fields = ('image_preview',)
-    ordering = ('-created_at',)
+    ordering = ('order', '-created_at')
 
     def image_preview(self, obj):
         """پیش‌نمایش تصویر در حالت Inline"""
@@ -380,13 +517,14 @@ class IndustrialTourismImagesInline(admin.TabularInline):
 
 
 @admin.register(IndustrialTourism)
-class IndustrialTourismAdmin(admin.ModelAdmin):
+class IndustrialTourismAdmin(BulkImageUploadAdminMixin, admin.ModelAdmin):
     """مدیریت گردشگری‌های صنعتی"""
     list_display = ('title', 'base_image_thumbnail', 'video_link', 'images_count', 'created_at')
     list_filter = ('created_at', 'updated_at')
     search_fields = ('title', 'description')
-    readonly_fields = ('created_at', 'updated_at', 'base_image_preview', 'video_preview')
+    readonly_fields = ('created_at', 'updated_at', 'base_image_preview', 'video_preview', 'video_info', 'bulk_images_link')
     inlines = [IndustrialTourismImagesInline]
+    bulk_upload_target = 'industrial_tourism.images'
     ordering = ('-created_at',)
     date_hierarchy = 'created_at'
 
@@ -395,7 +533,7 @@ class IndustrialTourismAdmin(admin.ModelAdmin):
             'fields': ('title', 'description')
         }),
         ('مدیا', {
-            'fields': ('base_image', 'base_image_preview', 'video', 'video_preview'),
+            'fields': ('base_image', 'base_image_preview', 'bulk_images_link', 'video', 'video_preview', 'video_info'),
             'classes': ('collapse',),
         }),
         ('محتوا', {
@@ -430,6 +568,17 @@ class IndustrialTourismAdmin(admin.ModelAdmin):
 
     video_link.short_description = "ویدیو"
 
+    def video_info(self, obj):
+        """مشخصات ویدیو (استخراج‌شده هنگام آپلود)"""
+        if not obj.video_duration:
+            return f"خوانده نشد: {obj.video_error}" if obj.video_error else "-"
+        minutes, seconds = divmod(round(obj.video_duration), 60)
+        size = f"{obj.video_width}×{obj.video_height}" if obj.video_width else "بدون تصویر"
+        bitrate = f"{obj.video_bitrate // 1000} kbit/s" if obj.video_bitrate else "-"
+        return f"{minutes}:{seconds:02d} | {size} | {bitrate}"
+
+    video_info.short_description = "مشخصات ویدیو"
+
     def images_count(self, obj):
         """تعداد تصاویر مرتبط"""
         count = obj.images.count()
@@ -480,7 +629,39 @@ class IndustrialTourismAdmin(admin.ModelAdmin):
         js = ('admin/js/custom_admin.js',)
 
 
+@admin.register(BulkImport)
+class BulkImportAdmin(admin.ModelAdmin):
+    """نمایش وضعیت آپلودهای گروهی (فقط خواندنی)"""
+    list_display = ('filename', 'target', 'object_id', 'status', 'progress', 'created_count', 'created_by', 'created_at')
+    list_filter = ('target', 'status', 'created_at')
+    search_fields = ('filename',)
+    list_select_related = ('created_by',)
+    readonly_fields = [f.name for f in BulkImport._meta.fields]
+
+    def progress(self, obj):
+        """تعداد تصاویر پردازش‌شده"""
+        return f"{obj.done}/{obj.total}" if obj.total else "-"
+
+    progress.short_description = "پیشرفت"
+
+    def has_add_permission(self, request):
+        return False
+
 
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    """نمایش وضعیت آپلودهای تکه‌ای (فقط خواندنی)"""
+    list_display = ('filename', 'target', 'object_id', 'progress', 'created_by', 'created_at', 'completed_at')
+    list_filter = ('target', 'created_at', 'completed_at')
+    search_fields = ('filename',)
+    list_select_related = ('created_by',)
+    readonly_fields = [f.name for f in ChunkedUpload._meta.fields]
 
+    def progress(self, obj):
+        """درصد پیشرفت آپلود"""
+        return f"{obj.offset * 100 // obj.size}%" if obj.size else "-"
 
+    progress.short_description = "پیشرفت"
 
+    def has_add_permission(self, request):
+        return False
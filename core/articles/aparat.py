@@ -0,0 +1,176 @@
+# python files
+import asyncio
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlparse
+
+# django files
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+# packages
+import requests
+
+DEFAULT_API_URL = 'https://www.aparat.com/etc/api'
+DEFAULT_TIMEOUT = 10
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_CONCURRENCY = 8
+
+logger = logging.getLogger(__name__)
+
+AparatMetadata = namedtuple('AparatMetadata', ['title', 'thumbnail', 'duration', 'views'])
+
+
+class AparatError(Exception):
+    pass
+
+
+def parse_video_id(url):
+    """
+    Video id (hash) of an Aparat link, or None.
+    Handles aparat.com/v/<id>, /video/<id> and /video/video/embed/videohash/<id>/vt/frame.
+    """
+    try:
+        parsed = urlparse(url.strip())
+    except (AttributeError, ValueError):
+        return None
+    if not (parsed.netloc == 'aparat.com' or parsed.netloc.endswith('.aparat.com')):
+        return None
+    parts = [part for part in parsed.path.split('/') if part]
+    if 'videohash' in parts:
+        index = parts.index('videohash') + 1
+        return parts[index] if index < len(parts) else None
+    if len(parts) >= 2 and parts[0] in ('v', 'video'):
+        return parts[1]
+    return None
+
+
+class AparatClient:
+    """
+    Blocking client for Aparat's public video API. Swap it for another class
+    with the same ``fetch(video_id)`` through the APARAT_CLIENT setting.
+    """
+
+    def __init__(self, base_url=None, timeout=None):
+        self.base_url = (base_url or getattr(settings, 'APARAT_API_URL', DEFAULT_API_URL)).rstrip('/')
+        self.timeout = timeout or getattr(settings, 'APARAT_TIMEOUT', DEFAULT_TIMEOUT)
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        # one keep-alive session per worker thread; requests sessions are not thread-safe
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def fetch(self, video_id):
+        try:
+            response = self.session.get(f'{self.base_url}/video/videohash/{video_id}', timeout=self.timeout)
+            response.raise_for_status()
+            video = response.json().get('video') or {}
+        except (requests.RequestException, ValueError) as e:
+            raise AparatError(f'{video_id}: {e}') from e
+        if not video.get('uid') and not video.get('title'):
+            raise AparatError(f'{video_id}: video not found')
+        return AparatMetadata(
+            title=(video.get('title') or '')[:200],
+            thumbnail=video.get('big_poster') or video.get('small_poster') or '',
+            duration=_int_or_none(video.get('duration')),
+            views=_int_or_none(video.get('visit_cnt')),
+        )
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_client():
+    path = getattr(settings, 'APARAT_CLIENT', None)
+    return import_string(path)() if path else AparatClient()
+
+
+def metadata_ttl():
+    return timedelta(seconds=getattr(settings, 'APARAT_METADATA_TTL', DEFAULT_TTL))
+
+
+def stale_before():
+    """Videos fetched before this moment are due for a refresh."""
+    return timezone.now() - metadata_ttl()
+
+
+async def fetch_many(video_ids, client=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Fetch metadata for every id with at most ``concurrency`` requests in
+    flight. Returns ``{video_id: AparatMetadata | AparatError}``.
+    The blocking fetches run on their own pool of ``concurrency`` threads;
+    asyncio.to_thread would share the default executor, which stops at
+    min(32, cpu + 4) threads whatever ``concurrency`` says.
+    """
+    if concurrency < 1:
+        raise ValueError('concurrency must be at least 1')
+    client = client or get_client()
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='aparat') as executor:
+        async def one(video_id):
+            async with semaphore:
+                try:
+                    return video_id, await loop.run_in_executor(executor, client.fetch, video_id)
+                except AparatError as e:
+                    return video_id, e
+
+        return dict(await asyncio.gather(*(one(video_id) for video_id in video_ids)))
+
+
+def refresh_in_background(model, pks):
+    """refresh_metadata for the ``model`` rows ``pks``, on a background thread."""
+    try:
+        done, errors = refresh_metadata(model.objects.filter(pk__in=pks))
+        for error in errors.values():
+            logger.warning('Aparat metadata fetch failed: %s', error)
+    except Exception:
+        logger.exception('Refreshing Aparat metadata of %s videos failed', len(pks))
+    finally:
+        connection.close()
+
+
+def refresh_metadata(videos, client=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Fetch and store Aparat metadata for ``videos`` (VideoCast instances) with
+    one bulk UPDATE. Returns ``(updated, errors)``; failed videos are left as
+    they were so the next run retries them.
+    """
+    videos = [video for video in videos if video.aparat_id]
+    if not videos:
+        return 0, {}
+    results = asyncio.run(fetch_many({video.aparat_id for video in videos}, client, concurrency))
+
+    now = timezone.now()
+    updated, errors = [], {}
+    for video in videos:
+        result = results[video.aparat_id]
+        if isinstance(result, AparatError):
+            errors[video.aparat_id] = str(result)
+            continue
+        video.thumbnail = result.thumbnail[:500]
+        video.duration = result.duration
+        video.views = result.views
+        video.metadata_fetched_at = now
+        # imported videos carry their id as a placeholder title until the first fetch
+        if result.title and video.title in ('', video.aparat_id):
+            video.title = result.title
+        updated.append(video)
+
+    type(videos[0]).objects.bulk_update(
+        updated, ['title', 'thumbnail', 'duration', 'views', 'metadata_fetched_at'], batch_size=500
+    )
+    return len(updated), errors
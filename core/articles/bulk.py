@@ -0,0 +1,321 @@
+# python files
+import logging
+import os
+import posixpath
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from io import BytesIO
+
+# django files
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+
+# packages
+from PIL import Image
+
+# your files
+from siteAssets.imaging import encode_image, field_encoding_options, format_extension, render_image
+from siteAssets.phash import dhash
+from siteAssets.validators import check_image_upload, image_budget
+from .models import BulkImport
+from .ordering import next_position
+from .uploads import UPLOAD_TARGETS, UploadError, processing_pool, temp_dir
+
+# gallery targets that accept a ZIP archive
+BULK_TARGETS = ('course.images', 'industrial_tourism.images')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.avif')
+MAX_MEMBERS = 1000
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+@contextmanager
+def spooled_path(uploaded):
+    """
+    Path of the uploaded archive on disk. Large uploads are already there
+    (TemporaryUploadedFile); small in-memory ones are written out in chunks.
+    A path is passed through as is.
+    """
+    if isinstance(uploaded, str):
+        yield uploaded
+        return
+    if hasattr(uploaded, 'temporary_file_path'):
+        yield uploaded.temporary_file_path()
+        return
+    os.makedirs(temp_dir(), exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=temp_dir(), suffix='.zip') as fh:
+        for chunk in uploaded.chunks():
+            fh.write(chunk)
+        fh.flush()
+        yield fh.name
+
+
+def archive_members(zf):
+    """Image entries of the archive, skipping folders and macOS metadata."""
+    members = []
+    for info in zf.infolist():
+        name = info.filename
+        base = posixpath.basename(name)
+        if info.is_dir() or name.startswith('__MACOSX/') or base.startswith('.'):
+            continue
+        if posixpath.splitext(base)[1].lower() in IMAGE_EXTENSIONS:
+            members.append(info)
+    return members
+
+
+def _render(name, read, options):
+    """Decode, resize and encode one image; ``read()`` returns its raw bytes."""
+    try:
+        buffer = BytesIO(read())
+        buffer.size = len(buffer.getvalue())
+        check_image_upload(buffer)
+        with Image.open(buffer) as img:
+            source_format, info = img.format, dict(img.info)
+            rendered = render_image(img, options)
+            data, fmt = encode_image(rendered, options, source_format, info)
+            phash = dhash(rendered)
+        return name, data, fmt, phash, None
+    except ValidationError as e:
+        return name, None, None, None, ' '.join(e.messages)
+    except Exception as e:
+        return name, None, None, None, f'{type(e).__name__}: {e}'
+
+
+def _render_member(job):
+    """Runs in a worker process: render one archive entry."""
+    zip_path, name, options = job
+
+    def read():
+        with zipfile.ZipFile(zip_path) as zf:
+            return zf.read(name)
+    return _render(name, read, options)
+
+
+def _render_upload(job):
+    """Runs in a worker process: render one upload, given as a temp file path or as bytes."""
+    index, source, options = job
+
+    def read():
+        if isinstance(source, bytes):
+            return source
+        with open(source, 'rb') as fh:
+            return fh.read()
+    return _render(index, read, options)
+
+
+def bulk_workers():
+    return getattr(settings, 'BULK_UPLOAD_WORKERS', None) or os.cpu_count() or 1
+
+
+def render_pool():
+    """
+    The process pool every bulk render in this process shares, created on
+    first use with BULK_UPLOAD_WORKERS processes. A pool per request forked
+    more than a small batch cost to render, and concurrent requests forked
+    one pool each.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=bulk_workers())
+    return _pool
+
+
+@contextmanager
+def _rendering():
+    """Drop the pool when a worker process died, so the next batch gets a fresh one."""
+    global _pool
+    try:
+        yield render_pool()
+    except BrokenProcessPool:
+        with _pool_lock:
+            _pool = None
+        raise
+
+
+def store_rendered(field, filename, data, fmt):
+    """Save rendered bytes under the field's upload_to and return the stored name."""
+    stem = posixpath.splitext(posixpath.basename(filename))[0]
+    return field.storage.save(field.generate_filename(None, stem + format_extension(fmt)), ContentFile(data))
+
+
+def render_uploads(field, uploads):
+    """
+    Render a batch of uploaded files for ``field`` across a process pool and
+    save them to storage. Returns ``[(stored_name, phash), ...]`` in input
+    order. If any file fails, everything already stored is removed again and
+    a ValidationError naming the failed files is raised.
+    """
+    if not uploads:
+        return []
+    options = field_encoding_options(field)
+    jobs = []
+    for index, upload in enumerate(uploads):
+        # spooled uploads are read by the worker itself; only small ones are pickled
+        if hasattr(upload, 'temporary_file_path'):
+            source = upload.temporary_file_path()
+        else:
+            upload.seek(0)
+            source = upload.read()
+        jobs.append((index, source, options))
+
+    stored, errors = {}, {}
+    try:
+        with _rendering() as pool:
+            for index, data, fmt, phash, error in pool.map(_render_upload, jobs):
+                if error:
+                    errors[index] = error
+                else:
+                    stored[index] = (store_rendered(field, uploads[index].name, data, fmt), phash)
+        if errors:
+            raise ValidationError({
+                str(index): ValidationError(error, code='invalid_image') for index, error in errors.items()
+            })
+    except BaseException:
+        for name, _ in stored.values():
+            field.storage.delete(name)
+        raise
+    return [stored[index] for index in range(len(uploads))]
+
+
+def iter_bulk_import(uploaded, target_key, parent):
+    """
+    Import every image of a ZIP archive into the gallery of ``parent``.
+
+    Entries are rendered across a process pool with the field's own settings,
+    saved to storage as they finish, and the rows are then inserted with a
+    single bulk_create, in archive order after the gallery's last position.
+    Yields progress dicts, ending with the result:
+    ``{'event': 'progress', 'done', 'total'}`` ... ``{'event': 'done', 'created', 'errors'}``.
+    """
+    if target_key not in BULK_TARGETS:
+        raise UploadError('این مقصد آپلود گروهی را پشتیبانی نمی‌کند')
+    target = UPLOAD_TARGETS[target_key]
+    field = target.model._meta.get_field(target.field)
+    options = field_encoding_options(field)
+    max_bytes = image_budget()[0]
+
+    with spooled_path(uploaded) as zip_path:
+        try:
+            with zipfile.ZipFile(zip_path) as zf:
+                members = archive_members(zf)
+        except zipfile.BadZipFile:
+            raise UploadError('فایل ارسال‌شده یک آرشیو ZIP معتبر نیست')
+        if not members:
+            raise UploadError('هیچ تصویری در آرشیو پیدا نشد')
+        if len(members) > MAX_MEMBERS:
+            raise UploadError(f'حداکثر {MAX_MEMBERS} تصویر در هر آرشیو مجاز است', status=413)
+
+        errors = [
+            {'file': info.filename, 'error': 'حجم تصویر بیش از حد مجاز است'}
+            for info in members if info.file_size > max_bytes
+        ]
+        jobs = [(zip_path, info.filename, options) for info in members if info.file_size <= max_bytes]
+        order = {name: index for index, (_, name, _) in enumerate(jobs)}
+        total = len(members)
+        yield {'event': 'progress', 'done': len(errors), 'total': total}
+
+        saved = []
+        try:
+            with _rendering() as pool:
+                futures = [pool.submit(_render_member, job) for job in jobs]
+                try:
+                    for done, future in enumerate(as_completed(futures), len(errors) + 1):
+                        name, data, fmt, phash, error = future.result()
+                        if error:
+                            errors.append({'file': name, 'error': error})
+                        else:
+                            saved.append((order[name], store_rendered(field, name, data, fmt), phash))
+                        yield {'event': 'progress', 'done': done, 'total': total}
+                finally:
+                    # the pool outlives this import; don't leave a dropped client's entries queued
+                    for future in futures:
+                        future.cancel()
+
+            saved.sort()
+            with transaction.atomic():
+                # the parent's row lock serialises appends to the same gallery
+                list(type(parent).objects.select_for_update().filter(pk=parent.pk).values_list('pk'))
+                start = next_position(target.model.objects.filter(**{target.parent_field: parent}))
+                created = target.model.objects.bulk_create([
+                    target.model(**{
+                        target.parent_field: parent, target.field: stored, 'phash': phash, 'order': start + i,
+                    })
+                    for i, (_, stored, phash) in enumerate(saved)
+                ])
+        except BaseException:
+            # nothing references these files yet
+            for _, stored, _ in saved:
+                field.storage.delete(stored)
+            raise
+
+    yield {
+        'event': 'done',
+        'created': [obj.pk for obj in created],
+        'errors': sorted(errors, key=lambda item: item['file']),
+    }
+
+
+def archive_path(job):
+    return os.path.join(temp_dir(), f'{job.pk}.zip')
+
+
+def start_bulk_import(uploaded, target_key, parent, user):
+    """
+    Queue the import of a ZIP archive into the gallery of ``parent`` and return
+    its BulkImport row. The archive is kept in the upload temp dir, since the
+    request's copy goes away with the request; the import runs on the media
+    processing pool after the commit and records its progress on the row.
+    """
+    if target_key not in BULK_TARGETS:
+        raise UploadError('این مقصد آپلود گروهی را پشتیبانی نمی‌کند')
+    job = BulkImport.objects.create(
+        target=target_key, object_id=parent.pk, filename=uploaded.name[:255], created_by=user,
+    )
+    os.makedirs(temp_dir(), exist_ok=True)
+    with open(archive_path(job), 'wb') as fh:
+        for chunk in uploaded.chunks():
+            fh.write(chunk)
+    transaction.on_commit(lambda: processing_pool().submit(run_bulk_import, job.pk))
+    return job
+
+
+def run_bulk_import(job_id):
+    """Background side of start_bulk_import: run iter_bulk_import and keep the row up to date."""
+    jobs = BulkImport.objects.filter(pk=job_id)
+    job = jobs.first()
+    if job is None:
+        return
+    try:
+        target = UPLOAD_TARGETS[job.target]
+        parent = target.parent_model.objects.filter(pk=job.object_id).first()
+        if parent is None:
+            raise UploadError('رکورد مقصد حذف شده است', status=404)
+        jobs.update(status=BulkImport.RUNNING)
+        for event in iter_bulk_import(archive_path(job), job.target, parent):
+            if event['event'] == 'progress':
+                jobs.update(done=event['done'], total=event['total'])
+            else:
+                jobs.update(
+                    status=BulkImport.DONE, created_count=len(event['created']), errors=event['errors'],
+                    finished_at=timezone.now(),
+                )
+    except Exception as e:
+        if not isinstance(e, UploadError):
+            logger.exception('Bulk import %s failed', job_id)
+        jobs.update(status=BulkImport.FAILED, error=str(e)[:255], finished_at=timezone.now())
+    finally:
+        if os.path.exists(archive_path(job)):
+            os.remove(archive_path(job))
+        connection.close()
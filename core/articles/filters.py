@@ -0,0 +1,31 @@
+# packages
+import django_filters
+
+# your files
+from .models import CourseInfo
+
+
+class CourseInfoFilter(django_filters.FilterSet):
+    """
+    فیلتر دوره‌ها بر اساس قیمت نهایی؛ همه‌ی شرط‌ها روی ستون final_price در SQL اجرا می‌شوند.
+    ?min_price=&max_price=&is_free=true&has_discount=true&teacher=<id>
+    """
+    min_price = django_filters.NumberFilter(field_name='final_price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='final_price', lookup_expr='lte')
+    is_free = django_filters.BooleanFilter(method='filter_is_free')
+    has_discount = django_filters.BooleanFilter(method='filter_has_discount')
+    teacher = django_filters.NumberFilter(field_name='teachers')
+
+    class Meta:
+        model = CourseInfo
+        fields = ['is_published', 'min_price', 'max_price', 'is_free', 'has_discount', 'teacher']
+
+    def filter_is_free(self, queryset, name, value):
+        if value:
+            return queryset.filter(final_price__lte=0)
+        return queryset.filter(final_price__gt=0)
+
+    def filter_has_discount(self, queryset, name, value):
+        if value:
+            return queryset.filter(discount__gt=0)
+        return queryset.exclude(discount__gt=0)
@@ -0,0 +1,41 @@
+# django files
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+# your files
+from articles.models import ChunkedUpload
+from articles.uploads import UploadError, complete_upload
+
+
+class Command(BaseCommand):
+    """
+    تکمیل آپلودهای تکه‌ای که همه‌ی بایت‌هایشان رسیده ولی پردازش نشده‌اند.
+
+    Completion normally runs on the web process' background pool right after
+    the last chunk; sessions it never got to (a restart, a crash) are finished
+    here. Meant for cron. Sessions a worker is still completing are skipped.
+    """
+    help = 'Attach fully received chunked uploads that were never completed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry sessions that recorded an error.')
+
+    def handle(self, *args, **options):
+        queryset = ChunkedUpload.objects.filter(completed_at=None, offset=F('size')).order_by('created_at')
+        if not options['retry_failed']:
+            queryset = queryset.filter(error='')
+
+        completed = failed = 0
+        for upload in queryset.iterator():
+            try:
+                complete_upload(upload)
+            except UploadError as e:
+                if e.status == 409:
+                    continue
+                ChunkedUpload.objects.filter(pk=upload.pk).update(error=str(e)[:255])
+                self.stderr.write(f'{upload.pk}: {e}')
+                failed += 1
+            else:
+                completed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Completed {completed} uploads, {failed} failed.'))
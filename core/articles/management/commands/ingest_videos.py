@@ -0,0 +1,42 @@
+# django files
+from django.core.management.base import BaseCommand
+
+# your files
+from articles.models import IndustrialTourism
+
+
+class Command(BaseCommand):
+    """
+    fast-start کردن ویدیوهای موجود گردشگری صنعتی و پر کردن مدت، ابعاد و بیت‌ریت.
+
+    New uploads are ingested on the background pool after they are saved; this
+    catches up on older files and on any the pool lost to a restart. Videos that
+    could not be parsed as MP4 keep their reason in video_error and are skipped.
+    """
+    help = 'Remux existing IndustrialTourism videos as fast-start MP4 and extract their metadata.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-ingest every video, not only those without metadata.'
+        )
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry videos that recorded an error.')
+
+    def handle(self, *args, **options):
+        queryset = IndustrialTourism.objects.exclude(video__isnull=True).exclude(video='').order_by('pk')
+        if not options['all']:
+            queryset = queryset.filter(video_duration__isnull=True)
+        if not (options['all'] or options['retry_failed']):
+            queryset = queryset.filter(video_error='')
+
+        done = failed = 0
+        for obj in queryset.only('pk', 'video').iterator(chunk_size=100):
+            obj.ingest_video()
+            if obj.video_duration is None:
+                failed += 1
+                self.stderr.write(f'{obj.pk}: {obj.video.name} could not be read as MP4: {obj.video_error or "storage error"}')
+            else:
+                done += 1
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'{obj.pk}: {obj.video_duration:.1f}s {obj.video_width}x{obj.video_height}')
+        self.stdout.write(self.style.SUCCESS(f'Ingested {done} videos, {failed} failed.'))
@@ -0,0 +1,49 @@
+# django files
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+# your files
+from articles.aparat import DEFAULT_CONCURRENCY, refresh_metadata, stale_before
+from articles.models import VideoCast
+
+
+class Command(BaseCommand):
+    """
+    به‌روزرسانی تصویر، مدت و تعداد بازدید ویدیوهای آپارات.
+
+    Meant for cron: only videos never fetched or older than APARAT_METADATA_TTL
+    are refreshed, with a bounded number of concurrent requests to Aparat.
+    """
+    help = 'Refresh Aparat metadata (thumbnail, duration, views) of VideoCast rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Refresh every video, not only stale ones.')
+        parser.add_argument(
+            '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+            help='Maximum number of requests to Aparat in flight.'
+        )
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1')
+        queryset = VideoCast.objects.exclude(aparat_id='').order_by('pk')
+        if not options['all']:
+            queryset = queryset.filter(Q(metadata_fetched_at__isnull=True) | Q(metadata_fetched_at__lt=stale_before()))
+
+        updated = failed = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            done, errors = refresh_metadata(batch, concurrency=options['concurrency'])
+            updated += done
+            failed += len(errors)
+            for error in errors.values():
+                self.stderr.write(error)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{updated} refreshed, up to pk {last_pk}')
+
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {updated} videos, {failed} failed.'))
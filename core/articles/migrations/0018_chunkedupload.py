@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:08
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0017_alter_courseinfo_description'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('article.featured_image', 'تصویر اصلی مقاله'), ('course.base_image', 'تصویر اصلی دوره'), ('course.images', 'گالری دوره'), ('industrial_tourism.base_image', 'تصویر اصلی گردشگری صنعتی'), ('industrial_tourism.video', 'ویدیوی گردشگری صنعتی'), ('industrial_tourism.images', 'گالری گردشگری صنعتی')], max_length=50, verbose_name='مقصد')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='شناسه\u200cی رکورد مقصد')),
+                ('filename', models.CharField(max_length=255, verbose_name='نام فایل')),
+                ('size', models.PositiveBigIntegerField(verbose_name='حجم کل (بایت)')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='بایت\u200cهای دریافت\u200cشده')),
+                ('checksum', models.CharField(blank=True, help_text='در صورت ارسال، فایل کامل در پایان با آن مقایسه می\u200cشود', max_length=64, verbose_name='SHA-256')),
+                ('result_id', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='شناسه\u200cی رکورد ساخته\u200cشده')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='تاریخ تکمیل')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='chunked_uploads', to=settings.AUTH_USER_MODEL, verbose_name='کاربر')),
+            ],
+            options={
+                'verbose_name': 'آپلود تکه\u200cای',
+                'verbose_name_plural': 'آپلودهای تکه\u200cای',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:16
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0018_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseimage',
+            name='phash',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='برای پیدا کردن تصاویر تکراری به صورت خودکار محاسبه می\u200cشود', null=True, verbose_name='هش ادراکی'),
+        ),
+        migrations.AddField(
+            model_name='industrialtourismimages',
+            name='phash',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='برای پیدا کردن تصاویر تکراری به صورت خودکار محاسبه می\u200cشود', null=True, verbose_name='هش ادراکی'),
+        ),
+        migrations.AddIndex(
+            model_name='courseimage',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('phash'), '&', models.Value(65535)), name='courseimage_phash_0'),
+        ),
+        migrations.AddIndex(
+            model_name='courseimage',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('phash'), '>>', models.Value(16)), '&', models.Value(65535)), name='courseimage_phash_1'),
+        ),
+        migrations.AddIndex(
+            model_name='courseimage',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('phash'), '>>', models.Value(32)), '&', models.Value(65535)), name='courseimage_phash_2'),
+        ),
+        migrations.AddIndex(
+            model_name='courseimage',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('phash'), '>>', models.Value(48)), '&', models.Value(65535)), name='courseimage_phash_3'),
+        ),
+        migrations.AddIndex(
+            model_name='industrialtourismimages',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('phash'), '&', models.Value(65535)), name='tourismimage_phash_0'),
+        ),
+        migrations.AddIndex(
+            model_name='industrialtourismimages',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('phash'), '>>', models.Value(16)), '&', models.Value(65535)), name='tourismimage_phash_1'),
+        ),
+        migrations.AddIndex(
+            model_name='industrialtourismimages',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('phash'), '>>', models.Value(32)), '&', models.Value(65535)), name='tourismimage_phash_2'),
+        ),
+        migrations.AddIndex(
+            model_name='industrialtourismimages',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('phash'), '>>', models.Value(48)), '&', models.Value(65535)), name='tourismimage_phash_3'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:20
+
+import siteAssets.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0019_courseimage_phash_industrialtourismimages_phash_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='article',
+            name='featured_image',
+            field=siteAssets.fields.ResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=75, scale=None, size=[1900, 1000], upload_to='article_images/', verbose_name='تصویر اصلی'),
+        ),
+        migrations.AlterField(
+            model_name='courseimage',
+            name='image',
+            field=siteAssets.fields.ResizedImageField(crop=None, force_format='WEBP', keep_meta=True, quality=75, scale=None, size=[1900, 1000], upload_to='course/course_images/', verbose_name='تصویر'),
+        ),
+        migrations.AlterField(
+            model_name='courseinfo',
+            name='base_image',
+            field=siteAssets.fields.ResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=75, scale=None, size=[1900, 1000], upload_to='course/base_images', verbose_name='تصویر اصلی'),
+        ),
+        migrations.AlterField(
+            model_name='industrialtourism',
+            name='base_image',
+            field=siteAssets.fields.ResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=75, scale=None, size=[1900, 1000], upload_to='IndustrialTourism/base_images', verbose_name='تصویر اصلی'),
+        ),
+        migrations.AlterField(
+            model_name='industrialtourismimages',
+            name='image',
+            field=siteAssets.fields.ResizedImageField(crop=None, force_format='WEBP', keep_meta=True, quality=75, scale=None, size=[1900, 1000], upload_to='IndustrialTourism/images', verbose_name='تصویر'),
+        ),
+    ]
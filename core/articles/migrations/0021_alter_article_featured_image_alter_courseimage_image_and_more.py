@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:21
+
+import siteAssets.fields
+import siteAssets.media
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0020_alter_article_featured_image_alter_courseimage_image_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='article',
+            name='featured_image',
+            field=siteAssets.fields.ResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=75, scale=None, size=[1900, 1000], upload_to=siteAssets.media.ShardedUploadTo('article_images'), verbose_name='تصویر اصلی'),
+        ),
+        migrations.AlterField(
+            model_name='courseimage',
+            name='image',
+            field=siteAssets.fields.ResizedImageField(crop=None, force_format='WEBP', keep_meta=True, quality=75, scale=None, size=[1900, 1000], upload_to=siteAssets.media.ShardedUploadTo('course/course_images'), verbose_name='تصویر'),
+        ),
+        migrations.AlterField(
+            model_name='courseinfo',
+            name='base_image',
+            field=siteAssets.fields.ResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=75, scale=None, size=[1900, 1000], upload_to=siteAssets.media.ShardedUploadTo('course/base_images'), verbose_name='تصویر اصلی'),
+        ),
+        migrations.AlterField(
+            model_name='industrialtourism',
+            name='base_image',
+            field=siteAssets.fields.ResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=75, scale=None, size=[1900, 1000], upload_to=siteAssets.media.ShardedUploadTo('IndustrialTourism/base_images'), verbose_name='تصویر اصلی'),
+        ),
+        migrations.AlterField(
+            model_name='industrialtourism',
+            name='video',
+            field=models.FileField(blank=True, null=True, upload_to=siteAssets.media.ShardedUploadTo('IndustrialTourism/videos'), verbose_name='ویدیو'),
+        ),
+        migrations.AlterField(
+            model_name='industrialtourismimages',
+            name='image',
+            field=siteAssets.fields.ResizedImageField(crop=None, force_format='WEBP', keep_meta=True, quality=75, scale=None, size=[1900, 1000], upload_to=siteAssets.media.ShardedUploadTo('IndustrialTourism/images'), verbose_name='تصویر'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0022_alter_article_featured_image_alter_courseimage_image_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='industrialtourism',
+            name='video_bitrate',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='بیت\u200cریت ویدیو (bit/s)'),
+        ),
+        migrations.AddField(
+            model_name='industrialtourism',
+            name='video_duration',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='مدت ویدیو (ثانیه)'),
+        ),
+        migrations.AddField(
+            model_name='industrialtourism',
+            name='video_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='ارتفاع ویدیو'),
+        ),
+        migrations.AddField(
+            model_name='industrialtourism',
+            name='video_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='عرض ویدیو'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:35
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0023_industrialtourism_video_bitrate_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseinfo',
+            name='final_price',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('price'), '-', django.db.models.functions.comparison.Coalesce('discount', models.Value(0), output_field=models.DecimalField())), output_field=models.DecimalField(decimal_places=2, max_digits=11), verbose_name='قیمت نهایی'),
+        ),
+    ]
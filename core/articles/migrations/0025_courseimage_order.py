@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0024_courseinfo_final_price'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='courseimage',
+            options={'ordering': ['order', '-created_at'], 'verbose_name': 'تصویر', 'verbose_name_plural': 'تصاویر دوره\u200cها'},
+        ),
+        migrations.AddField(
+            model_name='courseimage',
+            name='order',
+            field=models.PositiveIntegerField(default=0, verbose_name='ترتیب نمایش'),
+        ),
+    ]
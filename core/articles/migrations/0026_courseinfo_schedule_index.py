@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0025_courseimage_order'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='courseinfo',
+            index=models.Index(fields=['is_published', 'start_date', 'end_date'], name='courseinfo_schedule'),
+        ),
+    ]
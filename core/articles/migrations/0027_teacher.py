@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0026_courseinfo_schedule_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Teacher',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=150, unique=True, verbose_name='نام')),
+                ('slug', models.SlugField(allow_unicode=True, max_length=150, unique=True, verbose_name='اسلاگ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+            ],
+            options={
+                'verbose_name': 'استاد',
+                'verbose_name_plural': 'اساتید',
+                'ordering': ['name'],
+            },
+        ),
+        # the free-text column is kept until 0028 has copied it into the relation
+        migrations.RenameField(
+            model_name='courseinfo',
+            old_name='teachers',
+            new_name='teachers_text',
+        ),
+        migrations.AddField(
+            model_name='courseinfo',
+            name='teachers',
+            field=models.ManyToManyField(blank=True, related_name='courses', to='articles.teacher', verbose_name='اساتید'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+import re
+
+from django.db import migrations
+from django.utils.text import slugify
+
+BATCH_SIZE = 500
+# "علی رضایی، مریم احمدی و سارا کریمی" / "A. Smith, B. Jones & C. Lee"
+SEPARATORS = re.compile(r'\s*(?:[,،;/|\n&]|\s+و\s+|\s+and\s+)\s*', re.IGNORECASE)
+
+
+def split_teachers(text):
+    names = []
+    for part in SEPARATORS.split(text or ''):
+        name = ' '.join(part.split())[:150]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def populate_teachers(apps, schema_editor):
+    CourseInfo = apps.get_model('articles', 'CourseInfo')
+    Teacher = apps.get_model('articles', 'Teacher')
+    Through = CourseInfo.teachers.through
+
+    last_pk = 0
+    while True:
+        rows = list(
+            CourseInfo.objects.filter(pk__gt=last_pk).exclude(teachers_text__isnull=True)
+            .exclude(teachers_text='').order_by('pk').values_list('pk', 'teachers_text')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+
+        # one teacher per slug, so "Ali  Rezaei" and "ali rezaei" end up as the same row
+        wanted = {}
+        for _, text in rows:
+            for name in split_teachers(text):
+                wanted.setdefault(slugify(name, allow_unicode=True) or name, name)
+        Teacher.objects.bulk_create(
+            [Teacher(name=name, slug=slug) for slug, name in wanted.items()],
+            ignore_conflicts=True,
+        )
+        by_slug = dict(Teacher.objects.filter(slug__in=wanted).values_list('slug', 'pk'))
+
+        links = set()
+        for course_id, text in rows:
+            for name in split_teachers(text):
+                teacher_id = by_slug.get(slugify(name, allow_unicode=True) or name)
+                if teacher_id:
+                    links.add((course_id, teacher_id))
+        Through.objects.bulk_create(
+            [Through(courseinfo_id=course_id, teacher_id=teacher_id) for course_id, teacher_id in links],
+            ignore_conflicts=True,
+        )
+
+
+def restore_teachers_text(apps, schema_editor):
+    CourseInfo = apps.get_model('articles', 'CourseInfo')
+    Through = CourseInfo.teachers.through
+
+    names = {}
+    for course_id, name in Through.objects.order_by('pk').values_list('courseinfo_id', 'teacher__name'):
+        names.setdefault(course_id, []).append(name)
+    courses = [CourseInfo(pk=course_id, teachers_text='، '.join(values)[:300]) for course_id, values in names.items()]
+    CourseInfo.objects.bulk_update(courses, ['teachers_text'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0027_teacher'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_teachers, restore_teachers_text),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0028_populate_teachers'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='courseinfo',
+            name='teachers_text',
+        ),
+    ]
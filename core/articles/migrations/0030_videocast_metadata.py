@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0029_remove_courseinfo_teachers_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videocast',
+            name='duration',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='مدت زمان (ثانیه)'),
+        ),
+        migrations.AddField(
+            model_name='videocast',
+            name='metadata_fetched_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='آخرین دریافت اطلاعات از آپارات'),
+        ),
+        migrations.AddField(
+            model_name='videocast',
+            name='thumbnail',
+            field=models.URLField(blank=True, editable=False, max_length=500, verbose_name='تصویر بندانگشتی'),
+        ),
+        migrations.AddField(
+            model_name='videocast',
+            name='views',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='تعداد بازدید'),
+        ),
+    ]
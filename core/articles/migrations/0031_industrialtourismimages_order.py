@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0030_videocast_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='industrialtourismimages',
+            options={'ordering': ['order', '-created_at'], 'verbose_name': 'تصویر', 'verbose_name_plural': 'تصاویر گردشگری صنعتی'},
+        ),
+        migrations.AddField(
+            model_name='industrialtourismimages',
+            name='order',
+            field=models.PositiveIntegerField(default=0, verbose_name='ترتیب نمایش'),
+        ),
+    ]
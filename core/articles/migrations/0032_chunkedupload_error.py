@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0031_industrialtourismimages_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunkedupload',
+            name='error',
+            field=models.CharField(blank=True, help_text='دلیل شکست پردازش فایل کامل\u200cشده؛ پس از ارسال تکه\u200cی بعدی پاک می\u200cشود', max_length=255, verbose_name='خطا'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0032_chunkedupload_error'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='industrialtourism',
+            name='video_error',
+            field=models.CharField(blank=True, editable=False, help_text='دلیل خوانده نشدن ویدیو به\u200cعنوان MP4؛ ingest_videos این ردیف\u200cها را دوباره امتحان نمی\u200cکند', max_length=255, verbose_name='خطای ویدیو'),
+        ),
+    ]
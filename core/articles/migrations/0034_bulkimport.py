@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:31
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0033_industrialtourism_video_error'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkImport',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('course.images', 'گالری دوره'), ('industrial_tourism.images', 'گالری گردشگری صنعتی')], max_length=50, verbose_name='مقصد')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='شناسه\u200cی رکورد مقصد')),
+                ('filename', models.CharField(max_length=255, verbose_name='نام فایل')),
+                ('status', models.CharField(choices=[('pending', 'در صف'), ('running', 'در حال پردازش'), ('done', 'انجام شد'), ('failed', 'ناموفق')], default='pending', max_length=10, verbose_name='وضعیت')),
+                ('done', models.PositiveIntegerField(default=0, verbose_name='تصاویر پردازش\u200cشده')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='تعداد تصاویر')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='تصاویر اضافه\u200cشده')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='خطای تصاویر')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='خطا')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='تاریخ پایان')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bulk_imports', to=settings.AUTH_USER_MODEL, verbose_name='کاربر')),
+            ],
+            options={
+                'verbose_name': 'آپلود گروهی',
+                'verbose_name_plural': 'آپلودهای گروهی',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
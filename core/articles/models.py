@@ -1,13 +1,25 @@
+# python files
+import logging
+import uuid
+
 # django files
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
-from django_resized import ResizedImageField
 # your packages
 from django_ckeditor_5.fields import CKEditor5Field
 from django.utils.text import slugify
-from urllib.parse import urlparse, parse_qs
 # your files
 from accounts.models import User
+from .aparat import parse_video_id
+from siteAssets.fields import ResizedImageField
+from siteAssets.media import ShardedUploadTo
+from siteAssets.mp4 import Mp4Error, VideoInfo, ingest_stored_video
+from siteAssets.phash import PerceptualHashMixin, phash_indexes
+from siteAssets.tracking import FieldTrackingMixin
+
+logger = logging.getLogger(__name__)
 
 
 class Category(models.Model):
@@ -38,7 +50,8 @@ class Article(models.Model):
     featured_image = ResizedImageField(
         size=[1900, 1000],  # سایز خروجی (عرض × ارتفاع)
         quality=75,  # کیفیت (0 تا 100)
-        upload_to='article_images/',  # مسیر ذخیره‌سازی
+        target_ssim=0.985,  # کیفیت تطبیقی: کمترین کیفیتی که این میزان شباهت (SSIM) را حفظ کند
+        upload_to=ShardedUploadTo('article_images'),  # مسیر ذخیره‌سازی
         force_format='WEBP',  # تبدیل فرمت (jpg, png, webp و غیره)
         blank=True, null=True,
         verbose_name="تصویر اصلی"
@@ -65,6 +78,25 @@ class Article(models.Model):
         super().save(*args, **kwargs)
 
 
+class Teacher(models.Model):
+    name = models.CharField(max_length=150, unique=True, verbose_name="نام")
+    slug = models.SlugField(max_length=150, unique=True, allow_unicode=True, verbose_name="اسلاگ")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
+
+    class Meta:
+        verbose_name = "استاد"
+        verbose_name_plural = "اساتید"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slugify(self.name, allow_unicode=True)
+        super().save(*args, **kwargs)
+
+
 class CourseInfo(models.Model):
     title = models.CharField(max_length=200, verbose_name="عنوان"
                                                           "")
@@ -73,12 +105,13 @@ class CourseInfo(models.Model):
     base_image = ResizedImageField(
         size=[1900, 1000],  # سایز خروجی (عرض × ارتفاع)
         quality=75,  # کیفیت (0 تا 100)
-        upload_to='course/base_images',  # مسیر ذخیره‌سازی
+        target_ssim=0.985,  # کیفیت تطبیقی: کمترین کیفیتی که این میزان شباهت (SSIM) را حفظ کند
+        upload_to=ShardedUploadTo('course/base_images'),  # مسیر ذخیره‌سازی
         force_format='WEBP',  # تبدیل فرمت (jpg, png, webp و غیره)
         blank=True, null=True,
         verbose_name="تصویر اصلی"
     )
-    teachers = models.CharField(max_length=300, blank=True, null=True, verbose_name="نام اساتید")
+    teachers = models.ManyToManyField(Teacher, blank=True, related_name='courses', verbose_name="اساتید")
     start_date = models.DateField(blank=True, null=True, verbose_name="تاریخ شروغ")
     end_date = models.DateField(blank=True, null=True, verbose_name="تاریخ پایان")
     duration = models.PositiveIntegerField(help_text="مدت زمان دوره به دقیقه", null=True, blank=True,
@@ -86,6 +119,14 @@ class CourseInfo(models.Model):
 
     price = models.DecimalField(max_digits=11, decimal_places=2, verbose_name="قیمت")
     discount = models.DecimalField(max_digits=11, decimal_places=2, null=True, blank=True, verbose_name="تخفیف")
+    # قیمت نهایی در خود دیتابیس محاسبه و ذخیره می‌شود تا فیلتر و مرتب‌سازی روی آن در SQL انجام شود
+    final_price = models.GeneratedField(
+        expression=F('price') - Coalesce('discount', Value(0), output_field=models.DecimalField()),
+        output_field=models.DecimalField(max_digits=11, decimal_places=2),
+        db_persist=True,
+        db_index=True,
+        verbose_name="قیمت نهایی",
+    )
 
     is_published = models.BooleanField(default=False, verbose_name="منتشر شود")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
@@ -95,25 +136,21 @@ class CourseInfo(models.Model):
         verbose_name = "دروه"
         verbose_name_plural = "دوره های آموزشی"
         ordering = ['-created_at']
+        indexes = [
+            # پرس‌وجوهای تقویم دوره‌ها (شروع/پایان در یک بازه‌ی زمانی)
+            models.Index(fields=['is_published', 'start_date', 'end_date'], name='courseinfo_schedule'),
+        ]
 
     def __str__(self):
         return self.title
 
-    @property
-    def final_price(self):
-        if self.price is None:
-            return None
-        if self.discount:
-            return self.price - self.discount
-        return self.price
-
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title, allow_unicode=True)
         super().save(*args, **kwargs)
 
 
-class CourseImage(models.Model):
+class CourseImage(PerceptualHashMixin, models.Model):
     caption = models.CharField(
         max_length=300,
         blank=True,
@@ -124,11 +161,20 @@ class CourseImage(models.Model):
     image = ResizedImageField(
         size=[1900, 1000],  # سایز خروجی (عرض × ارتفاع)
         quality=75,  # کیفیت (0 تا 100)
-        upload_to='course/course_images/',  # مسیر ذخیره‌سازی
+        target_ssim=0.985,  # کیفیت تطبیقی: کمترین کیفیتی که این میزان شباهت (SSIM) را حفظ کند
+        upload_to=ShardedUploadTo('course/course_images'),  # مسیر ذخیره‌سازی
         force_format='WEBP',  # تبدیل فرمت (jpg, png, webp و غیره)
         verbose_name="تصویر"
     )
 
+    phash = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="هش ادراکی",
+        help_text="برای پیدا کردن تصاویر تکراری به صورت خودکار محاسبه می‌شود"
+    )
+
     course = models.ForeignKey(
         "CourseInfo",
         on_delete=models.CASCADE,
@@ -136,6 +182,11 @@ class CourseImage(models.Model):
         verbose_name="دوره"
     )
 
+    order = models.PositiveIntegerField(
+        default=0,
+        verbose_name="ترتیب نمایش"
+    )
+
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="تاریخ ایجاد"
@@ -152,7 +203,8 @@ class CourseImage(models.Model):
     class Meta:
         verbose_name = "تصویر"
         verbose_name_plural = "تصاویر دوره‌ها"
-        ordering = ['-created_at']
+        ordering = ['order', '-created_at']
+        indexes = phash_indexes('courseimage')
 
 
 class VideoCast(models.Model):
@@ -177,6 +229,34 @@ class VideoCast(models.Model):
         default=1,
         verbose_name="ترتیب نمایش"
     )
+
+    # اطلاعات دریافتی از API آپارات؛ با دستور refresh_videocasts به‌روز می‌شوند
+    thumbnail = models.URLField(
+        max_length=500,
+        blank=True,
+        editable=False,
+        verbose_name="تصویر بندانگشتی"
+    )
+    duration = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="مدت زمان (ثانیه)"
+    )
+    views = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="تعداد بازدید"
+    )
+    metadata_fetched_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name="آخرین دریافت اطلاعات از آپارات"
+    )
+
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="تاریخ ایجاد"
@@ -199,6 +279,9 @@ class VideoCast(models.Model):
             new_id = self.extract_video_id(self.aparat_url)
             if new_id and new_id != self.aparat_id:
                 self.aparat_id = new_id
+                # اطلاعات ویدیوی قبلی دیگر معتبر نیست
+                self.thumbnail, self.duration, self.views = '', None, None
+                self.metadata_fetched_at = None
         super().save(*args, **kwargs)
 
     @staticmethod
@@ -207,17 +290,7 @@ class VideoCast(models.Model):
         استخراج Video ID از لینک‌های آپارات
         پشتیبانی: aparat.com/v/..., aparat.com/video/video/embed/videohash/...
         """
-        parsed = urlparse(url)
-        path_parts = parsed.path.strip("/").split("/")
-        if "aparat.com" in parsed.netloc:
-            if len(path_parts) >= 2 and path_parts[0] in ["v", "video"]:
-                # حالت معمولی: /v/VIDEO_ID
-                return path_parts[1]
-            elif "videohash" in path_parts:
-                # حالت embed: /video/video/embed/videohash/VIDEO_ID/vt/frame
-                idx = path_parts.index("videohash") + 1
-                return path_parts[idx] if idx < len(path_parts) else None
-        return None
+        return parse_video_id(url)
 
     @property
     def embed_url(self):
@@ -227,14 +300,13 @@ class VideoCast(models.Model):
     @property
     def thumbnail_url(self):
         """
-        متأسفانه آپارات مثل یوتیوب لینک مستقیم thumbnail ثابت نداره.
-        ساده‌ترین راه: استفاده از API آپارات (در صورت نیاز).
-        اینجا فقط یک placeholder می‌ذاریم.
+        تصویر بندانگشتی ذخیره‌شده از API آپارات؛ تا اولین به‌روزرسانی، همان placeholder قبلی.
+        هیچ درخواستی هنگام نمایش صفحه به آپارات ارسال نمی‌شود.
         """
-        return f"https://aparat.com/static/thumbs/{self.aparat_id}.jpg"
+        return self.thumbnail or f"https://aparat.com/static/thumbs/{self.aparat_id}.jpg"
 
 
-class IndustrialTourism(models.Model):
+class IndustrialTourism(FieldTrackingMixin, models.Model):
     title = models.CharField(
         max_length=200,
         verbose_name="عنوان"
@@ -243,17 +315,39 @@ class IndustrialTourism(models.Model):
     base_image = ResizedImageField(
         size=[1900, 1000],
         quality=75,
-        upload_to='IndustrialTourism/base_images',
+        target_ssim=0.985,
+        upload_to=ShardedUploadTo('IndustrialTourism/base_images'),
         force_format='WEBP',
         blank=True, null=True,
         verbose_name="تصویر اصلی"
     )
 
     video = models.FileField(
-        upload_to='IndustrialTourism/videos',
+        upload_to=ShardedUploadTo('IndustrialTourism/videos'),
         blank=True, null=True,
         verbose_name="ویدیو"
     )
+    video_duration = models.FloatField(
+        null=True, blank=True, editable=False,
+        verbose_name="مدت ویدیو (ثانیه)"
+    )
+    video_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False,
+        verbose_name="عرض ویدیو"
+    )
+    video_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False,
+        verbose_name="ارتفاع ویدیو"
+    )
+    video_bitrate = models.PositiveIntegerField(
+        null=True, blank=True, editable=False,
+        verbose_name="بیت‌ریت ویدیو (bit/s)"
+    )
+    video_error = models.CharField(
+        max_length=255, blank=True, editable=False,
+        help_text="دلیل خوانده نشدن ویدیو به‌عنوان MP4؛ ingest_videos این ردیف‌ها را دوباره امتحان نمی‌کند",
+        verbose_name="خطای ویدیو"
+    )
     description = models.TextField(verbose_name="توضیحات")
     content = CKEditor5Field(
         config_name='default',
@@ -278,8 +372,63 @@ class IndustrialTourism(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        video_changed = self.has_changed('video')
+        if video_changed:
+            # filled in again by ingest_video
+            self.video_duration = self.video_width = self.video_height = self.video_bitrate = None
+            self.video_error = ''
+        super().save(*args, **kwargs)
 
-class IndustrialTourismImages(models.Model):
+        if video_changed and self.video:
+            # remuxing rewrites the whole file, so it runs after the commit on the
+            # background pool; rows it never reaches are left to manage.py ingest_videos
+            from .uploads import processing_pool
+            pk = self.pk
+            transaction.on_commit(lambda: processing_pool().submit(ingest_video_in_background, pk))
+
+    def ingest_video(self):
+        """
+        ویدیو را fast-start می‌کند (moov به ابتدای فایل) تا پخش قبل از دانلود کامل شروع شود
+        و مدت، ابعاد و بیت‌ریت را ذخیره می‌کند.
+        """
+        error = ''
+        try:
+            info = ingest_stored_video(self.video)
+        except (Mp4Error, OSError) as e:
+            # not an MP4 we can parse (e.g. webm); keep the file as uploaded
+            logger.warning('Could not ingest video %s of industrial tourism %s: %s', self.video.name, self.pk, e)
+            info = VideoInfo(None, None, None, None)
+            if isinstance(e, Mp4Error):
+                # retrying will not change the file; storage errors are left to the next run
+                error = str(e)[:255]
+        self.video_duration = info.duration
+        self.video_width = info.width
+        self.video_height = info.height
+        self.video_bitrate = info.bitrate
+        self.video_error = error
+        IndustrialTourism.objects.filter(pk=self.pk, video=self.video.name).update(
+            video_duration=info.duration,
+            video_width=info.width,
+            video_height=info.height,
+            video_bitrate=info.bitrate,
+            video_error=error,
+        )
+        self.mark_saved('video_duration', 'video_width', 'video_height', 'video_bitrate', 'video_error')
+
+
+def ingest_video_in_background(pk):
+    try:
+        obj = IndustrialTourism.objects.filter(pk=pk).only('pk', 'video').first()
+        if obj is not None and obj.video:
+            obj.ingest_video()
+    except Exception:
+        logger.exception('Ingesting the video of industrial tourism %s failed', pk)
+    finally:
+        connection.close()
+
+
+class IndustrialTourismImages(PerceptualHashMixin, models.Model):
     caption = models.CharField(
         max_length=300,
         blank=True,
@@ -290,11 +439,20 @@ class IndustrialTourismImages(models.Model):
     image = ResizedImageField(
         size=[1900, 1000],  # سایز خروجی (عرض × ارتفاع)
         quality=75,  # کیفیت (0 تا 100)
-        upload_to='IndustrialTourism/images',  # مسیر ذخیره‌سازی
+        target_ssim=0.985,  # کیفیت تطبیقی: کمترین کیفیتی که این میزان شباهت (SSIM) را حفظ کند
+        upload_to=ShardedUploadTo('IndustrialTourism/images'),  # مسیر ذخیره‌سازی
         force_format='WEBP',  # تبدیل فرمت (jpg, png, webp و غیره)
         verbose_name="تصویر"
     )
 
+    phash = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="هش ادراکی",
+        help_text="برای پیدا کردن تصاویر تکراری به صورت خودکار محاسبه می‌شود"
+    )
+
     industrial_tourism = models.ForeignKey(
         "IndustrialTourism",
         on_delete=models.CASCADE,
@@ -302,6 +460,11 @@ class IndustrialTourismImages(models.Model):
         verbose_name="گردشگری صنعتی"
     )
 
+    order = models.PositiveIntegerField(
+        default=0,
+        verbose_name="ترتیب نمایش"
+    )
+
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="تاریخ ایجاد"
@@ -313,9 +476,116 @@ class IndustrialTourismImages(models.Model):
     )
 
     def __str__(self):
-        return self.caption or f"تصویر #{self.id} - {self.IndustrialTourism.title}"
+        return self.caption or f"تصویر #{self.id} - {self.industrial_tourism.title}"
 
     class Meta:
         verbose_name = "تصویر"
         verbose_name_plural = "تصاویر گردشگری صنعتی"
+        ordering = ['order', '-created_at']
+        indexes = phash_indexes('tourismimage')
+
+
+class ChunkedUpload(models.Model):
+    """
+    جلسه‌ی آپلود تکه‌ای (مشابه tus) برای فایل‌های حجیم مقالات، دوره‌ها و گردشگری صنعتی.
+    تکه‌ها روی دیسک به فایل موقت اضافه می‌شوند و در پایان به مدل مقصد متصل می‌شوند.
+    """
+    TARGET_CHOICES = [
+        ('article.featured_image', 'تصویر اصلی مقاله'),
+        ('course.base_image', 'تصویر اصلی دوره'),
+        ('course.images', 'گالری دوره'),
+        ('industrial_tourism.base_image', 'تصویر اصلی گردشگری صنعتی'),
+        ('industrial_tourism.video', 'ویدیوی گردشگری صنعتی'),
+        ('industrial_tourism.images', 'گالری گردشگری صنعتی'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target = models.CharField(max_length=50, choices=TARGET_CHOICES, verbose_name="مقصد")
+    object_id = models.PositiveBigIntegerField(verbose_name="شناسه‌ی رکورد مقصد")
+    filename = models.CharField(max_length=255, verbose_name="نام فایل")
+    size = models.PositiveBigIntegerField(verbose_name="حجم کل (بایت)")
+    offset = models.PositiveBigIntegerField(default=0, verbose_name="بایت‌های دریافت‌شده")
+    checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name="SHA-256",
+        help_text="در صورت ارسال، فایل کامل در پایان با آن مقایسه می‌شود"
+    )
+    result_id = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="شناسه‌ی رکورد ساخته‌شده")
+    error = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="خطا",
+        help_text="دلیل شکست پردازش فایل کامل‌شده؛ پس از ارسال تکه‌ی بعدی پاک می‌شود"
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='chunked_uploads',
+        verbose_name="کاربر"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="تاریخ تکمیل")
+
+    class Meta:
+        verbose_name = "آپلود تکه‌ای"
+        verbose_name_plural = "آپلودهای تکه‌ای"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+
+
+class BulkImport(models.Model):
+    """
+    آپلود گروهی تصاویر گالری از پنل ادمین که در پس‌زمینه پردازش می‌شود.
+    پیشرفت کار روی همین ردیف ثبت می‌شود و صفحه‌ی ادمین آن را دنبال می‌کند.
+    """
+    TARGET_CHOICES = [
+        ('course.images', 'گالری دوره'),
+        ('industrial_tourism.images', 'گالری گردشگری صنعتی'),
+    ]
+    PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'در صف'),
+        (RUNNING, 'در حال پردازش'),
+        (DONE, 'انجام شد'),
+        (FAILED, 'ناموفق'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target = models.CharField(max_length=50, choices=TARGET_CHOICES, verbose_name="مقصد")
+    object_id = models.PositiveBigIntegerField(verbose_name="شناسه‌ی رکورد مقصد")
+    filename = models.CharField(max_length=255, verbose_name="نام فایل")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="وضعیت")
+    done = models.PositiveIntegerField(default=0, verbose_name="تصاویر پردازش‌شده")
+    total = models.PositiveIntegerField(default=0, verbose_name="تعداد تصاویر")
+    created_count = models.PositiveIntegerField(default=0, verbose_name="تصاویر اضافه‌شده")
+    errors = models.JSONField(default=list, blank=True, verbose_name="خطای تصاویر")
+    error = models.CharField(max_length=255, blank=True, verbose_name="خطا")
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='bulk_imports',
+        verbose_name="کاربر"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="تاریخ پایان")
+
+    class Meta:
+        verbose_name = "آپلود گروهی"
+        verbose_name_plural = "آپلودهای گروهی"
         ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.done}/{self.total})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
@@ -0,0 +1,40 @@
+# django files
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Value, When
+
+# rest files
+from rest_framework.exceptions import ValidationError
+
+
+def apply_order(queryset, ids, field='order', start=0):
+    """
+    Give the rows of ``queryset`` the positions of their ids in ``ids`` with a
+    single ``UPDATE ... SET order = CASE id WHEN ... END``. ``ids`` must list
+    every row of ``queryset`` exactly once; rows whose position is unchanged
+    are left out of the UPDATE. Returns the number of rows moved.
+    """
+    with transaction.atomic():
+        current = dict(queryset.select_for_update().values_list('pk', field))
+        missing = set(current) - set(ids)
+        unknown = set(ids) - set(current)
+        if missing or unknown:
+            raise ValidationError({'ids': [
+                f'فهرست باید دقیقاً شامل همه‌ی موارد باشد؛ جاافتاده: {sorted(missing)}، نامعتبر: {sorted(unknown)}'
+            ]})
+
+        moved = {pk: position for position, pk in enumerate(ids, start) if current[pk] != position}
+        if moved:
+            queryset.filter(pk__in=moved).update(**{field: Case(
+                *[When(pk=pk, then=Value(position)) for pk, position in moved.items()],
+                output_field=IntegerField(),
+            )})
+    return len(moved)
+
+
+def next_position(queryset, field='order'):
+    """
+    Position just after the last row of ``queryset``, for appending. Callers
+    lock the parent row first so two appends to one list can't read the same maximum.
+    """
+    last = queryset.aggregate(last=Max(field))['last']
+    return 0 if last is None else last + 1
@@ -0,0 +1,9 @@
+# rest files
+from rest_framework.pagination import PageNumberPagination
+
+
+class GalleryPagination(PageNumberPagination):
+    """صفحه‌بندی تصاویر گالری (?page=&page_size=)"""
+    page_size = 24
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -1,10 +1,30 @@
 # rest files
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-from urllib.parse import urlparse
+from contextlib import contextmanager
+import os
+
+# django files
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models, transaction
 
 #your files
-from .models import Category, Article, CourseInfo, CourseImage, VideoCast, IndustrialTourism, IndustrialTourismImages
+from .models import (
+    Category,
+    Article,
+    CourseInfo,
+    CourseImage,
+    Teacher,
+    VideoCast,
+    IndustrialTourism,
+    IndustrialTourismImages,
+    ChunkedUpload,
+)
+from .aparat import refresh_in_background
+from .bulk import render_uploads
+from .uploads import UPLOAD_TARGETS, VIDEO_TYPES, processing_pool, target_field
+from siteAssets.validators import image_budget
 
 from accounts.models import User
 
@@ -55,15 +75,30 @@ class ArticleSerializer(serializers.ModelSerializer):
 
 
 
+class TeacherSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Teacher
+        fields = ['id', 'name', 'slug', 'created_at']
+        read_only_fields = ['slug', 'created_at']
+
+
+class TeacherMinimalSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Teacher
+        fields = ['id', 'name', 'slug']
+
+
 class CourseImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = CourseImage
-        fields = ['id', 'caption', 'image', 'created_at', 'course']
+        fields = ['id', 'caption', 'image', 'order', 'created_at', 'course']
         read_only_fields = ['id', 'created_at']
 
 
 class CourseInfoSerializer(serializers.ModelSerializer):
     images = CourseImageSerializer(many=True, read_only=True)  # فقط نمایش
+    teachers = TeacherMinimalSerializer(many=True, read_only=True)
+    images_count = serializers.IntegerField(read_only=True)  # در لیست فقط چند تصویر اول در images می‌آید
     final_price = serializers.DecimalField(
         max_digits=11, decimal_places=2, read_only=True
     )
@@ -76,7 +111,7 @@ class CourseInfoSerializer(serializers.ModelSerializer):
             'id', 'title', 'slug', 'description', 'base_image',
             'teachers', 'start_date', 'end_date', 'duration',
             'duration_display', 'price', 'discount', 'final_price',
-            'price_display', 'is_published', 'images',
+            'price_display', 'is_published', 'images', 'images_count',
             'created_at', 'updated_at',
         ]
         read_only_fields = ['slug', 'created_at', 'updated_at', 'final_price']
@@ -94,11 +129,74 @@ class CourseInfoSerializer(serializers.ModelSerializer):
         return None
 
 
+class CourseCalendarSerializer(serializers.ModelSerializer):
+    """نمایش فشرده‌ی دوره برای تقویم (بدون توضیحات و گالری)"""
+    final_price = serializers.DecimalField(max_digits=11, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = CourseInfo
+        fields = ['id', 'title', 'slug', 'base_image', 'start_date', 'end_date', 'duration', 'final_price']
+        read_only_fields = fields
+
+
+class CourseCalendarQuerySerializer(serializers.Serializer):
+    """
+    پارامترهای تقویم دوره‌ها
+    - status: upcoming (شروع نشده)، ongoing (در حال برگزاری)، ended (تمام‌شده)
+    - from / to: دوره‌هایی که با این بازه هم‌پوشانی دارند
+    - group: week یا month
+    """
+    STATUS_CHOICES = ('upcoming', 'ongoing', 'ended')
+    GROUP_CHOICES = ('week', 'month')
+    MAX_RANGE_DAYS = 366
+
+    status = serializers.ChoiceField(choices=STATUS_CHOICES, required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    group = serializers.ChoiceField(choices=GROUP_CHOICES, default='month')
+
+    def get_fields(self):
+        # ?from=&to= are reserved words in Python
+        fields = super().get_fields()
+        fields['from'] = fields.pop('date_from')
+        fields['to'] = fields.pop('date_to')
+        return fields
+
+    def validate(self, data):
+        date_from, date_to = data.get('from'), data.get('to')
+        if date_from and date_to:
+            if date_from > date_to:
+                raise ValidationError({'to': 'تاریخ پایان باید بعد از تاریخ شروع باشد'})
+            if (date_to - date_from).days > self.MAX_RANGE_DAYS:
+                raise ValidationError({'to': f'بازه‌ی زمانی حداکثر {self.MAX_RANGE_DAYS} روز است'})
+        return data
+
+
+class CourseImageWriteSerializer(serializers.ModelSerializer):
+    """
+    یک آیتم از گالری در ویرایش دوره: تصویر موجود با id، یا تصویر جدید با image
+    """
+    id = serializers.IntegerField(required=False)
+    image = serializers.ImageField(required=False)
+
+    class Meta:
+        model = CourseImage
+        fields = ['id', 'caption', 'image', 'order']
+        read_only_fields = ['order']
+
+    def validate(self, attrs):
+        if bool(attrs.get('id')) == bool(attrs.get('image')):
+            raise ValidationError('برای هر تصویر یا id تصویر موجود یا فایل image جدید را ارسال کنید')
+        return attrs
+
+
 class CourseInfoWriteSerializer(serializers.ModelSerializer):
     """
     سریالایزر برای ایجاد/ویرایش دوره همراه با آپلود تصاویر
+    فهرست images کل گالری را به ترتیب نمایش مشخص می‌کند: تصاویر موجود (با id) ویرایش و
+    مرتب می‌شوند، تصاویر جدید اضافه و بقیه حذف می‌شوند؛ همه در یک تراکنش.
     """
-    images = CourseImageSerializer(many=True, required=False)
+    images = CourseImageWriteSerializer(many=True, required=False)
 
     class Meta:
         model = CourseInfo
@@ -109,29 +207,94 @@ class CourseInfoWriteSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['slug']
 
+    def validate_images(self, value):
+        ids = [item['id'] for item in value if item.get('id')]
+        if len(ids) != len(set(ids)):
+            raise ValidationError('یک تصویر بیش از یک بار ارسال شده است')
+        if ids:
+            captions = {}
+            if self.instance is not None:
+                captions = dict(self.instance.images.filter(pk__in=ids).values_list('pk', 'caption'))
+            unknown = sorted(set(ids) - set(captions))
+            if unknown:
+                raise ValidationError(f'این تصاویر متعلق به این دوره نیستند: {unknown}')
+            # existing images sent without a caption keep the one they have
+            for item in value:
+                if item.get('id') and 'caption' not in item:
+                    item['caption'] = captions[item['id']]
+        return value
+
     def create(self, validated_data):
         images_data = validated_data.pop('images', [])
-        course = CourseInfo.objects.create(**validated_data)
-        for image_data in images_data:
-            CourseImage.objects.create(course=course, **image_data)
+        teachers = validated_data.pop('teachers', [])
+        stored = self.render_images(images_data)
+        with self.cleanup_on_error(stored), transaction.atomic():
+            course = CourseInfo.objects.create(**validated_data)
+            course.teachers.set(teachers)
+            self.write_images(course, images_data, stored)
         return course
 
     def update(self, instance, validated_data):
-        images_data = validated_data.pop('images', [])
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-
-        for image_data in images_data:
-            CourseImage.objects.create(course=instance, **image_data)
-
+        # images omitted (e.g. PATCH without a gallery) leaves the gallery untouched
+        images_data = validated_data.pop('images', None)
+        teachers = validated_data.pop('teachers', None)
+        stored = self.render_images(images_data or [])
+        with self.cleanup_on_error(stored), transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            if teachers is not None:
+                instance.teachers.set(teachers)
+            if images_data is not None:
+                self.write_images(instance, images_data, stored)
         return instance
 
-
-
-
-
-
+    def render_images(self, images_data):
+        """
+        Render and store every new file as one batch, before the transaction
+        opens. Returns ``[(stored_name, phash), ...]`` for the new items in order.
+        """
+        positions = [position for position, item in enumerate(images_data) if not item.get('id')]
+        try:
+            return render_uploads(
+                CourseImage._meta.get_field('image'),
+                [images_data[position]['image'] for position in positions],
+            )
+        except DjangoValidationError as e:
+            raise ValidationError({'images': {
+                positions[int(index)]: {'image': messages} for index, messages in e.message_dict.items()
+            }})
+
+    @contextmanager
+    def cleanup_on_error(self, stored):
+        """Rows roll back with the transaction; also drop the files nothing will reference."""
+        try:
+            yield
+        except BaseException:
+            storage = CourseImage._meta.get_field('image').storage
+            for name, _ in stored:
+                storage.delete(name)
+            raise
+
+    def write_images(self, course, images_data, stored):
+        """
+        Make the course gallery exactly ``images_data``, in order, with a fixed
+        number of queries: one DELETE, one bulk UPDATE and one bulk INSERT.
+        """
+        stored = iter(stored)
+        keep, create = [], []
+        for position, item in enumerate(images_data):
+            if item.get('id'):
+                keep.append(CourseImage(pk=item['id'], caption=item.get('caption'), order=position))
+            else:
+                name, phash = next(stored)
+                create.append(CourseImage(
+                    course=course, caption=item.get('caption'), image=name, phash=phash, order=position
+                ))
+
+        course.images.exclude(pk__in=[obj.pk for obj in keep]).delete()
+        CourseImage.objects.bulk_update(keep, ['caption', 'order'])
+        CourseImage.objects.bulk_create(create)
 
 
 class VideoCastSerializer(serializers.ModelSerializer):
@@ -143,9 +306,9 @@ class VideoCastSerializer(serializers.ModelSerializer):
         fields = [
             "id", "title", "aparat_url", "aparat_id",
             "order", "created_at", "updated_at",
-            "embed_url", "thumbnail_url",
+            "embed_url", "thumbnail_url", "duration", "views",
         ]
-        read_only_fields = ("aparat_id", "created_at", "updated_at")
+        read_only_fields = ("aparat_id", "created_at", "updated_at", "duration", "views")
 
     def validate_aparat_url(self, value):
         """اعتبارسنجی لینک آپارات و استخراج شناسه ویدیو"""
@@ -180,27 +343,80 @@ class VideoCastSerializer(serializers.ModelSerializer):
     @staticmethod
     def extract_video_id(url: str) -> str | None:
         """استخراج شناسه ویدیو از لینک آپارات"""
-        try:
-            parsed = urlparse(url)
-            path_parts = parsed.path.strip("/").split("/")
-
-            if "aparat.com" not in parsed.netloc:
-                return None
-
-            # حالت معمولی: /v/VIDEO_ID
-            if len(path_parts) >= 2 and path_parts[0] in ["v", "video"]:
-                return path_parts[1]
-
-            # حالت embed: /videohash/VIDEO_ID/...
-            if "videohash" in path_parts:
-                idx = path_parts.index("videohash") + 1
-                return path_parts[idx] if idx < len(path_parts) else None
-        except Exception:
-            return None
-        return None
+        return VideoCast.extract_video_id(url)
 
 
+class VideoCastBulkSerializer(serializers.Serializer):
+    """
+    افزودن گروهی ویدیوها (مثلاً یک پلی‌لیست) با فهرست لینک‌های آپارات
+    """
+    MAX_URLS = 500
+
+    urls = serializers.ListField(
+        child=serializers.CharField(max_length=500, trim_whitespace=True),
+        allow_empty=False,
+        max_length=MAX_URLS,
+    )
+    fetch_metadata = serializers.BooleanField(
+        default=False,
+        help_text="دریافت عنوان، تصویر و مدت ویدیوهای جدید از آپارات در پس‌زمینه پس از ثبت"
+    )
 
+    def create(self, validated_data):
+        """
+        Parse every URL in one pass, dedupe against the table with a single
+        ``aparat_id IN (...)`` query and insert the rest with one bulk_create.
+        Returns one outcome per URL: created, exists, duplicate or invalid.
+        """
+        results, pending = [], {}
+        for url in validated_data['urls']:
+            video_id = VideoCast.extract_video_id(url)
+            result = {'url': url, 'aparat_id': video_id, 'status': 'invalid', 'id': None}
+            if video_id in pending:
+                result['status'] = 'duplicate'
+            elif video_id:
+                pending[video_id] = url
+            results.append(result)
+
+        existing = dict(VideoCast.objects.filter(aparat_id__in=pending).values_list('aparat_id', 'pk'))
+        start = (VideoCast.objects.aggregate(last=models.Max('order'))['last'] or 0) + 1
+        fresh = [(video_id, url) for video_id, url in pending.items() if video_id not in existing]
+        new_videos = [
+            # the id stands in for the title until refresh_videocasts fetches the real one
+            VideoCast(title=video_id, aparat_url=url, aparat_id=video_id, order=start + position)
+            for position, (video_id, url) in enumerate(fresh)
+        ]
+        VideoCast.objects.bulk_create(new_videos, ignore_conflicts=True)
+        created = dict(
+            VideoCast.objects.filter(aparat_id__in=[video.aparat_id for video in new_videos])
+            .values_list('aparat_id', 'pk')
+        )
+
+        for result in results:
+            video_id = result['aparat_id']
+            if result['status'] == 'duplicate' or video_id is None:
+                continue
+            if video_id in existing:
+                result.update(status='exists', id=existing[video_id])
+            elif video_id in created:
+                result.update(status='created', id=created[video_id])
+
+        if validated_data['fetch_metadata'] and created:
+            # hundreds of Aparat round trips don't belong in the request; whatever
+            # the pool misses, refresh_videocasts fetches on its next run
+            pks = list(created.values())
+            transaction.on_commit(lambda: processing_pool().submit(refresh_in_background, VideoCast, pks))
+        return results
+
+
+class ReorderSerializer(serializers.Serializer):
+    """ترتیب جدید: فهرست کامل شناسه‌ها به ترتیب نمایش"""
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=5000)
+
+    def validate_ids(self, value):
+        if len(value) != len(set(value)):
+            raise ValidationError('شناسه‌ی تکراری در فهرست وجود دارد')
+        return value
 
 
 class IndustrialTourismImageSerializer(serializers.ModelSerializer):
@@ -213,6 +429,7 @@ class IndustrialTourismImageSerializer(serializers.ModelSerializer):
             "caption",
             "image",
             "image_url",
+            "order",
             "created_at",
             "updated_at",
         ]
@@ -229,6 +446,7 @@ class IndustrialTourismSerializer(serializers.ModelSerializer):
     base_image_url = serializers.SerializerMethodField()
     video_url = serializers.SerializerMethodField()
     images = IndustrialTourismImageSerializer(many=True, read_only=True)
+    images_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = IndustrialTourism
@@ -239,9 +457,14 @@ class IndustrialTourismSerializer(serializers.ModelSerializer):
             "base_image_url",
             "video",
             "video_url",
+            "video_duration",
+            "video_width",
+            "video_height",
+            "video_bitrate",
             "description",
             "content",
             "images",
+            "images_count",
             "created_at",
             "updated_at",
         ]
@@ -257,4 +480,64 @@ class IndustrialTourismSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         if obj.video and request:
             return request.build_absolute_uri(obj.video.url)
-        return obj.video.url if obj.video else None
\ No newline at end of file
+        return obj.video.url if obj.video else None
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChunkedUpload
+        fields = [
+            'id', 'target', 'object_id', 'filename', 'size', 'offset',
+            'checksum', 'result_id', 'error', 'created_at', 'completed_at',
+        ]
+        read_only_fields = ['offset', 'result_id', 'error', 'created_at', 'completed_at']
+
+    def validate_filename(self, value):
+        name = os.path.basename(value.replace('\\', '/'))
+        if not name or name in ('.', '..'):
+            raise ValidationError("نام فایل نامعتبر است")
+        return name
+
+    def validate_size(self, value):
+        max_size = getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', None)
+        if value == 0:
+            raise ValidationError("فایل خالی قابل آپلود نیست")
+        if max_size and value > max_size:
+            raise ValidationError(f"حداکثر حجم مجاز {max_size // 1024 // 1024} مگابایت است")
+        return value
+
+    def validate_checksum(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value)):
+            raise ValidationError("SHA-256 باید ۶۴ کاراکتر هگز باشد")
+        return value
+
+    def validate(self, data):
+        parent_model = UPLOAD_TARGETS[data['target']].parent_model
+        if not parent_model.objects.filter(pk=data['object_id']).exists():
+            raise ValidationError({'object_id': "رکورد مقصد پیدا نشد"})
+        max_bytes = image_budget()[0]
+        if isinstance(target_field(data['target']), models.ImageField) and data['size'] > max_bytes:
+            raise ValidationError({'size': f"حداکثر حجم مجاز تصویر {max_bytes // 1024 // 1024} مگابایت است"})
+        return data
+
+
+class DirectUploadSerializer(ChunkedUploadSerializer):
+    """درخواست لینک آپلود مستقیم (presigned PUT) به ذخیره‌ساز"""
+    content_type = serializers.CharField(max_length=100)
+
+    class Meta(ChunkedUploadSerializer.Meta):
+        fields = ['target', 'object_id', 'filename', 'size', 'content_type']
+
+    def validate(self, data):
+        data = super().validate(data)
+        expected = 'image/' if isinstance(target_field(data['target']), models.ImageField) else 'video/'
+        if not data['content_type'].startswith(expected):
+            raise ValidationError({'content_type': f"نوع فایل باید {expected}* باشد"})
+        if expected == 'video/' and data['content_type'].lower() not in VIDEO_TYPES:
+            raise ValidationError({'content_type': f"فرمت‌های مجاز ویدیو: {', '.join(sorted(VIDEO_TYPES))}"})
+        return data
+
+
+class DirectUploadCompleteSerializer(serializers.Serializer):
+    token = serializers.CharField()
@@ -1,3 +1,436 @@
-from django.test import TestCase
+# python files
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
 
-# Create your tests here.
+# django files
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+# rest files
+from rest_framework.test import APIClient
+
+# your files
+from articles.aparat import AparatError, fetch_many, refresh_metadata
+from articles.bulk import archive_path
+from articles.models import BulkImport, ChunkedUpload, IndustrialTourism, IndustrialTourismImages, VideoCast
+from articles.uploads import (
+    DIRECT_UPLOAD_SALT,
+    UploadError,
+    append_chunk,
+    complete_direct_upload,
+    part_path,
+    target_field,
+)
+from siteAssets.tests import S3StubMixin, _jpeg
+
+
+class _AparatHandler(BaseHTTPRequestHandler):
+    """Aparat's /video/videohash/<id>: 'missing' has no video, 'broken' fails, the rest exist."""
+    protocol_version = 'HTTP/1.1'
+    delay = 0
+    state = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        video_id = self.path.rstrip('/').rpartition('/')[2]
+        with self.state['lock']:
+            self.state['requests'] = self.state.get('requests', 0) + 1
+            self.state['in_flight'] += 1
+            self.state['max_in_flight'] = max(self.state['max_in_flight'], self.state['in_flight'])
+        try:
+            time.sleep(self.delay)
+            if video_id == 'broken':
+                return self._send(500, {})
+            if video_id == 'missing':
+                return self._send(200, {'video': {}})
+            self._send(200, {'video': {
+                'uid': video_id, 'title': f'Title {video_id}', 'big_poster': f'https://img.aparat.test/{video_id}.jpg',
+                'duration': '95', 'visit_cnt': 12,
+            }})
+        finally:
+            with self.state['lock']:
+                self.state['in_flight'] -= 1
+
+    def _send(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class AparatStubMixin:
+    """Runs a stub Aparat API for the test class and points APARAT_API_URL at it."""
+    delay = 0
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.state = {'lock': threading.Lock(), 'in_flight': 0, 'max_in_flight': 0}
+        handler = type('Handler', (_AparatHandler,), {'state': cls.state, 'delay': cls.delay})
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+    def setUp(self):
+        super().setUp()
+        self.state['max_in_flight'] = 0
+        override = override_settings(APARAT_API_URL=f'http://127.0.0.1:{self.server.server_port}')
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class FetchManyTests(AparatStubMixin, TestCase):
+    delay = 0.2
+
+    def test_requests_in_flight_are_bounded(self):
+        results = asyncio.run(fetch_many([f'v{i}' for i in range(12)], concurrency=3))
+        self.assertEqual(len(results), 12)
+        self.assertEqual(self.state['max_in_flight'], 3)
+
+    def test_errors_are_returned_per_video(self):
+        results = asyncio.run(fetch_many(['ok', 'missing', 'broken'], concurrency=3))
+        self.assertEqual(results['ok'].title, 'Title ok')
+        self.assertIsInstance(results['missing'], AparatError)
+        self.assertIsInstance(results['broken'], AparatError)
+
+
+class FetchManyConcurrencyTests(AparatStubMixin, TestCase):
+    # long enough for all 40 threads to connect even on a loaded machine
+    delay = 1
+
+    def test_concurrency_is_not_capped_by_the_default_executor(self):
+        asyncio.run(fetch_many([f'v{i}' for i in range(40)], concurrency=40))
+        # the default executor would stop at min(32, cpu + 4) threads
+        self.assertGreater(self.state['max_in_flight'], min(32, os.cpu_count() + 4))
+
+
+class RefreshMetadataTests(AparatStubMixin, TestCase):
+    def video(self, aparat_id, title=None):
+        return VideoCast.objects.create(title=title or aparat_id, aparat_url=f'https://www.aparat.com/v/{aparat_id}')
+
+    def test_metadata_is_stored(self):
+        placeholder, named = self.video('abc1'), self.video('abc2', title='Session 2')
+        updated, errors = refresh_metadata([placeholder, named])
+        self.assertEqual((updated, errors), (2, {}))
+
+        placeholder.refresh_from_db()
+        self.assertEqual(placeholder.title, 'Title abc1')
+        self.assertEqual(placeholder.thumbnail, 'https://img.aparat.test/abc1.jpg')
+        self.assertEqual((placeholder.duration, placeholder.views), (95, 12))
+        self.assertIsNotNone(placeholder.metadata_fetched_at)
+        named.refresh_from_db()
+        # titles given by an editor are kept
+        self.assertEqual(named.title, 'Session 2')
+
+    def test_failed_videos_are_reported_and_left_alone(self):
+        good, missing, broken = self.video('good'), self.video('missing'), self.video('broken')
+        updated, errors = refresh_metadata([good, missing, broken])
+        self.assertEqual(updated, 1)
+        self.assertEqual(set(errors), {'missing', 'broken'})
+        for video in (missing, broken):
+            video.refresh_from_db()
+            self.assertIsNone(video.metadata_fetched_at)
+            self.assertEqual(video.title, video.aparat_id)
+
+
+class VideoCastBulkTests(AparatStubMixin, TestCase):
+    def test_metadata_is_fetched_after_the_response(self):
+        admin = get_user_model().objects.create_user(
+            username='admin', email='admin@example.com', password='Secret-pass-1', is_staff=True
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        self.state['requests'] = 0
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = client.post('/api/v1/articles/video/bulk/', {
+                'urls': ['https://www.aparat.com/v/abc1', 'https://www.aparat.com/v/abc2'], 'fetch_metadata': True,
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([result['status'] for result in response.data], ['created', 'created'])
+        # queued for the background pool, nothing fetched while the request ran
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.state['requests'], 0)
+
+
+def _box(kind, payload=b''):
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+class DirectVideoUploadTests(S3StubMixin, TestCase):
+    key = 'IndustrialTourism/videos/ab/cd/abcd.mp4'
+
+    def setUp(self):
+        super().setUp()
+        field = target_field('industrial_tourism.video')
+        default_storage, field.storage = field.storage, self.storage
+        self.addCleanup(setattr, field, 'storage', default_storage)
+        self.user = get_user_model().objects.create_user(
+            username='editor', email='editor@example.com', password='Secret-pass-1', is_staff=True
+        )
+        self.tour = IndustrialTourism.objects.create(title='t', description='d', content='c')
+
+    def upload(self, body, content_type='video/mp4', declared_type='video/mp4'):
+        self.storage.save(self.key, SimpleUploadedFile('a.mp4', body, content_type))
+        return signing.dumps({
+            'target': 'industrial_tourism.video', 'object_id': self.tour.pk, 'filename': 'a.mp4',
+            'size': len(body), 'key': self.key, 'content_type': declared_type, 'user': self.user.pk,
+        }, salt=DIRECT_UPLOAD_SALT)
+
+    def test_mp4_is_attached(self):
+        token = self.upload(_box(b'ftyp', b'isom\0\0\2\0isommp41') + _box(b'mdat', b'\0' * 64))
+        complete_direct_upload(token, self.user)
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.video.name, self.key)
+        self.assertIn(self.key, self.objects)
+
+    def test_webm_is_checked_by_its_magic(self):
+        token = self.upload(b'\x1a\x45\xdf\xa3' + b'\0' * 60, 'video/webm', 'video/webm')
+        complete_direct_upload(token, self.user)
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.video.name, self.key)
+
+    def assertRejected(self, token):
+        with self.assertRaises(UploadError) as caught:
+            complete_direct_upload(token, self.user)
+        self.assertEqual(caught.exception.status, 400)
+        self.assertNotIn(self.key, self.objects)
+        self.tour.refresh_from_db()
+        self.assertFalse(self.tour.video)
+
+    def test_content_type_must_match_the_declared_one(self):
+        self.assertRejected(self.upload(_box(b'ftyp', b'isom'), content_type='text/html'))
+
+    def test_non_video_is_deleted(self):
+        self.assertRejected(self.upload(b'<html><script>alert(1)</script></html>'))
+
+    def test_mp4_must_start_with_ftyp(self):
+        self.assertRejected(self.upload(_box(b'mdat', b'\0' * 64) + _box(b'ftyp', b'isom')))
+
+    def test_truncated_ftyp_is_rejected(self):
+        self.assertRejected(self.upload(struct.pack('>I4s', 64, b'ftyp') + b'isom'))
+
+
+class IngestVideoTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def run_command(self, *args):
+        stdout = StringIO()
+        call_command('ingest_videos', *args, stdout=stdout, stderr=StringIO())
+        return stdout.getvalue()
+
+    def test_unreadable_video_is_recorded_and_skipped(self):
+        tour = IndustrialTourism.objects.create(
+            title='t', description='d', content='c', video=SimpleUploadedFile('a.webm', b'\x1a\x45\xdf\xa3' + b'\0' * 60)
+        )
+        with self.assertLogs('articles.models', 'WARNING'):
+            self.assertIn('0 videos, 1 failed', self.run_command())
+        tour.refresh_from_db()
+        self.assertIsNone(tour.video_duration)
+        self.assertTrue(tour.video_error)
+
+        self.assertIn('0 videos, 0 failed', self.run_command())
+        with self.assertLogs('articles.models', 'WARNING'):
+            self.assertIn('0 videos, 1 failed', self.run_command('--retry-failed'))
+
+    def test_a_new_video_clears_the_error(self):
+        tour = IndustrialTourism.objects.create(
+            title='t', description='d', content='c', video=SimpleUploadedFile('a.webm', b'\x1a\x45\xdf\xa3' + b'\0' * 60)
+        )
+        with self.assertLogs('articles.models', 'WARNING'):
+            tour.ingest_video()
+        self.assertTrue(tour.video_error)
+        tour.video = SimpleUploadedFile('b.mp4', b'\0' * 64)
+        tour.save()
+        tour.refresh_from_db()
+        self.assertEqual(tour.video_error, '')
+
+
+class AdminBulkImportTests(TransactionTestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media, CHUNKED_UPLOAD_TEMP_DIR=os.path.join(media, 'tmp'))
+        override.enable()
+        self.addCleanup(override.disable)
+        admin = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='Secret-pass-1', phone_number='09120000000'
+        )
+        self.client.force_login(admin)
+        self.tour = IndustrialTourism.objects.create(title='t', description='d', content='c')
+        self.url = reverse('admin:articles_industrialtourism_bulk_images', args=[self.tour.pk])
+
+    def archive(self, files):
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            for name, data in files.items():
+                zf.writestr(name, data)
+        return SimpleUploadedFile('photos.zip', buffer.getvalue(), 'application/zip')
+
+    def wait(self, job):
+        status_url = reverse('admin:articles_industrialtourism_bulk_images_status', args=[self.tour.pk, job.pk])
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            status = self.client.get(status_url).json()
+            if status['finished']:
+                return status
+            time.sleep(0.1)
+        self.fail('bulk import did not finish')
+
+    def test_import_runs_in_the_background(self):
+        archive = self.archive({'a.jpg': _jpeg(), 'b.jpg': _jpeg(color='blue'), 'c.jpg': b'not an image'})
+        response = self.client.post(self.url, {'archive': archive})
+        job = BulkImport.objects.get()
+        self.assertRedirects(response, f'{self.url}?job={job.pk}')
+        self.assertContains(self.client.get(response.url), 'bulk-progress')
+
+        status = self.wait(job)
+        self.assertEqual(status['status'], BulkImport.DONE)
+        self.assertEqual((status['done'], status['total'], status['created']), (3, 3, 2))
+        self.assertEqual([error['file'] for error in status['errors']], ['c.jpg'])
+        self.assertEqual(IndustrialTourismImages.objects.filter(industrial_tourism=self.tour).count(), 2)
+        # the kept copy of the archive is removed once the job is over
+        self.assertFalse(os.path.exists(archive_path(job)))
+
+    def test_bad_archive_fails_the_job(self):
+        response = self.client.post(self.url, {'archive': SimpleUploadedFile('photos.zip', b'nope')})
+        job = BulkImport.objects.get()
+        self.assertEqual(response.status_code, 302)
+        status = self.wait(job)
+        self.assertEqual(status['status'], BulkImport.FAILED)
+        self.assertTrue(status['error'])
+
+
+class ChunkedUploadTests(TransactionTestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media, CHUNKED_UPLOAD_TEMP_DIR=os.path.join(media, 'tmp'))
+        override.enable()
+        self.addCleanup(override.disable)
+        admin = get_user_model().objects.create_user(
+            username='admin', email='admin@example.com', password='Secret-pass-1', is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        self.tour = IndustrialTourism.objects.create(title='t', description='d', content='c')
+        self.data = _jpeg()
+
+    def start(self, checksum=''):
+        response = self.client.post('/api/v1/articles/uploads/', {
+            'target': 'industrial_tourism.images', 'object_id': self.tour.pk, 'filename': 'a.jpg',
+            'size': len(self.data), 'checksum': checksum,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return ChunkedUpload.objects.get(pk=response.data['id'])
+
+    def patch(self, upload, offset, chunk, checksum=None):
+        headers = {'HTTP_UPLOAD_OFFSET': str(offset)}
+        if checksum is not None:
+            headers['HTTP_UPLOAD_CHECKSUM'] = f'sha256 {base64.b64encode(checksum).decode()}'
+        return self.client.generic(
+            'PATCH', f'/api/v1/articles/uploads/{upload.pk}/', chunk,
+            content_type='application/offset+octet-stream', **headers,
+        )
+
+    def offset(self, upload):
+        return int(self.client.head(f'/api/v1/articles/uploads/{upload.pk}/')['Upload-Offset'])
+
+    def wait_completed(self, upload):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            upload.refresh_from_db()
+            if upload.is_complete or upload.error:
+                return upload
+            time.sleep(0.05)
+        self.fail('upload was not completed in the background')
+
+    def test_offset_mismatch_is_a_conflict(self):
+        upload = self.start()
+        self.assertEqual(self.patch(upload, 0, self.data[:100]).status_code, 200)
+        response = self.patch(upload, 50, self.data[50:200])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.offset(upload), 100)
+
+    def test_resume_after_a_partial_chunk(self):
+        upload = self.start(checksum=hashlib.sha256(self.data).hexdigest())
+        # the connection dropped after 100 of the 300 announced bytes
+        append_chunk(upload.pk, BytesIO(self.data[:100]), 0, 300)
+        self.assertEqual(self.offset(upload), 100)
+        self.assertEqual(os.path.getsize(part_path(upload)), 100)
+
+        response = self.patch(upload, 100, self.data[100:])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Upload-Offset'], str(len(self.data)))
+        # completion checks the SHA-256 of the reassembled file
+        upload = self.wait_completed(upload)
+        self.assertEqual(upload.error, '')
+        self.assertTrue(upload.is_complete)
+
+    def test_chunk_checksum_mismatch_keeps_the_offset(self):
+        upload = self.start()
+        self.patch(upload, 0, self.data[:100])
+        response = self.patch(upload, 100, self.data[100:200], checksum=hashlib.sha256(b'other').digest())
+        self.assertEqual(response.status_code, 460)
+        self.assertEqual(self.offset(upload), 100)
+        self.assertEqual(os.path.getsize(part_path(upload)), 100)
+
+        chunk = self.data[100:200]
+        self.assertEqual(self.patch(upload, 100, chunk, checksum=hashlib.sha256(chunk).digest()).status_code, 200)
+        self.assertEqual(self.offset(upload), 200)
+
+    def test_chunk_past_the_announced_size_is_rejected(self):
+        upload = self.start()
+        response = self.patch(upload, 0, self.data + b'extra')
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.offset(upload), 0)
+
+    def test_last_chunk_is_completed_in_the_background(self):
+        upload = self.start(checksum=hashlib.sha256(self.data).hexdigest())
+        self.patch(upload, 0, self.data[:1000])
+        response = self.patch(upload, 1000, self.data[1000:])
+        self.assertEqual(response.status_code, 200)
+
+        upload = self.wait_completed(upload)
+        self.assertEqual(upload.error, '')
+        image = IndustrialTourismImages.objects.get(pk=upload.result_id)
+        self.assertEqual(image.industrial_tourism_id, self.tour.pk)
+        self.assertTrue(image.image)
+        # the part file is gone with the session's completion
+        self.assertEqual(self.patch(upload, len(self.data), b'x').status_code, 410)
+
+    def test_file_checksum_mismatch_starts_the_upload_over(self):
+        upload = self.start(checksum=hashlib.sha256(b'something else').hexdigest())
+        self.patch(upload, 0, self.data)
+
+        upload = self.wait_completed(upload)
+        self.assertFalse(upload.is_complete)
+        self.assertIn('SHA-256', upload.error)
+        self.assertEqual(self.offset(upload), 0)
+        self.assertEqual(os.path.getsize(part_path(upload)), 0)
+        self.assertFalse(IndustrialTourismImages.objects.exists())
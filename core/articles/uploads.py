@@ -0,0 +1,405 @@
+# python files
+import base64
+import fcntl
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+import threading
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# django files
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+# your files
+from .models import (
+    Article,
+    ChunkedUpload,
+    CourseImage,
+    CourseInfo,
+    IndustrialTourism,
+    IndustrialTourismImages,
+)
+from .ordering import next_position
+from siteAssets.mp4 import Mp4Error, parse_boxes
+
+READ_BLOCK = 64 * 1024
+DIRECT_UPLOAD_SALT = 'articles.direct-upload'
+# video Content-Types accepted for direct uploads: the ISO media family must
+# start with an ftyp box, the others with their magic bytes
+FTYP_VIDEO_TYPES = {'video/mp4', 'video/quicktime', 'video/3gpp'}
+VIDEO_MAGIC = {'video/webm': b'\x1a\x45\xdf\xa3', 'video/x-matroska': b'\x1a\x45\xdf\xa3'}
+VIDEO_TYPES = FTYP_VIDEO_TYPES | set(VIDEO_MAGIC)
+# ftyp lists a handful of brands; anything longer is not a real one
+VIDEO_PROBE_BYTES = 4096
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# parent_model: record the client points at with object_id
+# model/field: where the finished file ends up; parent_field is set for galleries,
+# where completion creates a new row instead of replacing a field
+UploadTarget = namedtuple('UploadTarget', ['parent_model', 'model', 'field', 'parent_field'])
+
+UPLOAD_TARGETS = {
+    'article.featured_image': UploadTarget(Article, Article, 'featured_image', None),
+    'course.base_image': UploadTarget(CourseInfo, CourseInfo, 'base_image', None),
+    'course.images': UploadTarget(CourseInfo, CourseImage, 'image', 'course'),
+    'industrial_tourism.base_image': UploadTarget(IndustrialTourism, IndustrialTourism, 'base_image', None),
+    'industrial_tourism.video': UploadTarget(IndustrialTourism, IndustrialTourism, 'video', None),
+    'industrial_tourism.images': UploadTarget(IndustrialTourism, IndustrialTourismImages, 'image', 'industrial_tourism'),
+}
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class _PartFile(File):
+    """Lets FileSystemStorage move the finished part file into MEDIA_ROOT instead of copying it."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def temp_dir():
+    return getattr(settings, 'CHUNKED_UPLOAD_TEMP_DIR', None) or settings.FILE_UPLOAD_TEMP_DIR or tempfile.gettempdir()
+
+
+def part_path(upload):
+    return os.path.join(temp_dir(), f'{upload.pk}.part')
+
+
+def start_upload(upload):
+    """Reserve the part file for a freshly created session."""
+    os.makedirs(temp_dir(), exist_ok=True)
+    open(part_path(upload), 'xb').close()
+
+
+@contextmanager
+def _locked_part(upload):
+    """
+    The session's part file, open for writing under an exclusive flock. Only
+    one request at a time appends to or completes a session; the others get a
+    409 at once instead of queueing behind a slow client.
+    """
+    try:
+        fh = open(part_path(upload), 'r+b')
+    except FileNotFoundError:
+        raise UploadError('فایل موقت این آپلود وجود ندارد', status=410)
+    with fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError('درخواست دیگری در حال نوشتن این آپلود است', status=409)
+        # closing the file releases the lock
+        yield fh
+
+
+def append_chunk(upload_id, stream, offset, length, checksum_header=None):
+    """
+    Stream one chunk from ``stream`` into the part file at ``offset``.
+
+    The body is written under the part file's flock with no transaction open;
+    the database is only touched to read the offset and to advance it with a
+    conditional UPDATE. Memory use is one READ_BLOCK. Once the last byte is in,
+    completion runs on the background pool (see finish_upload).
+    """
+    algorithm, expected = _parse_checksum(checksum_header)
+    upload = ChunkedUpload.objects.get(pk=upload_id)
+    with _locked_part(upload) as fh:
+        upload.refresh_from_db()
+        if upload.is_complete:
+            raise UploadError('این آپلود قبلاً تکمیل شده است', status=409)
+        if upload.offset == upload.size:
+            raise UploadError('فایل کامل دریافت شده و در حال پردازش است', status=409)
+        if offset != upload.offset:
+            raise UploadError('Upload-Offset با وضعیت فعلی آپلود مطابقت ندارد', status=409)
+        if offset + length > upload.size:
+            raise UploadError('حجم تکه از حجم اعلام‌شده بیشتر است', status=413)
+
+        digest = hashlib.new(algorithm) if algorithm else None
+        received = 0
+        fh.seek(offset)
+        while received < length:
+            block = stream.read(min(READ_BLOCK, length - received))
+            if not block:
+                break
+            fh.write(block)
+            if digest:
+                digest.update(block)
+            received += len(block)
+
+        if digest and digest.digest() != expected:
+            fh.truncate(offset)
+            raise UploadError('چک‌سام تکه با Upload-Checksum مطابقت ندارد', status=460)
+        # a dropped connection keeps what arrived; the client resumes from HEAD
+        fh.truncate(offset + received)
+        fh.flush()
+
+        advanced = ChunkedUpload.objects.filter(pk=upload.pk, offset=offset, completed_at=None).update(
+            offset=offset + received, error=''
+        )
+        if not advanced:
+            raise UploadError('وضعیت آپلود هم‌زمان تغییر کرد', status=409)
+        upload.offset, upload.error = offset + received, ''
+
+    if upload.offset == upload.size:
+        transaction.on_commit(lambda: processing_pool().submit(finish_upload, upload.pk))
+    return upload
+
+
+def processing_workers():
+    return getattr(settings, 'MEDIA_PROCESSING_WORKERS', 2)
+
+
+def processing_pool():
+    """
+    Per-process threads for media work that should not hold up a response:
+    attaching finished uploads, remuxing new videos, admin ZIP imports and
+    Aparat metadata of bulk-added videos. Jobs lost to a restart are picked up
+    by manage.py complete_uploads, ingest_videos and refresh_videocasts; a lost
+    ZIP import has to be uploaded again.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=processing_workers(), thread_name_prefix='media-processing')
+    return _pool
+
+
+def finish_upload(upload_id):
+    """
+    complete_upload off the request thread. Failures are stored in the
+    session's ``error`` for the client to read from HEAD/GET; sessions left
+    behind by a restart are picked up by ``manage.py complete_uploads``.
+    """
+    try:
+        upload = ChunkedUpload.objects.filter(pk=upload_id).first()
+        if upload is not None:
+            complete_upload(upload)
+    except UploadError as e:
+        if e.status != 409:
+            ChunkedUpload.objects.filter(pk=upload_id).update(error=str(e)[:255])
+    except Exception as e:
+        logger.exception('Completing chunked upload %s failed', upload_id)
+        ChunkedUpload.objects.filter(pk=upload_id).update(error=str(e)[:255] or type(e).__name__)
+    finally:
+        connection.close()
+
+
+def complete_upload(upload):
+    """
+    Verify the whole-file checksum and attach the part file to its target model.
+    On a checksum mismatch the received bytes are discarded and the offset goes
+    back to 0, so the client can send the file again.
+    """
+    path = part_path(upload)
+    with _locked_part(upload) as fh:
+        upload.refresh_from_db()
+        if upload.is_complete or upload.offset != upload.size:
+            return upload
+        if upload.checksum:
+            digest = hashlib.sha256()
+            for block in iter(lambda: fh.read(READ_BLOCK), b''):
+                digest.update(block)
+            if digest.hexdigest() != upload.checksum.lower():
+                fh.truncate(0)
+                message = 'SHA-256 فایل نهایی با مقدار اعلام‌شده مطابقت ندارد؛ فایل را از ابتدا ارسال کنید'
+                ChunkedUpload.objects.filter(pk=upload.pk).update(offset=0, error=message)
+                raise UploadError(message, status=460)
+
+        fh.seek(0)
+        with transaction.atomic():
+            obj = attach_to_target(upload.target, upload.object_id, upload.filename, _PartFile(fh))
+
+            upload.result_id = obj.pk
+            upload.completed_at = timezone.now()
+            upload.error = ''
+            upload.save(update_fields=['result_id', 'completed_at', 'error'])
+
+    if os.path.exists(path):
+        os.remove(path)
+    return upload
+
+
+def target_field(target_key):
+    target = UPLOAD_TARGETS[target_key]
+    return target.model._meta.get_field(target.field)
+
+
+def _target_instance(target_key, object_id):
+    """The record the file belongs to; an unsaved gallery row for gallery targets."""
+    target = UPLOAD_TARGETS[target_key]
+    parent = target.parent_model.objects.filter(pk=object_id).first()
+    if parent is None:
+        raise UploadError('رکورد مقصد حذف شده است', status=404)
+    return target.model(**{target.parent_field: parent}) if target.parent_field else parent
+
+
+def _save_target(target_key, obj):
+    """Save ``obj``; a new gallery row goes after the parent's existing ones."""
+    target = UPLOAD_TARGETS[target_key]
+    if not target.parent_field:
+        obj.save()
+        return
+    parent_id = getattr(obj, f'{target.parent_field}_id')
+    with transaction.atomic():
+        # the parent's row lock serialises appends to the same gallery
+        list(target.parent_model.objects.select_for_update().filter(pk=parent_id).values_list('pk'))
+        obj.order = next_position(target.model.objects.filter(**{f'{target.parent_field}_id': parent_id}))
+        obj.save()
+
+
+def attach_to_target(target_key, object_id, filename, content):
+    """Save ``content`` through the target field (resizing images as usual) and return the record."""
+    obj = _target_instance(target_key, object_id)
+    fieldfile = getattr(obj, UPLOAD_TARGETS[target_key].field)
+    try:
+        # the file is stored first, so the row is only locked for the INSERT/UPDATE
+        fieldfile.save(filename, content, save=False)
+    except ValidationError as e:
+        too_large = e.code in ('file_too_large', 'too_many_pixels')
+        raise UploadError(' '.join(e.messages), status=413 if too_large else 400)
+    try:
+        _save_target(target_key, obj)
+    except BaseException:
+        fieldfile.storage.delete(fieldfile.name)
+        raise
+    return obj
+
+
+def attach_stored_name(target_key, object_id, name):
+    """Point the target field at a file that is already in storage, without copying it."""
+    obj = _target_instance(target_key, object_id)
+    setattr(obj, UPLOAD_TARGETS[target_key].field, name)
+    _save_target(target_key, obj)
+    return obj
+
+
+def abort_upload(upload):
+    path = part_path(upload)
+    if os.path.exists(path):
+        os.remove(path)
+    upload.delete()
+
+
+def _parse_checksum(header):
+    """Parse a tus ``Upload-Checksum: <algorithm> <base64 digest>`` header."""
+    if not header:
+        return None, None
+    try:
+        algorithm, encoded = header.split(' ', 1)
+        algorithm = algorithm.lower()
+        if algorithm not in ('sha1', 'sha256', 'md5'):
+            raise ValueError(algorithm)
+        return algorithm, base64.b64decode(encoded.strip(), validate=True)
+    except ValueError:
+        raise UploadError('Upload-Checksum نامعتبر است')
+
+
+def presign_upload(data, user):
+    """
+    Issue a presigned PUT url so the client uploads straight to object storage.
+
+    Images land under ``incoming/`` and are resized into their field on
+    completion; other files (videos) are written to their final path directly.
+    The returned token carries everything completion needs, signed, so no
+    session row is stored.
+    """
+    field = target_field(data['target'])
+    storage = field.storage
+    if not hasattr(storage, 'presigned_url'):
+        raise UploadError('آپلود مستقیم فقط با ذخیره‌ساز S3 در دسترس است؛ از آپلود تکه‌ای استفاده کنید', status=501)
+
+    if isinstance(field, models.ImageField):
+        key = f'incoming/{uuid.uuid4().hex}/{data["filename"]}'
+    else:
+        # sharded upload_to already gives every upload a unique random name
+        key = field.generate_filename(None, data['filename'])
+
+    expires = settings.DIRECT_UPLOAD_EXPIRE
+    token = signing.dumps({
+        'target': data['target'],
+        'object_id': data['object_id'],
+        'filename': data['filename'],
+        'size': data['size'],
+        'key': key,
+        'content_type': data['content_type'],
+        'user': user.pk,
+    }, salt=DIRECT_UPLOAD_SALT)
+    return {
+        'method': 'PUT',
+        'url': storage.presigned_url('PUT', key, expires=expires),
+        'headers': {'Content-Type': data['content_type']},
+        'key': key,
+        'token': token,
+        'expires_in': expires,
+    }
+
+
+def is_video(head, content_type):
+    """Whether ``head``, the first bytes of a file, is a ``content_type`` video."""
+    if content_type in VIDEO_MAGIC:
+        return head.startswith(VIDEO_MAGIC[content_type])
+    if content_type not in FTYP_VIDEO_TYPES or len(head) < 8:
+        return False
+    size = struct.unpack_from('>I', head)[0]
+    try:
+        boxes = parse_boxes(head[:size])
+    except Mp4Error:
+        return False
+    return bool(boxes) and boxes[0][0] == b'ftyp'
+
+
+def complete_direct_upload(token, user):
+    """Validate an object uploaded through a presigned url and attach it to its target."""
+    try:
+        data = signing.loads(token, salt=DIRECT_UPLOAD_SALT, max_age=settings.DIRECT_UPLOAD_EXPIRE * 2)
+    except signing.BadSignature:
+        raise UploadError('توکن آپلود نامعتبر یا منقضی شده است')
+    if data['user'] != user.pk:
+        raise UploadError('این توکن متعلق به کاربر دیگری است', status=403)
+
+    field = target_field(data['target'])
+    storage = field.storage
+    key = data['key']
+    headers = storage.head(key)
+    if headers is None:
+        raise UploadError('فایل هنوز در ذخیره‌ساز آپلود نشده است', status=404)
+    if int(headers['Content-Length']) != data['size']:
+        storage.delete(key)
+        raise UploadError('حجم فایل آپلودشده با حجم اعلام‌شده مطابقت ندارد')
+    # the presigned url does not sign Content-Type, so the client may have changed it
+    if headers.get('Content-Type', '').split(';')[0].strip().lower() != data.get('content_type', '').lower():
+        storage.delete(key)
+        raise UploadError('نوع فایل آپلودشده با نوع اعلام‌شده مطابقت ندارد')
+
+    if not isinstance(field, models.ImageField):
+        if not is_video(storage.read_range(key, 0, VIDEO_PROBE_BYTES), data['content_type'].lower()):
+            storage.delete(key)
+            raise UploadError('فایل آپلودشده یک ویدیوی معتبر نیست')
+        return attach_stored_name(data['target'], data['object_id'], key)
+
+    try:
+        with storage.open(key) as fh, transaction.atomic():
+            obj = attach_to_target(data['target'], data['object_id'], data['filename'], fh)
+    except (OSError, SyntaxError, ValueError):
+        raise UploadError('فایل آپلودشده یک تصویر معتبر نیست')
+    finally:
+        storage.delete(key)
+    return obj
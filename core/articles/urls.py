@@ -10,9 +10,12 @@ from .views import (
     CategoryViewSet,
     CourseImageViewSet,
     CourseInfoViewSet,
+    TeacherViewSet,
     VideoCastViewSet,
     IndustrialTourismViewSet,
-    IndustrialTourismImageViewSet
+    IndustrialTourismImageViewSet,
+    ChunkedUploadViewSet,
+    DirectUploadViewSet
 )
 
 app_name = 'articles'
@@ -22,9 +25,12 @@ router.register('categories', CategoryViewSet, basename='categories')
 router.register('articles', ArticleViewSet, basename='articles')
 router.register('course/images', CourseImageViewSet, basename='course-images')
 router.register('course/info', CourseInfoViewSet, basename='course-info')
+router.register('teachers', TeacherViewSet, basename='teachers')
 router.register('video', VideoCastViewSet, basename='video-cast')
 router.register(r'industrial-tourism', IndustrialTourismViewSet, basename='industrial-tourism')
 router.register(r'industrial-tourism-images', IndustrialTourismImageViewSet, basename='industrial-tourism-images')
+router.register(r'uploads', ChunkedUploadViewSet, basename='chunked-uploads')
+router.register(r'direct-uploads', DirectUploadViewSet, basename='direct-uploads')
 
 urlpatterns = [
     path('', include(router.urls)),
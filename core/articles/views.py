@@ -1,33 +1,68 @@
 # rest files
-from rest_framework import viewsets, status
+from rest_framework import viewsets, status, mixins
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser, IsAuthenticatedOrReadOnly
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
 
+# python files
+import json
+from itertools import chain, groupby
+from operator import attrgetter
+
 # django files
+from django.conf import settings
+from django.db.models import Count, F, Prefetch, Q, Window
+from django.db.models.functions import RowNumber, TruncMonth, TruncWeek
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.shortcuts import get_object_or_404
 
 # your files
+from accounts.authentication import CachedUserAuthentication
+from siteAssets.views import SimilarImagesMixin
 from articles.models import (
     Article,
     Category,
     CourseImage,
     CourseInfo,
+    Teacher,
     VideoCast,
     IndustrialTourism,
-    IndustrialTourismImages
+    IndustrialTourismImages,
+    ChunkedUpload
 )
 from articles.serializers import (
     ArticleSerializer,
     CategorySerializer,
+    CourseCalendarQuerySerializer,
+    CourseCalendarSerializer,
     CourseImageSerializer,
     CourseInfoSerializer,
     CourseInfoWriteSerializer,
+    TeacherSerializer,
     VideoCastSerializer,
+    VideoCastBulkSerializer,
+    ReorderSerializer,
     IndustrialTourismImages,
-    IndustrialTourismImageSerializer, IndustrialTourismSerializer
+    IndustrialTourismImageSerializer, IndustrialTourismSerializer,
+    ChunkedUploadSerializer,
+    DirectUploadSerializer,
+    DirectUploadCompleteSerializer
+)
+from articles.bulk import iter_bulk_import
+from articles.filters import CourseInfoFilter
+from articles.ordering import apply_order
+from articles.pagination import GalleryPagination
+from articles.uploads import (
+    UploadError,
+    start_upload,
+    append_chunk,
+    abort_upload,
+    presign_upload,
+    complete_direct_upload,
 )
 
 
@@ -60,7 +95,91 @@ class ArticleViewSet(viewsets.ModelViewSet):
         return [IsAdminUser()]
 
 
-class CourseImageViewSet(viewsets.ModelViewSet):
+def bulk_images_response(request, target_key, parent):
+    """
+    آپلود گروهی تصاویر گالری از یک فایل ZIP (فیلد archive).
+    Streams NDJSON progress lines; the last line carries the created ids and per-file errors.
+    """
+    archive = request.FILES.get('archive')
+    if archive is None:
+        return Response({'archive': ['فایل ZIP ارسال نشده است']}, status=status.HTTP_400_BAD_REQUEST)
+    events = iter_bulk_import(archive, target_key, parent)
+    try:
+        # archive problems surface before the first event, while a status code can still be set
+        first = next(events)
+    except UploadError as e:
+        return Response({'detail': str(e)}, status=e.status)
+    return StreamingHttpResponse(
+        (json.dumps(event, ensure_ascii=False) + '\n' for event in chain([first], events)),
+        content_type='application/x-ndjson',
+    )
+
+
+def with_gallery(queryset, image_model, limit=None, related_name='images'):
+    """
+    Annotate ``images_count`` and prefetch the gallery of every parent. With
+    ``limit`` only the first images of each gallery are fetched, in one
+    ROW_NUMBER() window query, so a list page costs page size x limit rows.
+    """
+    ordering = image_model._meta.ordering or ['pk']
+    images = image_model.objects.order_by(*ordering)
+    if limit is not None:
+        parent = queryset.model._meta.get_field(related_name).field.attname
+        images = images.annotate(
+            gallery_position=Window(RowNumber(), partition_by=F(parent), order_by=ordering)
+        ).filter(gallery_position__lte=limit)
+    return queryset.annotate(images_count=Count(related_name, distinct=True)).prefetch_related(
+        Prefetch(related_name, queryset=images)
+    )
+
+
+def gallery_preview_size():
+    return getattr(settings, 'GALLERY_PREVIEW_IMAGES', 6)
+
+
+def gallery_page(view, request, images, serializer_class):
+    """One page of a gallery, as a paginated response."""
+    paginator = GalleryPagination()
+    page = paginator.paginate_queryset(images, request, view=view)
+    serializer = serializer_class(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
+
+
+def reorder_response(request, queryset, start=0):
+    """
+    تغییر ترتیب با یک درخواست: {"ids": [...]} شامل همه‌ی موارد به ترتیب جدید.
+    Applied with a single UPDATE; only rows whose position changed are written.
+    """
+    serializer = ReorderSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    moved = apply_order(queryset, serializer.validated_data['ids'], start=start)
+    return Response({'moved': moved}, status=status.HTTP_200_OK)
+
+
+class TeacherViewSet(viewsets.ModelViewSet):
+    queryset = Teacher.objects.all()
+    serializer_class = TeacherSerializer
+
+    @action(detail=True, methods=['GET'])
+    def courses(self, request, pk=None):
+        """دوره‌های یک استاد، مستقیماً از جدول واسط دوره/استاد"""
+        teacher = self.get_object()
+        courses = with_gallery(
+            CourseInfo.objects.filter(teachers=teacher).prefetch_related('teachers'),
+            CourseImage, gallery_preview_size(),
+        )
+        if not request.user.is_staff:
+            courses = courses.filter(is_published=True)
+        serializer = CourseInfoSerializer(courses, many=True, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def get_permissions(self):
+        if self.action in ['list', 'retrieve', 'courses']:
+            return [AllowAny()]
+        return [IsAdminUser()]
+
+
+class CourseImageViewSet(SimilarImagesMixin, viewsets.ModelViewSet):
     queryset = CourseImage.objects.all()
     serializer_class = CourseImageSerializer
 
@@ -71,7 +190,23 @@ class CourseImageViewSet(viewsets.ModelViewSet):
 
 
 class CourseInfoViewSet(viewsets.ModelViewSet):
-    queryset = CourseInfo.objects.all()
+    """
+    دوره‌های آموزشی
+    - فیلتر قیمت: ?min_price=&max_price=&is_free=&has_discount=
+    - مرتب‌سازی: ?ordering=final_price یا -final_price (همچنین start_date و created_at)
+    """
+    queryset = CourseInfo.objects.prefetch_related('teachers')
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
+    filterset_class = CourseInfoFilter
+    ordering_fields = ('final_price', 'price', 'start_date', 'created_at')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return with_gallery(queryset, CourseImage, gallery_preview_size())
+        if self.action == 'retrieve':
+            return with_gallery(queryset, CourseImage)
+        return queryset
 
     def get_serializer_class(self):
         if self.action in ['list', 'retrieve']:
@@ -85,8 +220,62 @@ class CourseInfoViewSet(viewsets.ModelViewSet):
         serializer = CourseImageSerializer(images, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['GET'])
+    def images(self, request, pk=None):
+        """گالری کامل دوره به صورت صفحه‌بندی‌شده (?page=&page_size=)"""
+        course = get_object_or_404(CourseInfo.objects.only('pk'), pk=pk)
+        return gallery_page(self, request, CourseImage.objects.filter(course=course), CourseImageSerializer)
+
+    @action(detail=True, methods=['POST'], url_path='images/reorder')
+    def reorder_images(self, request, pk=None):
+        course = get_object_or_404(CourseInfo.objects.only('pk'), pk=pk)
+        return reorder_response(request, CourseImage.objects.filter(course=course))
+
+    @action(detail=True, methods=['POST'], url_path='images/bulk')
+    def bulk_images(self, request, pk=None):
+        return bulk_images_response(request, 'course.images', self.get_object())
+
+    @action(detail=False, methods=['GET'])
+    def calendar(self, request):
+        """
+        تقویم دوره‌های منتشرشده، گروه‌بندی‌شده بر اساس هفته یا ماه شروع
+        ?status=upcoming|ongoing|ended&from=YYYY-MM-DD&to=YYYY-MM-DD&group=week|month
+        """
+        params = CourseCalendarQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        def ends_after(day):
+            # a course without an end date runs on its start date only
+            return Q(end_date__gte=day) | Q(end_date__isnull=True, start_date__gte=day)
+
+        today = timezone.localdate()
+        courses = CourseInfo.objects.filter(is_published=True, start_date__isnull=False)
+        if params.get('status') == 'upcoming':
+            courses = courses.filter(start_date__gt=today)
+        elif params.get('status') == 'ongoing':
+            courses = courses.filter(ends_after(today), start_date__lte=today)
+        elif params.get('status') == 'ended':
+            courses = courses.exclude(ends_after(today))
+        if params.get('from'):
+            courses = courses.filter(ends_after(params['from']))
+        if params.get('to'):
+            courses = courses.filter(start_date__lte=params['to'])
+
+        trunc = TruncWeek if params['group'] == 'week' else TruncMonth
+        courses = (
+            courses.only(*CourseCalendarSerializer.Meta.fields)
+            .annotate(period=trunc('start_date'))
+            .order_by('start_date', 'id')
+        )
+        groups = [
+            {'period': period, 'courses': CourseCalendarSerializer(items, many=True, context={'request': request}).data}
+            for period, items in groupby(courses, key=attrgetter('period'))
+        ]
+        return Response(groups, status=status.HTTP_200_OK)
+
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'calendar', 'images']:
             return [AllowAny()]
         return [IsAdminUser()]
 
@@ -145,6 +334,27 @@ class VideoCastViewSet(viewsets.ModelViewSet):
         }
         return Response(data)
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def bulk(self, request):
+        """
+        افزودن گروهی ویدیوها از فهرست لینک‌های آپارات
+        - ورودی: {"urls": [...], "fetch_metadata": false}
+        - خروجی: وضعیت هر لینک (created, exists, duplicate, invalid)
+        fetch_metadata queues the Aparat fetch in the background; the response does not wait for it.
+        """
+        serializer = VideoCastBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        created = any(result['status'] == 'created' for result in results)
+        return Response(results, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def reorder(self, request):
+        """
+        ذخیره‌ی ترتیب جدید ویدیوها (مثلاً پس از drag-and-drop) با یک درخواست
+        """
+        return reorder_response(request, VideoCast.objects.all(), start=1)
+
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """
@@ -163,16 +373,42 @@ class IndustrialTourismViewSet(viewsets.ModelViewSet):
     ویوست برای مدیریت گردشگری صنعتی
     شامل: لیست، جزئیات، ایجاد، ویرایش و حذف
     """
-    queryset = IndustrialTourism.objects.all().prefetch_related("images")
+    queryset = IndustrialTourism.objects.all()
     serializer_class = IndustrialTourismSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return with_gallery(queryset, IndustrialTourismImages, gallery_preview_size())
+        if self.action == 'retrieve':
+            return with_gallery(queryset, IndustrialTourismImages)
+        return queryset
+
+    @action(detail=True, methods=['GET'])
+    def images(self, request, pk=None):
+        """گالری کامل به صورت صفحه‌بندی‌شده (?page=&page_size=)"""
+        tour = get_object_or_404(IndustrialTourism.objects.only('pk'), pk=pk)
+        images = IndustrialTourismImages.objects.filter(industrial_tourism=tour).order_by(
+            *(IndustrialTourismImages._meta.ordering or ['pk'])
+        )
+        return gallery_page(self, request, images, IndustrialTourismImageSerializer)
+
+    @action(detail=True, methods=['POST'], url_path='images/reorder')
+    def reorder_images(self, request, pk=None):
+        tour = get_object_or_404(IndustrialTourism.objects.only('pk'), pk=pk)
+        return reorder_response(request, IndustrialTourismImages.objects.filter(industrial_tourism=tour))
+
+    @action(detail=True, methods=['POST'], url_path='images/bulk')
+    def bulk_images(self, request, pk=None):
+        return bulk_images_response(request, 'industrial_tourism.images', self.get_object())
+
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'articles']:
+        if self.action in ['list', 'retrieve', 'articles', 'images']:
             return [AllowAny()]
         return [IsAdminUser()]
 
 
-class IndustrialTourismImageViewSet(viewsets.ModelViewSet):
+class IndustrialTourismImageViewSet(SimilarImagesMixin, viewsets.ModelViewSet):
     """
     ویوست برای مدیریت تصاویر گردشگری صنعتی
     """
@@ -185,12 +421,97 @@ class IndustrialTourismImageViewSet(viewsets.ModelViewSet):
         return [IsAdminUser()]
 
 
+class ChunkedUploadViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    آپلود تکه‌ای و قابل ادامه (مشابه پروتکل tus) برای فایل‌های حجیم
+    - POST: ساخت جلسه‌ی آپلود (target, object_id, filename, size, checksum)
+    - HEAD/GET: دریافت Upload-Offset فعلی برای ادامه‌ی آپلود قطع‌شده
+    - PATCH: ارسال یک تکه با هدر Upload-Offset و بدنه‌ی خام (application/offset+octet-stream)
+    - DELETE: لغو آپلود و حذف فایل موقت
+    """
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = [IsAdminUser]
+    # uploads are owned by created_by, which needs the real user even on reads
+    authentication_classes = [CachedUserAuthentication]
 
+    def get_queryset(self):
+        return ChunkedUpload.objects.filter(created_by=self.request.user)
 
-
-
-
-
-
-
-
+    def perform_create(self, serializer):
+        upload = serializer.save(created_by=self.request.user)
+        start_upload(upload)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response['Location'] = request.build_absolute_uri(f"{response.data['id']}/")
+        return self._with_offset(response, response.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        response['Cache-Control'] = 'no-store'
+        return self._with_offset(response, response.data)
+
+    def partial_update(self, request, *args, **kwargs):
+        upload = self.get_object()
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers.get('Content-Length') or 0)
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': 'هدر Upload-Offset الزامی است'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # بدنه مستقیماً از استریم خوانده می‌شود؛ request.data هرگز فراخوانی نمی‌شود
+        try:
+            upload = append_chunk(
+                upload.pk, request._request, offset, length,
+                request.headers.get('Upload-Checksum')
+            )
+        except UploadError as e:
+            return Response({'detail': str(e)}, status=e.status)
+
+        serializer = self.get_serializer(upload)
+        return self._with_offset(Response(serializer.data), serializer.data)
+
+    def perform_destroy(self, instance):
+        abort_upload(instance)
+
+    @staticmethod
+    def _with_offset(response, data):
+        response['Upload-Offset'] = str(data['offset'])
+        response['Upload-Length'] = str(data['size'])
+        return response
+
+
+class DirectUploadViewSet(viewsets.ViewSet):
+    """
+    آپلود مستقیم به ذخیره‌ساز S3 بدون عبور فایل از سرور اپلیکیشن
+    - presign: دریافت لینک PUT امضاشده
+    - complete: اعتبارسنجی فایل آپلودشده و اتصال آن به رکورد مقصد
+    """
+    permission_classes = [IsAdminUser]
+    authentication_classes = [CachedUserAuthentication]
+
+    @action(detail=False, methods=['post'])
+    def presign(self, request):
+        serializer = DirectUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            data = presign_upload(serializer.validated_data, request.user)
+        except UploadError as e:
+            return Response({'detail': str(e)}, status=e.status)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def complete(self, request):
+        serializer = DirectUploadCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            obj = complete_direct_upload(serializer.validated_data['token'], request.user)
+        except UploadError as e:
+            return Response({'detail': str(e)}, status=e.status)
+        return Response({'result_id': obj.pk}, status=status.HTTP_200_OK)
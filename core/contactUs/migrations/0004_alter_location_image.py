@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:20
+
+import siteAssets.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contactUs', '0003_alter_communicationwithus_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='location',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='location/images', validators=[siteAssets.validators.validate_image_upload], verbose_name='تصویر'),
+        ),
+    ]
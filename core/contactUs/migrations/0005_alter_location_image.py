@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:21
+
+import siteAssets.media
+import siteAssets.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contactUs', '0004_alter_location_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='location',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to=siteAssets.media.ShardedUploadTo('location/images'), validators=[siteAssets.validators.validate_image_upload], verbose_name='تصویر'),
+        ),
+    ]
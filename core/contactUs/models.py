@@ -2,12 +2,18 @@
 from django.db import models
 from django.core.validators import RegexValidator
 
-# package files
-from PIL import Image
+# your files
+from siteAssets.imaging import rewrite_stored_image
+from siteAssets.media import ShardedUploadTo
+from siteAssets.tracking import FieldTrackingMixin
+from siteAssets.validators import validate_image_upload
 
-class Location(models.Model):
+class Location(FieldTrackingMixin, models.Model):
     name = models.CharField(max_length=50, verbose_name='نام')
-    image = models.ImageField(upload_to='location/images', blank=True, null=True, verbose_name='تصویر')
+    image = models.ImageField(
+        upload_to=ShardedUploadTo('location/images'), blank=True, null=True, verbose_name='تصویر',
+        validators=[validate_image_upload]
+    )
     description = models.TextField( blank=True, null=True, verbose_name='توضیحات')
     latitude = models.DecimalField(max_digits=9, decimal_places=6, verbose_name="Latitude")
     longitude = models.DecimalField(max_digits=9, decimal_places=6, verbose_name="Longitude")
@@ -18,25 +24,15 @@ class Location(models.Model):
         ordering = ['name']
 
     def save(self, *args, **kwargs):
-        if self.pk:
-            orig = Location.objects.filter(pk=self.pk).first()
-            orig_image = orig.image if orig else None
-        else:
-            orig_image = None
-
+        image_changed = self.has_changed('image')
         super().save(*args, **kwargs)
 
-        if self.image and (not orig_image or self.image.name != orig_image.name):
+        if image_changed and self.image:
             self.resize_image()
 
     def resize_image(self):
-        image_path = self.image.path
         try:
-            with Image.open(image_path) as img:
-                target_size = (220, 120)
-                resized_img = img.resize(target_size, Image.LANCZOS)
-                format = img.format or 'JPEG'
-                resized_img.save(image_path, format=format, quality=95)
+            rewrite_stored_image(self.image, (220, 120), exact=True, quality=95)
         except Exception as e:
             print(f"Error resizing image: {e}")
 
@@ -5,6 +5,7 @@ from rest_framework import status, viewsets, generics
 from rest_framework.decorators import action as Action
 from rest_framework.response import Response
 # your files
+from core.throttling import RATE_THROTTLES
 from .models import Location, CommunicationWithUs
 from .serializers import (
     LocationSerializer,
@@ -20,3 +21,11 @@ class LocationViewSet(viewsets.ModelViewSet):
 class CommunicationWithUsViewSet(viewsets.ModelViewSet):
     queryset = CommunicationWithUs.objects.all()
     serializer_class = CommunicationWithUsSerializer
+    throttle_scope = 'contact'
+    throttle_identity = ('email', 'phone')
+
+    def get_throttles(self):
+        # فقط ارسال پیام جدید محدود می‌شود
+        if self.action == 'create':
+            return [throttle() for throttle in RATE_THROTTLES]
+        return super().get_throttles()
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     # package
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'django_filters',
     'mptt',
     'django_ckeditor_5',
@@ -117,6 +118,26 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing; tune the costs with `manage.py calibrate_hashers`.
+# Hashes made with other costs or hashers are upgraded on the user's next login.
+# Move Argon2 to the top to switch to it (needs argon2-cffi).
+PASSWORD_HASHERS = [
+    'accounts.hashers.PBKDF2PasswordHasher',
+    'accounts.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_PBKDF2_ITERATIONS = None  # None keeps Django's default
+PASSWORD_ARGON2 = {}  # e.g. {'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1}
+# Hashes run at once on the whole host, shared by every worker process through
+# flock'ed files in PASSWORD_HASHING_LOCK_DIR (local disk); None = half the cores
+PASSWORD_HASHING_SLOTS = None
+PASSWORD_HASHING_LOCK_DIR = None  # None = <tmp>/password-hash
+PASSWORD_HASHING_WORKERS = None  # hashing threads per process; None = PASSWORD_HASHING_SLOTS
+# Under an ASGI server, serve api/v1/token/ from the async view, which waits on
+# the hashing pool instead of holding the event loop or the sync-view thread
+ASYNC_LOGIN = False
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -142,27 +163,99 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# media storage: MEDIA_STORAGE=s3 puts every File/Image field in an S3-compatible bucket (AWS, MinIO, ...)
+S3_STORAGE = {
+    'BUCKET': os.environ.get('S3_BUCKET', 'javansanat-media'),
+    'ENDPOINT_URL': os.environ.get('S3_ENDPOINT_URL', 'http://localhost:9000'),
+    'ACCESS_KEY': os.environ.get('S3_ACCESS_KEY', ''),
+    'SECRET_KEY': os.environ.get('S3_SECRET_KEY', ''),
+    'REGION': os.environ.get('S3_REGION', 'us-east-1'),
+    'PUBLIC_URL': os.environ.get('S3_PUBLIC_URL'),  # e.g. a CDN in front of a public-read bucket
+    'URL_EXPIRE': 3600,
+}
+STORAGES = {
+    'default': {
+        'BACKEND': 'core.storage.S3Storage' if os.environ.get('MEDIA_STORAGE') == 's3'
+        else 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+DIRECT_UPLOAD_EXPIRE = 15 * 60  # lifetime of presigned PUT urls, seconds
+
+# chunked (resumable) uploads; keep on the same filesystem as MEDIA_ROOT so finished files are moved, not copied
+CHUNKED_UPLOAD_TEMP_DIR = os.path.join(BASE_DIR, 'media_tmp')
+CHUNKED_UPLOAD_MAX_SIZE = 4 * 1024 ** 3  # 4 GB
+# background threads per process for finishing uploads and remuxing videos after the response
+MEDIA_PROCESSING_WORKERS = 2
+BULK_UPLOAD_WORKERS = None  # image render processes per web process, shared by bulk requests; None = the cores
+
+# image upload budgets, checked from the header before any pixel is decoded
+IMAGE_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40_000_000  # ~160 MB once decoded as RGBA
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'MPO', 'PNG', 'WEBP', 'GIF', 'AVIF')
+# encode with the lowest quality that keeps each field's target_ssim; needs numpy
+# (pip install numpy), otherwise the fixed quality is used
+IMAGE_ADAPTIVE_ENCODING = False
+
+# gallery listings embed only the first images of each course/tour; the rest are paged from <id>/images/
+GALLERY_PREVIEW_IMAGES = 6
+
+# Aparat video metadata (manage.py refresh_videocasts); APARAT_CLIENT may point at another client class
+APARAT_API_URL = 'https://www.aparat.com/etc/api'
+APARAT_METADATA_TTL = 24 * 60 * 60  # seconds
+
+# on-the-fly image renditions (/media/img/<w>x<h>/<fit>/<path>)
+IMAGE_RENDITION_CACHE_DIR = os.path.join(BASE_DIR, 'media_cache')
+IMAGE_RENDITION_CACHE_MAX_BYTES = 2 * 1024 ** 3  # LRU-evicted above this size
+IMAGE_RENDITION_QUALITY = 75
+IMAGE_RENDITION_ACCEL_REDIRECT = None  # e.g. '/_renditions/' for an nginx internal location
+IMAGE_RENDITION_VERSION_TTL = 60  # seconds a remote (S3) source's ETag is trusted before another HEAD
+
 # custom user
 AUTH_USER_MODEL = 'accounts.User'
 
 # rest_framework setting
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.TokenClaimsAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
-    ]
+    ],
+    # reverse proxies in front of the app that append to X-Forwarded-For; rate
+    # limits key on the client IP they report (0: use REMOTE_ADDR, ignore the header)
+    'NUM_PROXIES': 0,
 }
 
 # jwt setting
 
 
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=1),  # default 5 min
+    # short: ordinary users' reads trust the token's claims until it expires
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),  # default 5 min
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),  # default 1 day
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.authentication.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.authentication.ClaimsTokenRefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'accounts.authentication.RevokingTokenBlacklistSerializer',
+}
+
+# seconds a user loaded for JWT authentication is reused by this process
+AUTH_USER_CACHE_TTL = 60
+
+# seconds between pulls of newly blacklisted token ids into each process
+TOKEN_REVOCATION_REFRESH = 5
+
+# rate limiting (core.throttling); LocalBackend counts per process, use
+# core.throttling.SQLiteBackend (one host) or RedisBackend (several) to share counts
+RATE_LIMIT_BACKEND = 'core.throttling.LocalBackend'
+RATE_LIMITS = {
+    'login': {'ip': ['20/min', '200/day'], 'identity': ['5/min', '30/hour']},
+    'register': {'ip': ['5/min', '30/day'], 'identity': '3/hour'},
+    'contact': {'ip': ['3/min', '20/day'], 'identity': '5/hour'},
 }
 
 # cors_headers
@@ -0,0 +1,181 @@
+# python files
+import datetime
+import hashlib
+import hmac
+import mimetypes
+import posixpath
+import tempfile
+import xml.etree.ElementTree as ET
+from urllib.parse import quote, urlsplit
+
+# django files
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.utils.deconstruct import deconstructible
+
+# packages
+import requests
+
+S3_NS = '{http://s3.amazonaws.com/doc/2006-03-01/}'
+
+
+def _hmac(key, msg):
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+def _quote(value, safe='-_.~'):
+    return quote(str(value), safe=safe)
+
+
+@deconstructible
+class S3Storage(Storage):
+    """
+    Storage for any S3-compatible object store (AWS S3, MinIO, ArvanCloud, ...).
+
+    Every request, including the server's own, is made through an AWS SigV4
+    presigned URL, so the backend needs nothing beyond ``requests``. Settings
+    come from ``settings.S3_STORAGE``; keyword arguments override them.
+    """
+
+    def __init__(self, **options):
+        conf = {**getattr(settings, 'S3_STORAGE', {}), **{k.upper(): v for k, v in options.items()}}
+        self.bucket = conf['BUCKET']
+        self.endpoint_url = conf['ENDPOINT_URL'].rstrip('/')
+        self.access_key = conf.get('ACCESS_KEY', '')
+        self.secret_key = conf.get('SECRET_KEY', '')
+        self.region = conf.get('REGION') or 'us-east-1'
+        self.location = (conf.get('LOCATION') or '').strip('/')
+        self.public_url = (conf.get('PUBLIC_URL') or '').rstrip('/') or None
+        self.url_expire = conf.get('URL_EXPIRE', 3600)
+        self.timeout = conf.get('TIMEOUT', 30)
+        self.session = requests.Session()
+
+    # signing
+
+    def key(self, name):
+        name = posixpath.normpath(name.replace('\\', '/')).lstrip('/')
+        return f'{self.location}/{name}' if self.location else name
+
+    def presigned_url(self, method, name, expires=None, params=None, now=None):
+        """Return a SigV4 query-authenticated URL for ``method`` on object ``name``."""
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        scope = f'{now:%Y%m%d}/{self.region}/s3/aws4_request'
+        host = urlsplit(self.endpoint_url).netloc
+        path = f'/{self.bucket}' + (f"/{_quote(self.key(name), safe='/-_.~')}" if name else '')
+
+        query = {
+            **(params or {}),
+            'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+            'X-Amz-Credential': f'{self.access_key}/{scope}',
+            'X-Amz-Date': amz_date,
+            'X-Amz-Expires': str(expires or self.url_expire),
+            'X-Amz-SignedHeaders': 'host',
+        }
+        canonical_query = '&'.join(
+            f'{_quote(k)}={_quote(v)}' for k, v in sorted(query.items())
+        )
+        canonical_request = '\n'.join([
+            method, path, canonical_query, f'host:{host}\n', 'host', 'UNSIGNED-PAYLOAD'
+        ])
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256', amz_date, scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ])
+        signing_key = _hmac(('AWS4' + self.secret_key).encode(), f'{now:%Y%m%d}')
+        for part in (self.region, 's3', 'aws4_request'):
+            signing_key = _hmac(signing_key, part)
+        signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+        return f'{self.endpoint_url}{path}?{canonical_query}&X-Amz-Signature={signature}'
+
+    def _request(self, method, name, params=None, **kwargs):
+        url = self.presigned_url(method, name, expires=300, params=params)
+        return self.session.request(method, url, timeout=self.timeout, **kwargs)
+
+    # Storage API
+
+    def _save(self, name, content):
+        content_type = getattr(content, 'content_type', None) or mimetypes.guess_type(name)[0]
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        response = self._request(
+            'PUT', name, data=content,
+            headers={'Content-Type': content_type or 'application/octet-stream'},
+        )
+        response.raise_for_status()
+        return name
+
+    def _open(self, name, mode='rb'):
+        response = self._request('GET', name, stream=True)
+        if response.status_code == 404:
+            raise FileNotFoundError(name)
+        response.raise_for_status()
+        spooled = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        for block in response.iter_content(64 * 1024):
+            spooled.write(block)
+        spooled.seek(0)
+        return File(spooled, name=name)
+
+    def read_range(self, name, start, length):
+        """Up to ``length`` bytes of object ``name`` from ``start``, fetched with a Range request."""
+        response = self._request('GET', name, headers={'Range': f'bytes={start}-{start + length - 1}'})
+        if response.status_code == 404:
+            raise FileNotFoundError(name)
+        if response.status_code == 416:
+            return b''
+        response.raise_for_status()
+        # servers that ignore Range send the whole object
+        return response.content[start:start + length] if response.status_code == 200 else response.content
+
+    def head(self, name):
+        """Object metadata headers, or None if the object does not exist."""
+        response = self._request('HEAD', name)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.headers
+
+    def exists(self, name):
+        return self.head(name) is not None
+
+    def delete(self, name):
+        response = self._request('DELETE', name)
+        if response.status_code not in (200, 204, 404):
+            response.raise_for_status()
+
+    def size(self, name):
+        headers = self.head(name)
+        if headers is None:
+            raise FileNotFoundError(name)
+        return int(headers['Content-Length'])
+
+    def get_modified_time(self, name):
+        headers = self.head(name)
+        if headers is None:
+            raise FileNotFoundError(name)
+        return datetime.datetime.strptime(
+            headers['Last-Modified'], '%a, %d %b %Y %H:%M:%S GMT'
+        ).replace(tzinfo=datetime.timezone.utc)
+
+    def url(self, name):
+        if self.public_url:
+            return f'{self.public_url}/{_quote(self.key(name), safe="/-_.~")}'
+        return self.presigned_url('GET', name)
+
+    def listdir(self, path):
+        prefix = self.key(path).rstrip('/') + '/' if path else (f'{self.location}/' if self.location else '')
+        directories, files = [], []
+        params = {'list-type': '2', 'delimiter': '/', 'prefix': prefix}
+        while True:
+            response = self._request('GET', '', params=params)
+            response.raise_for_status()
+            root = ET.fromstring(response.content)
+            for item in root.iter(f'{S3_NS}CommonPrefixes'):
+                directories.append(item.find(f'{S3_NS}Prefix').text[len(prefix):].rstrip('/'))
+            for item in root.iter(f'{S3_NS}Contents'):
+                files.append(item.find(f'{S3_NS}Key').text[len(prefix):])
+            token = root.find(f'{S3_NS}NextContinuationToken')
+            if token is None:
+                return directories, files
+            params['continuation-token'] = token.text
@@ -0,0 +1,272 @@
+# python files
+import hashlib
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+# django files
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+# rest files
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_BACKEND = 'core.throttling.LocalBackend'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+MAX_KEYS = 100_000
+
+_backend = None
+_backend_lock = threading.Lock()
+
+# key -> epoch until which it is known to be over its limit; lets repeated
+# rejections skip the backend (and the network, for shared backends) entirely
+_blocked = {}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """
+    '5/min' -> (5, 60); '100/15m' -> (100, 900). The period is s/m/h/d or any
+    word starting with one (sec, min, hour, day), optionally preceded by a count.
+    """
+    try:
+        count, period = rate.split('/')
+        digits = period.rstrip('abcdefghijklmnopqrstuvwxyz')
+        limit, window = int(count), int(digits or 1) * PERIODS[period[len(digits)]]
+        if limit >= 1 and window >= 1:
+            return limit, window
+    except (AttributeError, ValueError, IndexError, KeyError):
+        pass
+    raise ImproperlyConfigured(f'Invalid rate limit {rate!r}; use e.g. "5/min" or "100/15m"')
+
+
+def decide(limit, window, now, curr, prev):
+    """
+    Sliding window counter: the previous fixed window counts in proportion to
+    how much of it still overlaps the sliding window ending now. Returns
+    ``(allowed, retry_after)`` for one more request on top of ``curr``/``prev``.
+    """
+    elapsed = (now % window) / window
+    if prev * (1 - elapsed) + curr + 1 <= limit:
+        return True, 0
+    if curr + 1 <= limit:
+        # wait for enough of the previous window to slide out
+        return False, ((1 - (limit - 1 - curr) / prev) - elapsed) * window
+    # wait for the next window, where this one becomes the previous
+    return False, (1 - elapsed) * window + max(0, 1 - (limit - 1) / curr) * window
+
+
+class LocalBackend:
+    """In-process windows. Fastest, but every worker process counts on its own."""
+
+    def __init__(self):
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window, now):
+        slot = int(now // window)
+        with self._lock:
+            start, curr, prev = self._windows.get(key, (slot, 0, 0))
+            if start != slot:
+                start, curr, prev = slot, 0, curr if start == slot - 1 else 0
+            allowed, retry_after = decide(limit, window, now, curr, prev)
+            if allowed:
+                if len(self._windows) >= MAX_KEYS:
+                    self._windows.clear()
+                self._windows[key] = (slot, curr + 1, prev)
+            return allowed, retry_after
+
+
+class SQLiteBackend:
+    """
+    Windows in a local SQLite file (RATE_LIMIT_SQLITE_PATH), shared by every
+    worker on the host. Each hit is one short write transaction in WAL mode.
+    """
+
+    def __init__(self, path=None):
+        self.path = str(path or getattr(settings, 'RATE_LIMIT_SQLITE_PATH', None)
+                        or Path(tempfile.gettempdir()) / 'ratelimit.sqlite3')
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        if not hasattr(self._local, 'connection'):
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS windows '
+                '(key TEXT PRIMARY KEY, slot INTEGER, curr INTEGER, prev INTEGER, expires REAL)'
+            )
+            self._local.connection = connection
+        return self._local.connection
+
+    def hit(self, key, limit, window, now):
+        slot = int(now // window)
+        connection = self.connection
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+        except sqlite3.OperationalError:
+            # store locked for over a second: let the request through rather than fail it
+            return True, 0
+        try:
+            row = connection.execute('SELECT slot, curr, prev FROM windows WHERE key = ?', (key,)).fetchone()
+            start, curr, prev = row or (slot, 0, 0)
+            if start != slot:
+                curr, prev = 0, curr if start == slot - 1 else 0
+            allowed, retry_after = decide(limit, window, now, curr, prev)
+            if allowed:
+                connection.execute(
+                    'INSERT OR REPLACE INTO windows VALUES (?, ?, ?, ?, ?)',
+                    (key, slot, curr + 1, prev, (slot + 2) * window)
+                )
+            if random.random() < 0.001:
+                connection.execute('DELETE FROM windows WHERE expires < ?', (now,))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return allowed, retry_after
+
+
+class RedisBackend:
+    """
+    Windows in Redis (RATE_LIMIT_REDIS_URL), shared by every worker and host.
+    One round trip per hit: a Lua script reads both windows and increments the
+    current one only if the request is allowed. Needs the redis package.
+    """
+    SCRIPT = """
+    local curr = tonumber(redis.call('GET', KEYS[1]) or '0')
+    local prev = tonumber(redis.call('GET', KEYS[2]) or '0')
+    if prev * tonumber(ARGV[2]) + curr + 1 > tonumber(ARGV[1]) then
+        return {0, curr, prev}
+    end
+    redis.call('INCR', KEYS[1])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return {1, curr, prev}
+    """
+
+    def __init__(self, url=None):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('RedisBackend needs the redis package (pip install redis)')
+        self.client = redis.Redis.from_url(url or getattr(settings, 'RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0'))
+        self.script = self.client.register_script(self.SCRIPT)
+
+    def hit(self, key, limit, window, now):
+        slot = int(now // window)
+        weight = 1 - (now % window) / window
+        allowed, curr, prev = self.script(
+            keys=[f'{key}:{slot}', f'{key}:{slot - 1}'], args=[limit, weight, window * 2]
+        )
+        if allowed:
+            return True, 0
+        return decide(limit, window, now, curr, prev)
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(getattr(settings, 'RATE_LIMIT_BACKEND', DEFAULT_BACKEND))()
+    return _backend
+
+
+def rate_limits(scope, kind):
+    """Rates for ``scope``/``kind`` from RATE_LIMITS, as a list of (limit, window)."""
+    rates = getattr(settings, 'RATE_LIMITS', {}).get(scope, {}).get(kind) or []
+    if isinstance(rates, str):
+        rates = [rates]
+    return [parse_rate(rate) for rate in rates]
+
+
+def check(key, rates, now=None):
+    """
+    Count one request against every ``(limit, window)`` in ``rates`` for ``key``.
+    Returns ``(allowed, retry_after)``.
+    """
+    now = now or time.time()
+    blocked_until = _blocked.get(key)
+    if blocked_until is not None:
+        if blocked_until > now:
+            return False, blocked_until - now
+        _blocked.pop(key, None)
+
+    backend = get_backend()
+    for limit, window in rates:
+        allowed, retry_after = backend.hit(f'{key}:{window}', limit, window, now)
+        if not allowed:
+            if len(_blocked) >= MAX_KEYS:
+                _blocked.clear()
+            _blocked[key] = now + retry_after
+            return False, retry_after
+    return True, 0
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    محدودیت نرخ درخواست با پنجره‌ی لغزان.
+    The view names its limits with ``throttle_scope``; RATE_LIMITS[scope][kind]
+    holds one rate or a list of them, e.g. {'login': {'ip': ['10/min', '100/day']}}.
+    A scope or kind without rates is not limited.
+    """
+    kind = None
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        rates = rate_limits(scope, self.kind) if scope else []
+        if not rates:
+            return True
+        identity = self.get_identity(request, view)
+        if identity is None:
+            return True
+        allowed, self.retry_after = check(f'rl:{scope}:{self.kind}:{identity}', rates)
+        return allowed
+
+    def get_identity(self, request, view):
+        raise NotImplementedError
+
+    def wait(self):
+        return self.retry_after
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """
+    Per client IP. X-Forwarded-For is client-controlled, so it is only read when
+    REST_FRAMEWORK['NUM_PROXIES'] says how many trusted proxies appended to it;
+    otherwise the socket address (REMOTE_ADDR) is the identity.
+    """
+    kind = 'ip'
+
+    def get_identity(self, request, view):
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get('REMOTE_ADDR')
+        return self.get_ident(request)
+
+
+class IdentityRateThrottle(SlidingWindowThrottle):
+    """
+    Per account the request targets: the first of the view's ``throttle_identity``
+    fields present in the body (username, email, ...), so spreading attempts over
+    many IPs does not help against one account.
+    """
+    kind = 'identity'
+
+    def get_identity(self, request, view):
+        for field in getattr(view, 'throttle_identity', ()):
+            value = request.data.get(field) if hasattr(request.data, 'get') else None
+            if isinstance(value, str) and value.strip():
+                # keys never carry the address or username itself
+                return hashlib.sha256(f'{field}:{value.strip().lower()}'.encode()).hexdigest()[:32]
+        return None
+
+
+RATE_THROTTLES = [IPRateThrottle, IdentityRateThrottle]
@@ -21,9 +21,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+# your files
+from accounts.views import TokenObtainView, token_obtain
+from siteAssets.views import image_rendition
+
 # rest files
 from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
+    TokenBlacklistView,
     TokenRefreshView,
 )
 
@@ -34,9 +38,16 @@ urlpatterns = [
     path('api/v1/siteAssets/', include('siteAssets.urls', namespace='siteAssets')),
     path('api/v1/contactUs/', include('contactUs.urls', namespace='contactUs')),
 
-    path('api/v1/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path(
+        'api/v1/token/', token_obtain if getattr(settings, 'ASYNC_LOGIN', False) else TokenObtainView.as_view(),
+        name='token_obtain_pair'
+    ),
     path('api/v1/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/v1/token/blacklist/', TokenBlacklistView.as_view(), name='token_blacklist'),
     path('ckeditor5/', include('django_ckeditor_5.urls')),
+
+    # must come before the DEBUG static() media pattern below
+    path('media/img/<int:width>x<int:height>/<str:fit>/<path:name>', image_rendition, name='image-rendition'),
 ]
 
 if settings.DEBUG:
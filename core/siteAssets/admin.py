@@ -1,11 +1,49 @@
-from django.contrib import admin
-from django.utils.html import format_html
+from django.contrib import admin, messages
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
 from django.utils.safestring import mark_safe
 from .models import HomeImage
+from .phash import find_similar
+
+
+class SimilarImagesAdminMixin:
+    """نمایش و هشدار تصاویر تکراری (هش ادراکی) در ادمین گالری‌ها"""
+
+    @admin.display(description='تصاویر مشابه')
+    def similar_images(self, obj):
+        matches = find_similar(obj)[:12] if obj and obj.pk else []
+        if not matches:
+            return 'تصویر مشابهی پیدا نشد'
+        return format_html_join(
+            '',
+            '<a href="{}" style="display: inline-block; margin: 4px; text-align: center;">'
+            '<img src="{}" width="80" height="60" style="object-fit: cover; border-radius: 4px;" /><br>'
+            '<small>{} - فاصله {}</small></a>',
+            (
+                (
+                    reverse(f'admin:{m.obj._meta.app_label}_{m.obj._meta.model_name}_change', args=[m.obj.pk]),
+                    getattr(m.obj, m.obj.phash_source).url,
+                    m.obj._meta.verbose_name,
+                    m.distance,
+                )
+                for m in matches
+            )
+        )
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if obj.phash_source in form.changed_data:
+            matches = find_similar(obj)
+            if matches:
+                self.message_user(
+                    request,
+                    f'این تصویر به {len(matches)} تصویر موجود شباهت دارد؛ بخش «تصاویر مشابه» را بررسی کنید.',
+                    messages.WARNING
+                )
 
 
 @admin.register(HomeImage)
-class HomeImageAdmin(admin.ModelAdmin):
+class HomeImageAdmin(SimilarImagesAdminMixin, admin.ModelAdmin):
     # تنظیمات نمایش لیست
     list_display = ('image_thumbnail', 'name', 'created_at', 'description_excerpt', 'image_info', 'show')
     list_display_links = ('image_thumbnail', 'name')
@@ -24,12 +62,12 @@ class HomeImageAdmin(admin.ModelAdmin):
             'classes': ('collapse',),
         }),
         ('اطلاعات سیستمی', {
-            'fields': ('created_at', 'image_info'),
+            'fields': ('created_at', 'image_info', 'similar_images'),
             'classes': ('collapse',),
             'description': 'اطلاعات فنی و سیستمی مربوط به تصویر'
         }),
     )
-    readonly_fields = ('created_at', 'image_info', 'current_image')
+    readonly_fields = ('created_at', 'image_info', 'current_image', 'similar_images')
 
     # تنظیمات اضافی
     date_hierarchy = 'created_at'
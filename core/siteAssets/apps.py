@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class SiteassetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'siteAssets'
+
+    def ready(self):
+        from django.conf import settings
+        from PIL import Image
+
+        # anything that decodes an image (uploads, renditions, hashing) refuses
+        # bombs outright: Pillow warns above this and raises above twice this
+        Image.MAX_IMAGE_PIXELS = getattr(settings, 'IMAGE_UPLOAD_MAX_PIXELS', Image.MAX_IMAGE_PIXELS)
+
+        from . import checks  # noqa: F401
@@ -0,0 +1,38 @@
+# django files
+from django.apps import apps
+from django.core import checks
+
+
+@checks.register()
+def check_numpy(app_configs=None, **kwargs):
+    """
+    IMAGE_ADAPTIVE_ENCODING needs numpy. Without it uploads fall back to each
+    field's fixed quality, which is safe but worth a warning.
+    """
+    # imported here: imaging and fields pull in django_resized, which reads settings
+    from .fields import ResizedImageField
+    from .imaging import adaptive_encoding_enabled
+
+    if not adaptive_encoding_enabled():
+        return []
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        return []
+
+    adaptive = [
+        f'{model._meta.label}.{field.name}'
+        for model in apps.get_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, ResizedImageField) and field.target_ssim is not None
+    ]
+    if not adaptive:
+        return []
+    return [checks.Warning(
+        f'IMAGE_ADAPTIVE_ENCODING is on but numpy is not installed; {", ".join(adaptive)} '
+        f'use their fixed quality instead of target_ssim.',
+        hint='pip install numpy, or set IMAGE_ADAPTIVE_ENCODING = False.',
+        id='siteAssets.W001',
+    )]
@@ -0,0 +1,51 @@
+# django files
+from django.core.files.base import ContentFile
+
+# packages
+from PIL import Image
+from django_resized import forms as resized
+
+# your files
+from .imaging import encode_image, field_encoding_options, render_image
+from .validators import check_image_upload, validate_image_upload
+
+
+class ResizedImageFieldFile(resized.ResizedImageFieldFile):
+    """
+    Same output as django_resized, but the upload is checked against the image
+    budget from its header first, and large JPEGs are decoded at reduced scale.
+    """
+
+    def save(self, name, content, save=True):
+        # covers uploads that never pass through a form (chunked, direct, bulk)
+        check_image_upload(content)
+        content.seek(0)
+        with Image.open(content) as img:
+            source_format, info = img.format, dict(img.info)
+            options = field_encoding_options(self.field)
+            data, fmt = encode_image(render_image(img, options), options, source_format, info)
+        name = self.get_name(name, fmt)
+        super(resized.ResizedImageFieldFile, self).save(name, ContentFile(data), save)
+
+
+class ResizedImageField(resized.ResizedImageField):
+    """
+    django_resized's field with upload budgets; drop-in for ``django_resized.ResizedImageField``.
+
+    ``target_ssim`` switches the encoder from the fixed ``quality`` to the lowest
+    quality whose output keeps that structural similarity to the resized image
+    (see ``imaging.encode_adaptive``), once IMAGE_ADAPTIVE_ENCODING is on and
+    numpy is installed. ``quality`` stays the fallback.
+    """
+    attr_class = ResizedImageFieldFile
+    default_validators = [validate_image_upload]
+
+    def __init__(self, verbose_name=None, name=None, target_ssim=None, **kwargs):
+        self.target_ssim = target_ssim
+        super().__init__(verbose_name, name, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.target_ssim is not None:
+            kwargs['target_ssim'] = self.target_ssim
+        return name, path, args, kwargs
@@ -0,0 +1,207 @@
+# python files
+import os
+import tempfile
+from io import BytesIO
+
+# django files
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+# packages
+from PIL import Image, ImageOps
+from django_resized.forms import normalize_rotation, convert_mode_for_format
+
+# formats whose encoder takes a lossy quality setting
+ADAPTIVE_FORMATS = ('WEBP', 'JPEG', 'AVIF')
+# candidate qualities; 13 steps means at most 4 trial encodes per image
+ADAPTIVE_QUALITIES = tuple(range(35, 96, 5))
+# long side of the frames SSIM is measured on
+SSIM_FRAME = 512
+
+
+def field_encoding_options(field):
+    """
+    Picklable snapshot of a ResizedImageField's settings, so worker processes
+    can reproduce exactly what django_resized does on upload.
+    """
+    return {
+        'size': list(field.size) if field.size is not None else None,
+        'scale': field.scale,
+        'crop': field.crop,
+        'quality': field.quality,
+        'keep_meta': field.keep_meta,
+        'force_format': field.force_format,
+        'target_ssim': getattr(field, 'target_ssim', None) if adaptive_encoding_enabled() else None,
+    }
+
+
+def adaptive_encoding_enabled():
+    """IMAGE_ADAPTIVE_ENCODING: fields' ``target_ssim`` is only used when this is on (it needs numpy)."""
+    return getattr(settings, 'IMAGE_ADAPTIVE_ENCODING', False)
+
+
+def draft_for_size(img, size):
+    """
+    Ask libjpeg to decode a large JPEG at 1/2, 1/4 or 1/8 scale when only
+    ``size`` is needed. Keeps 2x headroom, like Image.thumbnail's reducing_gap,
+    and uses the longer side so EXIF rotation cannot undershoot. Must run
+    before the pixels are loaded; a no-op for other formats.
+    """
+    if img.format in ('JPEG', 'MPO') and size and None not in size:
+        side = 2 * max(size)
+        img.draft(None, (side, side))
+
+
+def render_image(img, options):
+    """Resize/crop ``img`` the same way ResizedImageFieldFile.save does."""
+    draft_for_size(img, options['size'])
+    img = normalize_rotation(img)
+    if options['force_format']:
+        img = convert_mode_for_format(options['force_format'], img)
+
+    size = options['size'] or img.size
+    scale = options['scale']
+    resample = Image.Resampling.LANCZOS
+    if options['crop']:
+        vertical = {'top': 0, 'middle': 0.5, 'bottom': 1}[options['crop'][0]]
+        horizontal = {'left': 0, 'center': 0.5, 'right': 1}[options['crop'][1]]
+        img = ImageOps.fit(img, tuple(size), resample, centering=(vertical, horizontal))
+    elif None in size:
+        if size[0] is None and size[1] is not None:
+            scale = size[1] / img.size[1]
+        elif size[1] is None and size[0] is not None:
+            scale = size[0] / img.size[0]
+    else:
+        img.thumbnail(tuple(size), resample)
+
+    if scale is not None:
+        img = ImageOps.scale(img, scale, resample)
+    return img
+
+
+def encode_image(img, options, source_format=None, info=None):
+    """Encode ``img`` with the field's format/quality. Returns ``(bytes, format)``."""
+    fmt = (options['force_format'] or source_format or img.format or 'JPEG').upper()
+    params = dict(info or {})
+    if not options['keep_meta']:
+        params.pop('exif', None)
+    if options.get('target_ssim') and fmt in ADAPTIVE_FORMATS:
+        data = encode_adaptive(img, fmt, options['target_ssim'], **params)
+        if data is not None:
+            return data, fmt
+    return _encode(img, fmt, options['quality'], **params), fmt
+
+
+def _encode(img, fmt, quality, **params):
+    buffer = BytesIO()
+    img.save(buffer, format=fmt, quality=quality, **params)
+    return buffer.getvalue()
+
+
+def _luma(img, np):
+    """Grayscale float frame no larger than SSIM_FRAME on its long side."""
+    frame = img.convert('L')
+    if max(frame.size) > SSIM_FRAME:
+        frame = frame.copy()
+        frame.thumbnail((SSIM_FRAME, SSIM_FRAME), Image.Resampling.BOX)
+    return np.asarray(frame, dtype=np.float64)
+
+
+def _box_mean(np, values, window):
+    """Mean over every ``window`` x ``window`` patch, from a summed-area table."""
+    table = np.pad(values.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+    total = table[window:, window:] - table[:-window, window:] - table[window:, :-window] + table[:-window, :-window]
+    return total / (window * window)
+
+
+def ssim(np, a, b, window=8):
+    """Mean structural similarity of two equally sized grayscale frames."""
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_a, mu_b = _box_mean(np, a, window), _box_mean(np, b, window)
+    var_a = _box_mean(np, a * a, window) - mu_a * mu_a
+    var_b = _box_mean(np, b * b, window) - mu_b * mu_b
+    cov = _box_mean(np, a * b, window) - mu_a * mu_b
+    score = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(score.mean())
+
+
+def encode_adaptive(img, fmt, target_ssim, **params):
+    """
+    Lowest of ADAPTIVE_QUALITIES whose decoded result still reaches
+    ``target_ssim`` against ``img``, found by binary search. Flat logos and
+    diagrams settle low, busy photos go above the fixed default.
+    Returns None when numpy is not installed, so callers fall back to the
+    field's fixed quality (the siteAssets.W001 check warns about that).
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+
+    reference = _luma(img, np)
+    if min(reference.shape) < 8:
+        return None
+    low, high = 0, len(ADAPTIVE_QUALITIES) - 1
+    best = None
+    while low <= high:
+        middle = (low + high) // 2
+        data = _encode(img, fmt, ADAPTIVE_QUALITIES[middle], **params)
+        with Image.open(BytesIO(data)) as decoded:
+            score = ssim(np, reference, _luma(decoded, np))
+        if score >= target_ssim:
+            best, high = data, middle - 1
+        else:
+            low = middle + 1
+    return best if best is not None else _encode(img, fmt, ADAPTIVE_QUALITIES[-1], **params)
+
+
+def format_extension(fmt):
+    if fmt == 'PNG':
+        return '.png'
+    extensions = {v: k for k, v in Image.registered_extensions().items()}
+    return extensions.get(fmt, '')
+
+
+def atomic_write(path, data):
+    """Write ``data`` next to ``path`` and rename it into place."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def rewrite_stored_image(fieldfile, size, exact=False, **save_kwargs):
+    """
+    Shrink an already saved image through its storage, so it works the same on
+    the local disk and on S3. ``exact`` forces ``size`` instead of fitting inside
+    it. The result goes to a new name first and the row is pointed at the name
+    the storage returned before the original is deleted, so a failure at any
+    step leaves the row on a file that exists. Returns the new name.
+    """
+    storage, name = fieldfile.storage, fieldfile.name
+    instance, field = fieldfile.instance, fieldfile.field
+    with storage.open(name, 'rb') as fh, Image.open(fh) as img:
+        fmt = save_kwargs.pop('format', None) or img.format or 'JPEG'
+        if exact:
+            img = img.resize(size, Image.Resampling.LANCZOS)
+        else:
+            img.thumbnail(size)
+        buffer = BytesIO()
+        img.save(buffer, format=fmt, **save_kwargs)
+    new_name = storage.save(name, ContentFile(buffer.getvalue()), max_length=field.max_length)
+    type(instance)._default_manager.filter(pk=instance.pk).update(**{field.attname: new_name})
+    fieldfile.name = new_name
+    if hasattr(instance, 'mark_saved'):
+        instance.mark_saved(field.name)
+    if new_name != name:
+        storage.delete(name)
+    return new_name
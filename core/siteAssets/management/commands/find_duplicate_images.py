@@ -0,0 +1,136 @@
+# python files
+import itertools
+
+# django files
+from django.core.management.base import BaseCommand, CommandError
+
+# your files
+from siteAssets.phash import DEFAULT_MAX_DISTANCE, HASH_BITS, fieldfile_phash, hashed_models
+
+# elements per XOR block; 2**23 uint64 values is 64 MB
+BLOCK_ELEMENTS = 2 ** 23
+
+
+def _popcount(np, values):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    return table[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+class Command(BaseCommand):
+    """
+    گروه‌بندی تصاویر تکراری یا بسیار مشابه در همه‌ی گالری‌ها بر اساس هش ادراکی (dHash).
+
+    All hashes are compared pairwise with vectorised XOR + popcount in fixed-size
+    blocks, and pairs under the threshold are merged with union-find.
+    """
+    help = 'Report clusters of near-duplicate gallery images by perceptual hash.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=int, default=DEFAULT_MAX_DISTANCE,
+            help='Maximum hamming distance (bits out of 64) for two images to count as duplicates.'
+        )
+        parser.add_argument(
+            '--backfill', action='store_true',
+            help='Compute missing hashes for existing images before comparing.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows written per bulk_update while backfilling.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+        except ImportError:
+            raise CommandError('find_duplicate_images needs numpy: pip install numpy')
+
+        threshold = options['threshold']
+        if not 0 <= threshold < HASH_BITS:
+            raise CommandError(f'--threshold must be between 0 and {HASH_BITS - 1}')
+
+        models = hashed_models()
+        if options['backfill']:
+            for model in models:
+                self.backfill(model, options['batch_size'])
+
+        # parallel arrays: one entry per hashed image
+        owners, pks, hashes = [], [], []
+        for index, model in enumerate(models):
+            for pk, phash in model._default_manager.filter(phash__isnull=False).values_list('pk', 'phash').iterator():
+                owners.append(index)
+                pks.append(pk)
+                hashes.append(phash)
+        total = len(hashes)
+        if total < 2:
+            self.stdout.write('Nothing to compare.')
+            return
+
+        values = np.array(hashes, dtype=np.int64).view(np.uint64)
+        parent = list(range(total))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        block = max(1, BLOCK_ELEMENTS // total)
+        pairs = 0
+        for start in range(0, total, block):
+            stop = min(start + block, total)
+            # only compare against later images; the lower triangle is the same pairs
+            distances = _popcount(np, values[start:stop, None] ^ values[None, start:])
+            rows, cols = np.nonzero(distances <= threshold)
+            for row, col in zip((rows + start).tolist(), (cols + start).tolist()):
+                if col <= row:
+                    continue
+                pairs += 1
+                a, b = find(row), find(col)
+                if a != b:
+                    parent[b] = a
+
+        clusters = {}
+        for i in range(total):
+            clusters.setdefault(find(i), []).append(i)
+        clusters = sorted((members for members in clusters.values() if len(members) > 1), key=len, reverse=True)
+
+        for number, members in enumerate(clusters, 1):
+            self.stdout.write(f'Cluster {number} ({len(members)} images):')
+            members.sort(key=lambda i: owners[i])
+            for index, group in itertools.groupby(members, key=lambda i: owners[i]):
+                model = models[index]
+                ids = [pks[i] for i in group]
+                for obj in model._default_manager.filter(pk__in=ids).only('pk', model.phash_source):
+                    self.stdout.write(f'  {model._meta.label}#{obj.pk}  {getattr(obj, model.phash_source).name}')
+
+        duplicates = sum(len(members) - 1 for members in clusters)
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} hashed images, {pairs} similar pairs, {len(clusters)} clusters, '
+            f'{duplicates} redundant images at threshold {threshold}.'
+        ))
+
+    def backfill(self, model, batch_size):
+        field = model.phash_source
+        queryset = (
+            model._default_manager.filter(phash__isnull=True)
+            .exclude(**{field: ''}).only('pk', field).order_by('pk')
+        )
+        pending, done, failed = [], 0, 0
+        for obj in queryset.iterator(chunk_size=batch_size):
+            obj.phash = fieldfile_phash(getattr(obj, field))
+            if obj.phash is None:
+                failed += 1
+                continue
+            pending.append(obj)
+            if len(pending) >= batch_size:
+                model._default_manager.bulk_update(pending, ['phash'])
+                done += len(pending)
+                pending = []
+        if pending:
+            model._default_manager.bulk_update(pending, ['phash'])
+            done += len(pending)
+        if done or failed:
+            self.stdout.write(f'{model._meta.label}: hashed {done}, unreadable {failed}')
@@ -0,0 +1,159 @@
+# python files
+import itertools
+import os
+import sqlite3
+import tempfile
+import time
+
+# django files
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# your files
+from siteAssets.media import iter_file_fields, field_upload_root, iter_field_references
+
+
+class Command(BaseCommand):
+    """
+    پیدا کردن (و در صورت نیاز حذف) فایل‌های رسانه‌ای که دیگر در دیتابیس به آن‌ها ارجاعی نیست.
+
+    Both sides are spilled into a temporary SQLite file, so the comparison is a
+    sorted anti-join on disk and memory stays flat no matter how many files exist.
+    """
+    help = 'Report or delete media files that are no longer referenced by any file/image field.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete', action='store_true',
+            help='Actually delete orphaned files (default is a dry run).'
+        )
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help='Ignore files modified within this many hours (uploads still in flight).'
+        )
+        parser.add_argument(
+            '--path', action='append', dest='paths', default=None,
+            help='Directory under MEDIA_ROOT to scan. Defaults to the upload_to dirs of all fields.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Rows fetched per database round trip.'
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        media_root = os.path.abspath(settings.MEDIA_ROOT)
+        chunk_size = options['chunk_size']
+        cutoff = time.time() - options['grace_hours'] * 3600
+
+        fields = list(iter_file_fields())
+        roots = options['paths'] or sorted({
+            root for _, field in fields
+            if (root := field_upload_root(field)) is not None
+        })
+        # nested roots would be walked twice
+        roots = [r for r in roots if not any(r.startswith(o + '/') for o in roots)]
+        for root in roots:
+            if os.path.isabs(root) or '..' in root.split('/'):
+                raise CommandError(f'Path must be relative to MEDIA_ROOT: {root}')
+
+        with tempfile.TemporaryDirectory(prefix='media_gc_') as tmp:
+            db = sqlite3.connect(os.path.join(tmp, 'media_gc.sqlite3'))
+            try:
+                db.execute('PRAGMA journal_mode = OFF')
+                db.execute('PRAGMA synchronous = OFF')
+                db.execute('CREATE TABLE refs (name TEXT PRIMARY KEY) WITHOUT ROWID')
+                db.execute('CREATE TABLE files (name TEXT PRIMARY KEY, size INTEGER) WITHOUT ROWID')
+
+                ref_count = self.collect_references(db, fields, chunk_size)
+                file_count, recent = self.collect_files(db, media_root, roots, cutoff, chunk_size)
+                orphans, orphan_bytes = self.process_orphans(db, media_root, options['delete'])
+            finally:
+                db.close()
+
+        action = 'Deleted' if options['delete'] else 'Found'
+        self.stdout.write(
+            f'Scanned {file_count} files under {len(roots)} dirs against {ref_count} references '
+            f'({recent} skipped inside the grace period).'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {orphans} orphaned files ({orphan_bytes / 1024 / 1024:.1f} MB).'
+        ))
+
+    def collect_references(self, db, fields, chunk_size):
+        count = 0
+        for model, field in fields:
+            names = iter_field_references(model, field, chunk_size)
+            if isinstance(field.default, str) and field.default:
+                names = itertools.chain([field.default], names)
+            for batch in _batched(names, chunk_size):
+                db.executemany('INSERT OR IGNORE INTO refs (name) VALUES (?)', ((n,) for n in batch))
+                count += len(batch)
+        db.commit()
+        return count
+
+    def collect_files(self, db, media_root, roots, cutoff, chunk_size):
+        count = recent = 0
+        batch = []
+        for root in roots:
+            for entry in _walk(os.path.join(media_root, root)):
+                stat = entry.stat(follow_symlinks=False)
+                count += 1
+                if stat.st_mtime > cutoff:
+                    recent += 1
+                    continue
+                name = os.path.relpath(entry.path, media_root).replace(os.sep, '/')
+                batch.append((name, stat.st_size))
+                if len(batch) >= chunk_size:
+                    db.executemany('INSERT OR IGNORE INTO files (name, size) VALUES (?, ?)', batch)
+                    batch.clear()
+        if batch:
+            db.executemany('INSERT OR IGNORE INTO files (name, size) VALUES (?, ?)', batch)
+        db.commit()
+        return count, recent
+
+    def process_orphans(self, db, media_root, delete):
+        orphans = orphan_bytes = 0
+        cursor = db.execute(
+            'SELECT f.name, f.size FROM files f '
+            'LEFT JOIN refs r ON r.name = f.name '
+            'WHERE r.name IS NULL ORDER BY f.name'
+        )
+        for name, size in cursor:
+            orphans += 1
+            orphan_bytes += size
+            if self.verbosity >= 2:
+                self.stdout.write(name)
+            if delete:
+                try:
+                    os.remove(os.path.join(media_root, name))
+                except FileNotFoundError:
+                    pass
+        return orphans, orphan_bytes
+
+
+def _walk(path):
+    """Iterative os.scandir walk yielding regular files; never follows symlinks."""
+    stack = [path]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
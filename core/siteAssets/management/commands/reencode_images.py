@@ -0,0 +1,204 @@
+# python files
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+
+# django files
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, CharField, F, Value, When
+
+# packages
+from PIL import Image
+from django_resized import ResizedImageField
+
+# your files
+from siteAssets.imaging import (
+    field_encoding_options,
+    render_image,
+    encode_image,
+    format_extension,
+)
+from siteAssets.media import referenced_names
+
+
+def _reencode(job):
+    """Runs in a worker process: re-render one image's bytes with the field's current settings."""
+    pk, data, options = job
+    try:
+        with Image.open(BytesIO(data)) as img:
+            img.load()
+            source_format, info = img.format, dict(img.info)
+            encoded, _ = encode_image(render_image(img, options), options, source_format, info)
+        return pk, None, encoded
+    except Exception as e:
+        return pk, f'{type(e).__name__}: {e}', None
+
+
+def _read(storage, name):
+    try:
+        with storage.open(name, 'rb') as fh:
+            return fh.read(), None
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+
+def _write(storage, name, data, max_length):
+    try:
+        return storage.save(name, ContentFile(data), max_length=max_length), None
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+
+class Command(BaseCommand):
+    """
+    بازسازی تصاویر موجود با تنظیمات فعلی ResizedImageField (size / quality / force_format).
+
+    Files are read and written only through the field's storage, so local disk
+    and S3 behave the same; worker processes only see bytes. Every result is
+    saved under a new name (the storage picks it), rows are switched with one
+    conditional UPDATE per batch that leaves rows edited in the meantime alone,
+    and an old file is deleted only once no file field references it. The last
+    pk is checkpointed, so an interrupted run can continue with --resume.
+    """
+    help = 'Re-encode existing images of a ResizedImageField with its current settings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='Model label, e.g. articles.Article')
+        parser.add_argument('field', help='ResizedImageField name, e.g. featured_image')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Worker processes (defaults to the number of cores).'
+        )
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Continue after the last checkpointed primary key.'
+        )
+        parser.add_argument('--start-after', type=int, default=None, help='Skip rows with pk <= this value.')
+        parser.add_argument('--state-file', default=None, help='Checkpoint file path.')
+        parser.add_argument(
+            '--keep-old', action='store_true',
+            help='Leave the replaced files in place (media_gc can remove them later).'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+            field = model._meta.get_field(options['field'])
+        except (LookupError, ValueError, FieldDoesNotExist) as e:
+            raise CommandError(str(e))
+        if not isinstance(field, ResizedImageField):
+            raise CommandError(f'{model._meta.label}.{field.name} is not a ResizedImageField')
+
+        state_file = options['state_file'] or os.path.join(
+            tempfile.gettempdir(), f'reencode_{model._meta.label_lower}.{field.name}.json'
+        )
+        last_pk = options['start_after']
+        if options['resume'] and last_pk is None and os.path.exists(state_file):
+            with open(state_file) as fh:
+                last_pk = json.load(fh)['last_pk']
+            self.stdout.write(f'Resuming after pk={last_pk}')
+
+        encoding = field_encoding_options(field)
+        new_ext = format_extension(encoding['force_format'].upper()) if encoding['force_format'] else None
+        storage = field.storage
+        queryset = (
+            model._default_manager
+            .exclude(**{f'{field.attname}__isnull': True})
+            .exclude(**{field.attname: ''})
+            .order_by('pk')
+        )
+
+        done = failed = saved = 0
+        started = time.monotonic()
+        # storage I/O in threads, encoding in processes; at most 2 images per worker in memory
+        window = max(1, options['workers'] * 2)
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor, \
+                ThreadPoolExecutor(max_workers=window) as io_pool:
+            while True:
+                rows = queryset
+                if last_pk is not None:
+                    rows = rows.filter(pk__gt=last_pk)
+                rows = list(rows.values_list('pk', field.attname)[:options['batch_size']])
+                if not rows:
+                    break
+
+                renames = {}
+                for start in range(0, len(rows), window):
+                    chunk = rows[start:start + window]
+                    sources = {}
+                    for (pk, name), (data, error) in zip(chunk, io_pool.map(lambda row: _read(storage, row[1]), chunk)):
+                        if error:
+                            failed += 1
+                            self.stderr.write(f'pk={pk} {name}: {error}')
+                        else:
+                            sources[pk] = (name, data)
+
+                    jobs = [(pk, data, encoding) for pk, (_, data) in sources.items()]
+                    encoded = []
+                    for pk, error, data in executor.map(_reencode, jobs):
+                        if error:
+                            failed += 1
+                            self.stderr.write(f'pk={pk} {sources[pk][0]}: {error}')
+                            continue
+                        name = sources[pk][0]
+                        target = name.rsplit('.', 1)[0] + new_ext if new_ext and not name.lower().endswith(new_ext) else name
+                        encoded.append((pk, name, target, data))
+
+                    writes = io_pool.map(lambda job: _write(storage, job[2], job[3], field.max_length), encoded)
+                    for (pk, name, _, data), (new_name, error) in zip(encoded, writes):
+                        if error:
+                            failed += 1
+                            self.stderr.write(f'pk={pk} {name}: {error}')
+                            continue
+                        done += 1
+                        saved += len(sources[pk][1]) - len(data)
+                        renames[pk] = (name, new_name)
+
+                if renames:
+                    self.switch(model, field, storage, renames, options['keep_old'])
+
+                last_pk = rows[-1][0]
+                with open(state_file, 'w') as fh:
+                    json.dump({'last_pk': last_pk}, fh)
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'{done} images, {done / elapsed:.1f} img/s, '
+                    f'{saved / 1024 / 1024:.1f} MB saved (last pk={last_pk})'
+                )
+
+        if os.path.exists(state_file):
+            os.remove(state_file)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-encoded {done} images ({failed} failed) in {elapsed:.1f}s '
+            f'({done / elapsed if elapsed else 0:.1f} img/s), {saved / 1024 / 1024:.1f} MB saved.'
+        ))
+
+    @staticmethod
+    def switch(model, field, storage, renames, keep_old):
+        """
+        Point rows at their re-encoded files, unless the row changed since it was
+        read, then drop whichever files nothing references any more.
+        """
+        manager, attname = model._default_manager, field.attname
+        with transaction.atomic():
+            manager.filter(pk__in=renames).update(**{attname: Case(
+                *[When(pk=pk, **{attname: old}, then=Value(new)) for pk, (old, new) in renames.items()],
+                default=F(attname),
+                output_field=CharField(),
+            )})
+        candidates = {new for _, new in renames.values()}
+        if not keep_old:
+            candidates |= {old for old, _ in renames.values()}
+        still_used = referenced_names(candidates)
+        for name in candidates - still_used:
+            storage.delete(name)
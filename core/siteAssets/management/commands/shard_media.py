@@ -0,0 +1,163 @@
+# python files
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# django files
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, CharField, F, Value, When
+
+# your files
+from siteAssets.media import ShardedUploadTo, iter_file_fields
+
+
+def _copy(storage, old, new):
+    """
+    Put ``old`` at ``new`` without removing ``old``, so readers following either
+    name keep working until the row is switched. Hard links make this free on
+    a local disk; other storages get a streamed copy.
+    """
+    if storage.exists(new):
+        # left behind by an interrupted run; names are deterministic
+        return
+    if isinstance(storage, FileSystemStorage):
+        new_path = storage.path(new)
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        try:
+            os.link(storage.path(old), new_path)
+            # a link keeps the old file's mtime; without this, media_gc would see
+            # the new name as long unreferenced until the row switch commits
+            os.utime(new_path)
+            return
+        except OSError:
+            # cross-device MEDIA_ROOT or no hard-link support
+            pass
+    with storage.open(old, 'rb') as fh:
+        saved = storage.save(new, fh)
+    if saved != new:
+        raise OSError(f'storage renamed {new} to {saved}')
+
+
+class Command(BaseCommand):
+    """
+    انتقال فایل‌های رسانه‌ای موجود به ساختار پوشه‌بندی‌شده (prefix/ab/cd/<hash>.ext).
+
+    Runs online: each batch copies (hard-links) files to their new names in
+    parallel, switches the rows with one conditional UPDATE that leaves rows
+    edited in the meantime alone, and only then removes the old files.
+    """
+    help = 'Move existing media files of ShardedUploadTo fields into the sharded layout.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--field', action='append', dest='fields', default=None,
+            help='Limit to app_label.Model.field (repeatable). Defaults to every sharded field.'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Parallel copy threads; file copies are I/O bound.'
+        )
+        parser.add_argument(
+            '--keep-old', action='store_true',
+            help='Leave the old files in place (media_gc can remove them later).'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only count the files that would move.')
+
+    def handle(self, *args, **options):
+        targets = [
+            (model, field) for model, field in iter_file_fields()
+            if isinstance(field.upload_to, ShardedUploadTo)
+        ]
+        if options['fields']:
+            wanted = {name.lower() for name in options['fields']}
+            targets = [t for t in targets if f'{t[0]._meta.label_lower}.{t[1].name}' in wanted]
+            if not targets:
+                raise CommandError('No sharded field matches --field')
+
+        started = time.monotonic()
+        total_moved = total_failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for model, field in targets:
+                moved, failed = self.shard_field(model, field, pool, options)
+                total_moved += moved
+                total_failed += failed
+
+        verb = 'would move' if options['dry_run'] else 'moved'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {total_moved} files, {total_failed} failed, in {time.monotonic() - started:.1f}s'
+        ))
+
+    def shard_field(self, model, field, pool, options):
+        manager = model._default_manager
+        upload_to, storage, attname = field.upload_to, field.storage, field.attname
+        default = field.default if isinstance(field.default, str) else None
+        label = f'{model._meta.label}.{field.name}'
+        moved = failed = 0
+        last_pk = None
+
+        while True:
+            queryset = manager.exclude(**{f'{attname}__isnull': True}).exclude(**{attname: ''}).order_by('pk')
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+            rows = list(queryset.values_list('pk', attname)[:options['batch_size']])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+
+            # shared defaults (profile_pics/default.png) stay where they are
+            renames = {
+                pk: (old, upload_to.sharded_name(old)) for pk, old in rows
+                if old != default and not upload_to.is_sharded(old)
+            }
+            if options['dry_run']:
+                moved += len(renames)
+                continue
+
+            copies = {old: new for old, new in renames.values()}
+            errors = {}
+            jobs = [(storage, old, new) for old, new in copies.items()]
+            for (_, old, _), error in zip(jobs, pool.map(self._try_copy, jobs)):
+                if error:
+                    errors[old] = error
+                    self.stderr.write(f'{label}: {old}: {error}')
+            failed += sum(1 for old, _ in renames.values() if old in errors)
+            renames = {pk: pair for pk, pair in renames.items() if pair[0] not in errors}
+            if not renames:
+                continue
+
+            with transaction.atomic():
+                manager.filter(pk__in=renames).update(**{attname: Case(
+                    *[When(pk=pk, **{attname: old}, then=Value(new)) for pk, (old, new) in renames.items()],
+                    default=F(attname),
+                    output_field=CharField(),
+                )})
+            current = dict(manager.filter(pk__in=renames).values_list('pk', attname))
+            switched = {pk for pk, (_, new) in renames.items() if current.get(pk) == new}
+            moved += len(switched)
+
+            # remove whichever copy is no longer referenced by this field
+            still_used = set(manager.filter(**{f'{attname}__in': list(copies) + list(copies.values())})
+                             .values_list(attname, flat=True))
+            stale = [new for old, new in copies.items() if old not in errors and new not in still_used]
+            if not options['keep_old']:
+                stale += [old for old in copies if old not in errors and old not in still_used]
+            list(pool.map(storage.delete, stale))
+
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{label}: {moved} moved, up to pk {last_pk}')
+
+        if moved or failed:
+            self.stdout.write(f'{label}: {moved} moved, {failed} failed')
+        return moved, failed
+
+    @staticmethod
+    def _try_copy(job):
+        storage, old, new = job
+        try:
+            _copy(storage, old, new)
+        except Exception as e:
+            return f'{type(e).__name__}: {e}'
+        return None
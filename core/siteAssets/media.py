@@ -0,0 +1,92 @@
+# python files
+import hashlib
+import posixpath
+import re
+import uuid
+
+# django files
+from django.apps import apps
+from django.db import models
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ShardedUploadTo:
+    """
+    ``upload_to`` that spreads files over ``<prefix>/ab/cd/<32 hex><ext>``.
+
+    Two levels of 256 directories keep every directory small (a million files
+    is ~15 per leaf). New uploads get a random name; existing files moved by
+    ``shard_media`` get one derived from their old path, so reruns are idempotent.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix.strip('/')
+        self.pattern = re.compile(
+            re.escape(self.prefix) + r'/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{32}(\.[\w]+)?$'
+        )
+
+    def __call__(self, instance, filename):
+        return self.build(uuid.uuid4().hex, filename)
+
+    def build(self, token, filename):
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(self.prefix, token[:2], token[2:4], token + extension)
+
+    def is_sharded(self, name):
+        return bool(self.pattern.match(name))
+
+    def sharded_name(self, name):
+        """Deterministic sharded location for an existing file ``name``."""
+        return self.build(hashlib.sha1(name.encode()).hexdigest()[:32], name)
+
+
+def iter_file_fields():
+    """Yield ``(model, field)`` for every concrete FileField/ImageField in the project."""
+    for model in apps.get_models():
+        if model._meta.proxy or not model._meta.managed:
+            continue
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field
+
+
+def field_upload_root(field):
+    """
+    Directory (relative to MEDIA_ROOT) that ``field`` writes into.
+    Returns None when it cannot be determined, e.g. a callable upload_to.
+    """
+    upload_to = field.upload_to
+    if callable(upload_to):
+        return getattr(upload_to, 'prefix', None)
+    head = upload_to.split('%', 1)[0]
+    if '%' in upload_to:
+        # strftime placeholders: only the static directory part is stable
+        head = head.rpartition('/')[0]
+    return head.strip('/') or None
+
+
+def iter_field_references(model, field, chunk_size=2000):
+    """Stream the stored file names of ``field`` without loading the queryset into memory."""
+    return (
+        model._default_manager
+        .exclude(**{f'{field.attname}__isnull': True})
+        .exclude(**{field.attname: ''})
+        .values_list(field.attname, flat=True)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def referenced_names(names):
+    """The subset of ``names`` that some file field still stores (field defaults included)."""
+    names = set(names)
+    found = set()
+    if not names:
+        return found
+    for model, field in iter_file_fields():
+        if isinstance(field.default, str) and field.default in names:
+            found.add(field.default)
+        found.update(
+            model._default_manager.filter(**{f'{field.attname}__in': names}).values_list(field.attname, flat=True)
+        )
+    return found
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:20
+
+import siteAssets.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('siteAssets', '0006_homeimage_phash_homeimage_homeimage_phash_0_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='homeimage',
+            name='image',
+            field=siteAssets.fields.ResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=75, scale=None, size=[500, 500], upload_to='article_images/', verbose_name='تصویر اصلی'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:21
+
+import siteAssets.fields
+import siteAssets.media
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('siteAssets', '0007_alter_homeimage_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='homeimage',
+            name='image',
+            field=siteAssets.fields.ResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=75, scale=None, size=[500, 500], upload_to=siteAssets.media.ShardedUploadTo('home_images'), verbose_name='تصویر اصلی'),
+        ),
+    ]
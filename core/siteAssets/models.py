@@ -1,20 +1,31 @@
 # django files
 from django.db import models
-from django_resized import ResizedImageField
 # your packages
+from .fields import ResizedImageField
+from .media import ShardedUploadTo
+from .phash import PerceptualHashMixin, phash_indexes
 
 
-class HomeImage(models.Model):
+class HomeImage(PerceptualHashMixin, models.Model):
     name = models.CharField(max_length=100, unique=True,verbose_name="نام")
     description = models.TextField(blank=True,verbose_name="توضیحات")
     image = ResizedImageField(
         size=[500, 500],  # سایز خروجی (عرض × ارتفاع)
         quality=75,  # کیفیت (0 تا 100)
-        upload_to='article_images/',  # مسیر ذخیره‌سازی
+        target_ssim=0.985,  # کیفیت تطبیقی: کمترین کیفیتی که این میزان شباهت (SSIM) را حفظ کند
+        upload_to=ShardedUploadTo('home_images'),  # مسیر ذخیره‌سازی
         force_format='WEBP',  # تبدیل فرمت (jpg, png, webp و غیره)
         blank=True, null=True,
         verbose_name="تصویر اصلی"
     )
+
+    phash = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="هش ادراکی",
+        help_text="برای پیدا کردن تصاویر تکراری به صورت خودکار محاسبه می‌شود"
+    )
     show = models.BooleanField(default=False)
 
     created_at = models.DateTimeField(auto_now_add=True,verbose_name="تاریخ ایجاد")
@@ -23,6 +34,7 @@ class HomeImage(models.Model):
         verbose_name = "تصاویر صفحه خانه"
         verbose_name_plural = "تصاویر صفحه خانه"
         ordering = ['created_at']
+        indexes = phash_indexes('homeimage')
 
     def __str__(self):
         return self.name
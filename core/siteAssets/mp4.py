@@ -0,0 +1,246 @@
+# python files
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from collections import namedtuple
+
+# django files
+from django.core.files import File
+
+COPY_BLOCK = 1024 * 1024
+# boxes on the way from moov down to the chunk offset tables
+CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'edts', b'dinf'}
+MAX_MOOV_SIZE = 256 * 1024 * 1024
+
+VideoInfo = namedtuple('VideoInfo', ['duration', 'width', 'height', 'bitrate'])
+
+
+class Mp4Error(ValueError):
+    pass
+
+
+def iter_boxes(fh, end):
+    """
+    Yield ``(type, offset, size)`` for the top-level boxes of an open MP4 file.
+    Only box headers are read; payloads are skipped with seek().
+    """
+    offset = 0
+    while offset + 8 <= end:
+        fh.seek(offset)
+        size, kind = struct.unpack('>I4s', fh.read(8))
+        if size == 1:
+            size = struct.unpack('>Q', fh.read(8))[0]
+        elif size == 0:
+            size = end - offset
+        if size < 8 or offset + size > end:
+            raise Mp4Error(f'truncated {kind!r} box at {offset}')
+        yield kind, offset, size
+        offset += size
+
+
+def parse_boxes(data, start=0, end=None):
+    """
+    In-memory box tree of ``data``: ``[type, children]`` for CONTAINERS and
+    ``[type, payload]`` for everything else.
+    """
+    end = len(data) if end is None else end
+    nodes = []
+    while start + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', data, start)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, start + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - start
+        if size < header or start + size > end:
+            raise Mp4Error(f'truncated {kind!r} box inside moov')
+        if kind in CONTAINERS:
+            nodes.append([kind, parse_boxes(data, start + header, start + size)])
+        else:
+            nodes.append([kind, data[start + header:start + size]])
+        start += size
+    return nodes
+
+
+def serialize(nodes):
+    parts = []
+    for kind, body in nodes:
+        payload = serialize(body) if kind in CONTAINERS else body
+        parts.append(struct.pack('>I4s', 8 + len(payload), kind))
+        parts.append(payload)
+    return b''.join(parts)
+
+
+def _walk(nodes):
+    for node in nodes:
+        yield node
+        if node[0] in CONTAINERS:
+            yield from _walk(node[1])
+
+
+def _find(nodes, kind):
+    return next((node for node in nodes if node[0] == kind), None)
+
+
+def _offsets(kind, payload):
+    """Chunk offsets of an stco/co64 payload as a native-endian array."""
+    count = struct.unpack_from('>I', payload, 4)[0]
+    table = array('I' if kind == b'stco' else 'Q')
+    if table.itemsize != (4 if kind == b'stco' else 8):
+        raise Mp4Error('unsupported platform integer size')
+    table.frombytes(payload[8:8 + count * table.itemsize])
+    if sys.byteorder == 'little':
+        table.byteswap()
+    return table
+
+
+def _pack_offsets(kind, version_flags, table):
+    out = array(table.typecode, table)
+    if sys.byteorder == 'little':
+        out.byteswap()
+    return version_flags + struct.pack('>I', len(out)) + out.tobytes()
+
+
+def relocate(moov, shift):
+    """
+    Return a copy of the moov tree with every chunk offset passed through
+    ``shift``. stco tables that would overflow 32 bits become co64.
+    """
+    def copy(nodes):
+        result = []
+        for kind, body in nodes:
+            if kind in CONTAINERS:
+                result.append([kind, copy(body)])
+            elif kind in (b'stco', b'co64'):
+                moved = array('Q', (shift(offset) for offset in _offsets(kind, body)))
+                if kind == b'stco' and (not moved or max(moved) <= 0xFFFFFFFF):
+                    result.append([kind, _pack_offsets(kind, body[:4], array('I', moved))])
+                else:
+                    result.append([b'co64', _pack_offsets(b'co64', body[:4], moved)])
+            else:
+                result.append([kind, body])
+        return result
+    return copy(moov)
+
+
+def video_info(moov, file_size):
+    """Duration (seconds), display size and average bitrate from a parsed moov."""
+    mvhd = _find(moov, b'mvhd')
+    if mvhd is None:
+        raise Mp4Error('moov has no mvhd')
+    body = mvhd[1]
+    if body[0] == 1:
+        timescale, duration = struct.unpack_from('>IQ', body, 20)
+    else:
+        timescale, duration = struct.unpack_from('>II', body, 12)
+    seconds = duration / timescale if timescale else 0.0
+
+    width = height = None
+    for trak in (node for node in moov if node[0] == b'trak'):
+        mdia = _find(trak[1], b'mdia')
+        hdlr = mdia and _find(mdia[1], b'hdlr')
+        tkhd = _find(trak[1], b'tkhd')
+        if hdlr and tkhd and hdlr[1][8:12] == b'vide':
+            position = 88 if tkhd[1][0] == 1 else 76
+            w, h = struct.unpack_from('>II', tkhd[1], position)
+            width, height = w >> 16, h >> 16
+            break
+
+    bitrate = round(file_size * 8 / seconds) if seconds else None
+    return VideoInfo(round(seconds, 3), width, height, bitrate)
+
+
+def _copy_range(src, dst, start, length):
+    src.seek(start)
+    while length > 0:
+        block = src.read(min(COPY_BLOCK, length))
+        if not block:
+            raise Mp4Error('unexpected end of file')
+        dst.write(block)
+        length -= len(block)
+
+
+def faststart(src, dst=None):
+    """
+    Move ``moov`` in front of the media data of the MP4 open in ``src``.
+
+    Only the moov box is held in memory; media data is streamed to ``dst`` in
+    COPY_BLOCK pieces. Returns ``(info, rewritten)``; with ``dst=None``, or
+    when the file is already fast-start or fragmented, nothing is written.
+    """
+    src.seek(0, os.SEEK_END)
+    end = src.tell()
+    boxes = list(iter_boxes(src, end))
+    kinds = [kind for kind, _, _ in boxes]
+    if b'moov' not in kinds:
+        raise Mp4Error('not an MP4 file: no moov box')
+
+    _, moov_offset, moov_size = boxes[kinds.index(b'moov')]
+    if moov_size > MAX_MOOV_SIZE:
+        raise Mp4Error('moov box is unreasonably large')
+    src.seek(moov_offset)
+    moov = parse_boxes(src.read(moov_size))[0][1]
+    info = video_info(moov, end)
+
+    first_media = kinds.index(b'mdat') if b'mdat' in kinds else len(kinds)
+    fragmented = b'moof' in kinds or _find(moov, b'mvex') is not None
+    if dst is None or fragmented or kinds.index(b'moov') < first_media:
+        return info, False
+
+    new_size = moov_size
+    while True:
+        delta_before = new_size
+        delta_after = new_size - moov_size
+        relocated = relocate(moov, lambda offset: offset + (delta_before if offset < moov_offset else delta_after))
+        data = serialize([[b'moov', relocated]])
+        if len(data) == new_size:
+            break
+        # an stco table became co64, which shifts everything again
+        new_size = len(data)
+
+    for index, (kind, offset, size) in enumerate(boxes):
+        if index == first_media:
+            dst.write(data)
+        if kind != b'moov':
+            _copy_range(src, dst, offset, size)
+    return info, True
+
+
+def ingest_stored_video(fieldfile):
+    """
+    Rewrite a saved MP4 as fast-start through its storage and return its
+    VideoInfo. Local files are remuxed next to themselves and renamed into
+    place; remote storages go through a temporary copy.
+    """
+    storage, name = fieldfile.storage, fieldfile.name
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        path = None
+
+    if path:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with open(path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+                info, rewritten = faststart(src, dst)
+            if rewritten:
+                shutil.copymode(path, tmp_path)
+                os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return info
+
+    with tempfile.TemporaryFile() as src, tempfile.TemporaryFile() as dst:
+        with storage.open(name, 'rb') as remote:
+            shutil.copyfileobj(remote, src, COPY_BLOCK)
+        info, rewritten = faststart(src, dst)
+        if rewritten:
+            dst.seek(0)
+            storage.delete(name)
+            storage.save(name, File(dst, name=name))
+    return info
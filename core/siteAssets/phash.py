@@ -0,0 +1,141 @@
+# python files
+from collections import namedtuple
+from itertools import combinations
+
+# django files
+from django.apps import apps
+from django.db import models
+from django.db.models import F, Q
+
+# packages
+from PIL import Image, ImageOps
+
+HASH_BITS = 64
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+DEFAULT_MAX_DISTANCE = 8
+
+SimilarImage = namedtuple('SimilarImage', ['obj', 'distance'])
+
+
+def dhash(img):
+    """64-bit difference hash: 9x8 grayscale thumbnail, one bit per horizontal gradient."""
+    if img.format == 'JPEG':
+        # let libjpeg decode at 1/8 scale; we only need 9x8 pixels
+        img.draft('L', (64, 64))
+    img = ImageOps.exif_transpose(img)
+    pixels = list(img.convert('L').resize((9, 8), Image.Resampling.LANCZOS).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return to_signed(value)
+
+
+def to_signed(value):
+    """Map an unsigned 64-bit hash onto postgres' signed bigint range."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def hamming(a, b):
+    return ((a ^ b) & ((1 << 64) - 1)).bit_count()
+
+
+def fieldfile_phash(fieldfile):
+    """Hash of a FieldFile, read from the pending upload or from storage. None if unreadable."""
+    try:
+        if not fieldfile._committed:
+            fh = fieldfile.file
+            fh.seek(0)
+            try:
+                with Image.open(fh) as img:
+                    return dhash(img)
+            finally:
+                fh.seek(0)
+        with fieldfile.storage.open(fieldfile.name, 'rb') as fh, Image.open(fh) as img:
+            return dhash(img)
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError):
+        return None
+
+
+def chunk_expression(index):
+    expression = F('phash')
+    if index:
+        expression = expression.bitrightshift(index * CHUNK_BITS)
+    return expression.bitand(CHUNK_MASK)
+
+
+def phash_indexes(prefix):
+    """
+    Multi-index hashing: one expression index per 16-bit slice of ``phash``.
+    Two hashes within distance d share a slice within d // 4 bits, so a lookup
+    only probes a handful of exact slice values per index.
+    """
+    return [
+        models.Index(chunk_expression(i), name=f'{prefix}_phash_{i}')
+        for i in range(CHUNKS)
+    ]
+
+
+def _chunk_neighbours(chunk, radius):
+    values = {chunk}
+    for r in range(1, radius + 1):
+        for bits in combinations(range(CHUNK_BITS), r):
+            flipped = chunk
+            for bit in bits:
+                flipped ^= 1 << bit
+            values.add(flipped)
+    return values
+
+
+def similar_in(queryset, phash, max_distance=DEFAULT_MAX_DISTANCE):
+    """SimilarImage matches from ``queryset`` within ``max_distance`` bits of ``phash``."""
+    radius = max_distance // CHUNKS
+    condition = Q()
+    annotations = {}
+    for i in range(CHUNKS):
+        chunk = (phash >> (i * CHUNK_BITS)) & CHUNK_MASK
+        annotations[f'_phash_{i}'] = chunk_expression(i)
+        condition |= Q(**{f'_phash_{i}__in': _chunk_neighbours(chunk, radius)})
+
+    matches = []
+    for obj in queryset.annotate(**annotations).filter(condition):
+        distance = hamming(obj.phash, phash)
+        if distance <= max_distance:
+            matches.append(SimilarImage(obj, distance))
+    return sorted(matches, key=lambda match: match.distance)
+
+
+def hashed_models():
+    """Every model that mixes in PerceptualHashMixin."""
+    return [model for model in apps.get_models() if issubclass(model, PerceptualHashMixin)]
+
+
+def find_similar(obj, max_distance=DEFAULT_MAX_DISTANCE):
+    """Near-duplicates of ``obj`` across all hashed galleries, closest first."""
+    if obj.phash is None:
+        return []
+    matches = []
+    for model in hashed_models():
+        queryset = model._default_manager.all()
+        if model is type(obj):
+            queryset = queryset.exclude(pk=obj.pk)
+        matches.extend(similar_in(queryset, obj.phash, max_distance))
+    return sorted(matches, key=lambda match: match.distance)
+
+
+class PerceptualHashMixin:
+    """
+    Keeps ``phash`` in sync with the image in ``phash_source``. The hash is
+    taken from the pending upload before save, so it costs no extra query.
+    """
+    phash_source = 'image'
+
+    def save(self, *args, **kwargs):
+        fieldfile = getattr(self, self.phash_source)
+        if not fieldfile:
+            self.phash = None
+        elif self.phash is None or not fieldfile._committed:
+            self.phash = fieldfile_phash(fieldfile)
+        super().save(*args, **kwargs)
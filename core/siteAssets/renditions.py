@@ -0,0 +1,245 @@
+# python files
+import fcntl
+import hashlib
+import os
+import posixpath
+import time
+from contextlib import contextmanager
+from io import BytesIO
+
+# django files
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.signing import Signer
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+
+# packages
+from PIL import Image, ImageOps, features
+
+# your files
+from .imaging import atomic_write, draft_for_size
+
+FITS = ('fit', 'crop')
+MAX_DIMENSION = 4000
+FORMATS = {
+    'AVIF': ('image/avif', '.avif'),
+    'WEBP': ('image/webp', '.webp'),
+    'JPEG': ('image/jpeg', '.jpg'),
+}
+
+MAX_VERSIONS = 10_000
+
+_signer = Signer(salt='siteAssets.rendition')
+
+# name -> (expires, version) of remote sources, see source_version
+_versions = {}
+
+
+def _conf(name, default):
+    return getattr(settings, name, default)
+
+
+def cache_dir():
+    return _conf('IMAGE_RENDITION_CACHE_DIR', os.path.join(settings.BASE_DIR, 'media_cache'))
+
+
+def rendition_signature(name, width, height, fit):
+    return _signer.signature(f'{width}x{height}/{fit}/{name}')
+
+
+def rendition_url(name, width, height, fit='fit'):
+    """Signed url of a ``width``x``height`` rendition of the media file ``name``."""
+    url = reverse('image-rendition', kwargs={'width': width, 'height': height, 'fit': fit, 'name': name})
+    return f'{url}?s={rendition_signature(name, width, height, fit)}'
+
+
+def verify(name, width, height, fit, signature):
+    return bool(signature) and constant_time_compare(signature, rendition_signature(name, width, height, fit))
+
+
+def clean_name(name):
+    """Media-relative source path, or None if it tries to leave MEDIA_ROOT."""
+    name = posixpath.normpath(name)
+    if name.startswith(('/', '../')) or name in ('.', '..'):
+        return None
+    return name
+
+
+def negotiate_format(accept):
+    """Best output format the client accepts; AVIF > WEBP > JPEG."""
+    accept = accept or ''
+    if 'image/avif' in accept and features.check('avif'):
+        return 'AVIF'
+    if 'image/webp' in accept:
+        return 'WEBP'
+    return 'JPEG'
+
+
+def source_version(name):
+    """
+    Token that changes whenever the source file does: size and mtime for files
+    on local disk (one stat), the ETag on S3. Remote lookups are remembered for
+    IMAGE_RENDITION_VERSION_TTL seconds so cache hits don't each cost a HEAD.
+    Raises FileNotFoundError when the source is gone.
+    """
+    try:
+        stat = os.stat(default_storage.path(name))
+        return f'{stat.st_size}-{stat.st_mtime_ns}'
+    except NotImplementedError:
+        pass
+
+    now = time.monotonic()
+    entry = _versions.get(name)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    head = getattr(default_storage, 'head', None)
+    if head is not None:
+        headers = head(name)
+        if headers is None:
+            raise FileNotFoundError(name)
+        version = headers.get('ETag') or f"{headers.get('Content-Length')}-{headers.get('Last-Modified')}"
+    else:
+        version = f'{default_storage.size(name)}-{default_storage.get_modified_time(name).timestamp()}'
+    if len(_versions) >= MAX_VERSIONS:
+        _versions.clear()
+    _versions[name] = (now + _conf('IMAGE_RENDITION_VERSION_TTL', 60), version)
+    return version
+
+
+def cache_path(name, version, width, height, fit, fmt):
+    # the source's version is part of the key, so a replaced image gets new
+    # renditions; the stale ones age out through eviction
+    digest = hashlib.sha1(f'{width}x{height}/{fit}/{name}/{version}'.encode()).hexdigest()
+    return os.path.join(cache_dir(), digest[:2], digest[2:4], digest + FORMATS[fmt][1])
+
+
+@contextmanager
+def _locked(path):
+    """
+    Exclusive flock shared by every request for the same rendition, so threads
+    and worker processes asking for it at once queue here and only the first
+    one resizes. Locks are striped over 256 files to keep the inode count flat.
+    """
+    lock_dir = os.path.join(cache_dir(), '.locks')
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(os.path.join(lock_dir, os.path.basename(path)[:2]), 'a') as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def render(name, width, height, fit, fmt):
+    with default_storage.open(name, 'rb') as fh, Image.open(fh) as img:
+        draft_for_size(img, (width, height))
+        img = ImageOps.exif_transpose(img)
+        if fit == 'crop':
+            img = ImageOps.fit(img, (width, height), Image.Resampling.LANCZOS)
+        else:
+            img.thumbnail((width, height), Image.Resampling.LANCZOS)
+
+        if fmt == 'JPEG' and img.mode != 'RGB':
+            # flatten transparency onto white; JPEG has no alpha channel
+            rgba = img.convert('RGBA')
+            img = Image.new('RGB', rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.getchannel('A'))
+
+        buffer = BytesIO()
+        img.save(buffer, format=fmt, quality=_conf('IMAGE_RENDITION_QUALITY', 75))
+    return buffer.getvalue()
+
+
+def get_rendition(name, width, height, fit, fmt):
+    """
+    Return ``(path, content_type)`` of the cached rendition, creating it on a miss.
+    Hits only cost two stats (source and rendition) and a utime, which keeps
+    the LRU order up to date.
+    """
+    path = cache_path(name, source_version(name), width, height, fit, fmt)
+    if _touch(path):
+        return path, FORMATS[fmt][0]
+
+    with _locked(path):
+        # someone else may have rendered it while we waited for the lock
+        if not _touch(path):
+            atomic_write(path, render(name, width, height, fit, fmt))
+            maybe_evict()
+    return path, FORMATS[fmt][0]
+
+
+def open_rendition(name, width, height, fit, fmt):
+    """
+    get_rendition, opened for reading. Eviction in another worker can remove
+    the file between the lookup and the open; it is then rendered again.
+    """
+    path, content_type = get_rendition(name, width, height, fit, fmt)
+    try:
+        return open(path, 'rb'), content_type
+    except FileNotFoundError:
+        path, content_type = get_rendition(name, width, height, fit, fmt)
+        return open(path, 'rb'), content_type
+
+
+def _touch(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if time.time() - stat.st_mtime > 60:
+        os.utime(path)
+    return True
+
+
+def maybe_evict():
+    """
+    Trim the cache to IMAGE_RENDITION_CACHE_MAX_BYTES, least recently used first.
+    Runs at most once per IMAGE_RENDITION_EVICT_INTERVAL seconds across all workers.
+    """
+    marker = os.path.join(cache_dir(), '.last_eviction')
+    interval = _conf('IMAGE_RENDITION_EVICT_INTERVAL', 60)
+    try:
+        if time.time() - os.stat(marker).st_mtime < interval:
+            return
+    except FileNotFoundError:
+        pass
+    with open(marker, 'a'):
+        pass
+    os.utime(marker)
+    evict(_conf('IMAGE_RENDITION_CACHE_MAX_BYTES', 1024 ** 3))
+
+
+def evict(max_bytes):
+    entries, total = [], 0
+    stack = [cache_dir()]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with it:
+            for entry in it:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    stat = entry.stat(follow_symlinks=False)
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+    if total <= max_bytes:
+        return 0
+
+    removed = 0
+    # evict down to 90% so we don't sweep again on the very next miss
+    for _, size, path in sorted(entries):
+        if total <= max_bytes * 0.9:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
@@ -11,7 +11,16 @@ class HomeImageSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-
-
-
-
+class SimilarImageSerializer(serializers.Serializer):
+    """تصویر مشابه (احتمالاً تکراری) که با هش ادراکی پیدا شده است"""
+    model = serializers.CharField(source='obj._meta.label')
+    id = serializers.IntegerField(source='obj.pk')
+    image = serializers.SerializerMethodField()
+    distance = serializers.IntegerField()
+
+    def get_image(self, match):
+        image = getattr(match.obj, match.obj.phash_source)
+        request = self.context.get('request')
+        if image and request:
+            return request.build_absolute_uri(image.url)
+        return image.url if image else None
@@ -0,0 +1,81 @@
+# django files
+from django.db.models import DEFERRED
+from django.db.models.fields.files import FieldFile
+
+
+class FieldTrackingMixin:
+    """
+    Remembers the values an instance was loaded with, so save() overrides can
+    ask ``has_changed(field)`` instead of re-reading the row first. An update
+    without ``update_fields`` writes only the changed columns (plus auto_now
+    ones) and is skipped when nothing changed; a skipped save sends neither
+    pre_save nor post_save, so receivers only hear of real writes (and
+    auto_now fields are not bumped). Values mutated in place, such as
+    a dict inside a JSONField, are not seen. Put it before models.Model and
+    after mixins that set fields in save(), so their changes are seen too.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, (value for value in values if value is not DEFERRED)))
+        return instance
+
+    def _tracked_value(self, field):
+        value = self.__dict__.get(field.attname, DEFERRED)
+        return value.name if isinstance(value, FieldFile) else value
+
+    def has_changed(self, name):
+        """True if ``name`` differs from the loaded value; always True before the first save."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return True
+        field = self._meta.get_field(name)
+        if field.attname not in loaded:
+            # deferred when loaded: changed only if assigned since
+            return field.attname in self.__dict__
+        value = self.__dict__.get(field.attname, DEFERRED)
+        if isinstance(value, FieldFile) and not value._committed:
+            return True
+        return self._tracked_value(field) != loaded[field.attname]
+
+    def changed_fields(self):
+        return [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and not field.generated and self.has_changed(field.name)
+        ]
+
+    def _remember(self, field_names=None):
+        fields = self._meta.concrete_fields if field_names is None else [
+            self._meta.get_field(name) for name in field_names
+        ]
+        current = {
+            field.attname: self._tracked_value(field) for field in fields
+            if field.attname in self.__dict__ and not field.generated
+        }
+        # a new dict, never an update: copies of an instance (copy.copy) share it
+        self._loaded_values = {**getattr(self, '_loaded_values', {}), **current}
+
+    def mark_saved(self, *field_names):
+        """Take the current values of ``field_names`` as stored, after an UPDATE made outside save()."""
+        self._remember(field_names)
+
+    def save(self, *args, **kwargs):
+        if (
+            getattr(self, '_loaded_values', None) is not None and not self._state.adding
+            and kwargs.get('update_fields') is None and not kwargs.get('force_insert') and not args
+        ):
+            changed = self.changed_fields()
+            if changed:
+                changed += [
+                    field.name for field in self._meta.concrete_fields
+                    if getattr(field, 'auto_now', False) and field.name not in changed
+                ]
+            # an empty list makes Model.save() return without a query
+            kwargs['update_fields'] = changed
+        super().save(*args, **kwargs)
+        self._remember(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._remember(fields)
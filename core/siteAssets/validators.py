@@ -0,0 +1,84 @@
+# django files
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models.fields.files import FieldFile
+from django.template.defaultfilters import filesizeformat
+
+# packages
+from PIL import Image, UnidentifiedImageError
+
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+DEFAULT_MAX_PIXELS = 40_000_000
+DEFAULT_FORMATS = ('JPEG', 'MPO', 'PNG', 'WEBP', 'GIF', 'AVIF')
+
+
+def image_budget():
+    """``(max_bytes, max_pixels, formats)`` from settings."""
+    return (
+        getattr(settings, 'IMAGE_UPLOAD_MAX_BYTES', DEFAULT_MAX_BYTES),
+        getattr(settings, 'IMAGE_UPLOAD_MAX_PIXELS', DEFAULT_MAX_PIXELS),
+        getattr(settings, 'IMAGE_UPLOAD_FORMATS', DEFAULT_FORMATS),
+    )
+
+
+def inspect_image(fileobj):
+    """
+    ``(format, width, height)`` read from the image header only. Pixel data is
+    never decoded, so this costs a few KB whatever the image dimensions are.
+    """
+    position = fileobj.tell()
+    try:
+        fileobj.seek(0)
+        with Image.open(fileobj) as img:
+            return img.format, img.width, img.height
+    finally:
+        fileobj.seek(position)
+
+
+def check_image_upload(upload):
+    """
+    Reject an uploaded image that is over the byte, pixel or format budget,
+    before anything decodes it.
+    """
+    max_bytes, max_pixels, formats = image_budget()
+    size = getattr(upload, 'size', None)
+    if size is not None and size > max_bytes:
+        raise ValidationError(
+            'حجم تصویر %(size)s است؛ حداکثر حجم مجاز %(limit)s است.',
+            code='file_too_large',
+            params={'size': filesizeformat(size), 'limit': filesizeformat(max_bytes)},
+        )
+
+    try:
+        fmt, width, height = inspect_image(upload)
+    except Image.DecompressionBombError:
+        raise ValidationError('ابعاد تصویر بیش از حد بزرگ است.', code='too_many_pixels')
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        raise ValidationError('فایل ارسال‌شده یک تصویر معتبر نیست.', code='invalid_image')
+
+    if fmt not in formats:
+        raise ValidationError(
+            'فرمت %(format)s پشتیبانی نمی‌شود.',
+            code='invalid_format',
+            params={'format': fmt},
+        )
+    if width * height > max_pixels:
+        raise ValidationError(
+            'ابعاد تصویر %(width)sx%(height)s بیش از حد مجاز (%(megapixels)s مگاپیکسل) است.',
+            code='too_many_pixels',
+            params={'width': width, 'height': height, 'megapixels': round(max_pixels / 1_000_000, 1)},
+        )
+
+
+def validate_image_upload(value):
+    """
+    Field validator for image uploads. Files already in storage are skipped,
+    so re-saving a form with an unchanged image does not touch the storage.
+    """
+    if not value:
+        return
+    if isinstance(value, FieldFile):
+        if value._committed:
+            return
+        value = value.file
+    check_image_upload(value)
@@ -1,17 +1,91 @@
+# python files
+import os
+
+# django files
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_safe
+
+# packages
+from PIL import Image
+
 # rest files
 from rest_framework import viewsets, status
-from rest_framework.permissions import AllowAny
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
 
 # your files
 from .models import HomeImage
+from .phash import DEFAULT_MAX_DISTANCE, find_similar
 from .serializers import (
     HomeImageSerializer,
+    SimilarImageSerializer,
 )
+from . import renditions
+
+
+class SimilarImagesMixin:
+    """
+    اکشن similar: تصاویر تکراری یا بسیار مشابه در همه‌ی گالری‌ها (فقط ادمین).
+    ?distance= sets the maximum hamming distance (0-16, default 8).
+    """
 
+    @action(detail=True, methods=['GET'], permission_classes=[IsAdminUser])
+    def similar(self, request, pk=None):
+        try:
+            distance = int(request.query_params.get('distance', DEFAULT_MAX_DISTANCE))
+        except ValueError:
+            distance = -1
+        if not 0 <= distance <= 16:
+            return Response({'detail': 'distance باید عددی بین 0 تا 16 باشد'}, status=status.HTTP_400_BAD_REQUEST)
+        matches = find_similar(self.get_object(), distance)
+        return Response(SimilarImageSerializer(matches, many=True, context={'request': request}).data)
 
-class HomeImagesViewSets(viewsets.ModelViewSet):
+
+class HomeImagesViewSets(SimilarImagesMixin, viewsets.ModelViewSet):
     queryset = HomeImage.objects.all()
     serializer_class = HomeImageSerializer
     permission_classes = (AllowAny,)
 
 
+@require_safe
+def image_rendition(request, width, height, fit, name):
+    """
+    /media/img/<w>x<h>/<fit>/<path>?s=<signature>
+
+    نسخه‌ی تغییر اندازه‌یافته‌ی یک تصویر را در اولین درخواست می‌سازد و در کش دیسک نگه می‌دارد.
+    The output format follows the Accept header (AVIF, WEBP, then JPEG).
+    """
+    name = renditions.clean_name(name)
+    if (
+        name is None or fit not in renditions.FITS
+        or not 0 < width <= renditions.MAX_DIMENSION
+        or not 0 < height <= renditions.MAX_DIMENSION
+    ):
+        raise Http404
+    if not renditions.verify(name, width, height, fit, request.GET.get('s')):
+        return HttpResponseForbidden()
+
+    fmt = renditions.negotiate_format(request.headers.get('Accept'))
+    accel_prefix = getattr(settings, 'IMAGE_RENDITION_ACCEL_REDIRECT', None)
+    try:
+        if accel_prefix:
+            path, content_type = renditions.get_rendition(name, width, height, fit, fmt)
+        else:
+            fh, content_type = renditions.open_rendition(name, width, height, fit, fmt)
+    except (OSError, Image.DecompressionBombError):
+        # missing source or not an image
+        raise Http404
+
+    if accel_prefix:
+        # let nginx send the cached file itself
+        response = HttpResponse(content_type=content_type)
+        relative = os.path.relpath(path, renditions.cache_dir()).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + relative
+    else:
+        # FileResponse goes through wsgi.file_wrapper, i.e. sendfile() under gunicorn/uwsgi
+        response = FileResponse(fh, content_type=content_type)
+    response['Vary'] = 'Accept'
+    response['Cache-Control'] = 'public, max-age=2592000'
+    return response